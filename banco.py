@@ -0,0 +1,352 @@
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from estatisticas import linhas_estatisticas
+
+# ======================================
+# BANCO DE DADOS (SQLite)
+# ======================================
+# Conexões e migrações do esquema SQLite, sem depender do Streamlit. As
+# consultas ficam no repositório (repositorio.py), comum ao SQLite e ao
+# PostgreSQL.
+DB_CAMINHO = "calendario.db"
+
+
+# Ajustes aplicados a toda conexão. WAL deixa leitores e o escritor
+# trabalharem ao mesmo tempo; synchronous=NORMAL é seguro em WAL e evita um
+# fsync por commit; cache_size negativo é em KiB.
+PRAGMAS = {
+    "synchronous": "NORMAL",
+    "cache_size": -20000,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+BUSY_TIMEOUT_MS = 5000
+TENTATIVAS_ESCRITA = 5
+LEITURAS_MAX = 8
+
+
+def conectar(caminho=DB_CAMINHO, check_same_thread=True):
+    conn = sqlite3.connect(
+        caminho,
+        check_same_thread=check_same_thread,
+        timeout=BUSY_TIMEOUT_MS / 1000
+    )
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    for nome, valor in PRAGMAS.items():
+        conn.execute(f"PRAGMA {nome} = {valor}")
+    return conn
+
+
+class BancoSQLite:
+    # Pool para a página: as leituras usam conexões de uma fila limitada,
+    # compartilhada entre threads (o Streamlit abre uma thread nova a cada
+    # rerun, então conexões por thread não seriam reaproveitadas), e todas as
+    # escritas passam por uma única conexão protegida por uma trava, com
+    # BEGIN IMMEDIATE e novas tentativas se outro processo estiver segurando
+    # o banco.
+
+    def __init__(self, caminho=DB_CAMINHO, leituras_max=LEITURAS_MAX):
+        self.caminho = caminho
+        self._livres = queue.Queue(maxsize=leituras_max)
+        self._vagas = threading.BoundedSemaphore(leituras_max)
+        self._trava_escrita = threading.Lock()
+        self._conn_escrita = conectar(caminho, check_same_thread=False)
+        self._conn_escrita.execute("PRAGMA journal_mode = WAL")
+
+    @contextmanager
+    def leitura(self):
+        # No máximo leituras_max conexões em uso; as demais threads esperam.
+        # Conexões novas só são abertas quando não há nenhuma livre na fila.
+        with self._vagas:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                conn = conectar(self.caminho, check_same_thread=False)
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._livres.put_nowait(conn)
+
+    @contextmanager
+    def escrita(self):
+        with self._trava_escrita:
+            conn = self._conn_escrita
+            self._iniciar_transacao(conn)
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+
+    def preparar(self):
+        with self._trava_escrita:
+            preparar_banco(self._conn_escrita)
+
+    def fechar(self):
+        with self._trava_escrita:
+            self._conn_escrita.close()
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                break
+
+    @staticmethod
+    def _iniciar_transacao(conn):
+        # BEGIN IMMEDIATE pega a trava de escrita já no início: se o banco
+        # estiver ocupado, o erro aparece aqui (antes de qualquer alteração) e
+        # pode ser repetido com segurança
+        for tentativa in range(TENTATIVAS_ESCRITA):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as erro:
+                if "locked" not in str(erro) or tentativa == TENTATIVAS_ESCRITA - 1:
+                    raise
+                time.sleep(0.05 * 2 ** tentativa)
+
+
+def data_iso(valor):
+    # Converte date/datetime/texto para o formato armazenado (AAAA-MM-DD)
+    if valor is None:
+        return None
+    return pd.to_datetime(valor).date().isoformat()
+
+
+def migrar_datas_eventos(conn):
+    # Linhas que o SQLite já sabe interpretar são corrigidas direto no SQL
+    conn.execute("""
+        UPDATE eventos SET data = date(data)
+        WHERE date(data) IS NOT NULL AND data <> date(data)
+    """)
+    conn.execute("""
+        UPDATE eventos SET fim = COALESCE(date(fim), data)
+        WHERE fim IS NULL OR (date(fim) IS NOT NULL AND fim <> date(fim))
+    """)
+
+    # Formatos livres restantes (ex.: 05/01/2026) são convertidos pelo pandas
+    pendentes = conn.execute(
+        "SELECT id, data, fim FROM eventos WHERE date(data) IS NULL OR date(fim) IS NULL"
+    ).fetchall()
+    for id_evento, data_txt, fim_txt in pendentes:
+        data_conv = pd.to_datetime(data_txt, errors="coerce", dayfirst=True)
+        if pd.isna(data_conv):
+            continue
+        fim_conv = pd.to_datetime(fim_txt, errors="coerce", dayfirst=True)
+        if pd.isna(fim_conv):
+            fim_conv = data_conv
+        conn.execute(
+            "UPDATE eventos SET data = ?, fim = ? WHERE id = ?",
+            (data_conv.date().isoformat(), fim_conv.date().isoformat(), id_evento)
+        )
+
+
+# ======================================
+# MIGRAÇÕES DO ESQUEMA
+# ======================================
+# Cada passo leva o banco da versão N-1 para N (PRAGMA user_version). Só os
+# passos que faltam são aplicados, todos em uma única transação; num banco já
+# atualizado a inicialização se resume à leitura do user_version. Novos
+# passos entram sempre no fim da lista.
+def _coluna_existe(conn, tabela, coluna):
+    info = conn.execute(f"PRAGMA table_info({tabela})").fetchall()
+    return coluna in [col[1] for col in info]
+
+
+def _migracao_esquema_base(conn):
+    # Tabelas originais; bancos antigos podem já tê-las sem algumas colunas
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS calendarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome_calendario TEXT UNIQUE NOT NULL,
+            descricao TEXT,
+            nivel_ensino TEXT
+        )
+    """)
+    if not _coluna_existe(conn, "calendarios", "nivel_ensino"):
+        conn.execute("ALTER TABLE calendarios ADD COLUMN nivel_ensino TEXT")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS eventos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            titulo TEXT NOT NULL,
+            descricao TEXT,
+            fim TEXT,
+            id_calendario INTEGER
+        )
+    """)
+    if not _coluna_existe(conn, "eventos", "fim"):
+        conn.execute("ALTER TABLE eventos ADD COLUMN fim TEXT")
+    if not _coluna_existe(conn, "eventos", "id_calendario"):
+        conn.execute("ALTER TABLE eventos ADD COLUMN id_calendario INTEGER")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            senha TEXT NOT NULL,
+            perfil TEXT NOT NULL
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS semestres (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_calendario INTEGER NOT NULL,
+            nome_semestre TEXT NOT NULL,
+            data_inicio TEXT NOT NULL,
+            data_fim TEXT NOT NULL,
+            UNIQUE (id_calendario, nome_semestre)
+        )
+    """)
+
+    # Calendário e usuário admin padrões
+    if conn.execute("SELECT 1 FROM calendarios LIMIT 1").fetchone() is None:
+        conn.execute(
+            "INSERT INTO calendarios (nome_calendario, descricao, nivel_ensino) VALUES (?, ?, ?)",
+            ("Calendário Geral", "Calendário padrão inicial", "Geral")
+        )
+    if conn.execute("SELECT 1 FROM usuarios WHERE username = 'admin'").fetchone() is None:
+        senha_hash = hashlib.sha256("admin123".encode()).hexdigest()
+        conn.execute(
+            "INSERT INTO usuarios (username, senha, perfil) VALUES (?, ?, ?)",
+            ("admin", senha_hash, "admin")
+        )
+
+
+def _migracao_datas_e_indices(conn):
+    # data/fim passam a ser sempre ISO (AAAA-MM-DD) e fim nunca é nulo, o que
+    # permite comparar as colunas diretamente e usar o índice nas consultas
+    # de sobreposição de intervalo.
+    migrar_datas_eventos(conn)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_eventos_calendario_periodo "
+        "ON eventos (id_calendario, data, fim)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_semestres_calendario_inicio "
+        "ON semestres (id_calendario, data_inicio)"
+    )
+
+
+def _migracao_versoes_dados(conn):
+    # Versões dos dados (invalidação do cache de leitura)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS versoes_dados (
+            id_calendario INTEGER PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+
+def _migracao_recorrencia(conn):
+    # Regra de recorrência e datas excluídas (ver recorrencia.py)
+    if not _coluna_existe(conn, "eventos", "recorrencia"):
+        conn.execute("ALTER TABLE eventos ADD COLUMN recorrencia TEXT")
+    if not _coluna_existe(conn, "eventos", "excecoes"):
+        conn.execute("ALTER TABLE eventos ADD COLUMN excecoes TEXT")
+
+
+def _migracao_busca_textual(conn):
+    # Índice FTS5 de título/descrição (sem acentos e sem diferenciar
+    # maiúsculas), apontando para as linhas de eventos; os gatilhos o mantêm
+    # em dia em toda escrita, inclusive as feitas fora do app
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS eventos_fts USING fts5(
+            titulo, descricao,
+            content='eventos', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS eventos_fts_ai AFTER INSERT ON eventos BEGIN
+            INSERT INTO eventos_fts (rowid, titulo, descricao)
+            VALUES (new.id, new.titulo, new.descricao);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS eventos_fts_ad AFTER DELETE ON eventos BEGIN
+            INSERT INTO eventos_fts (eventos_fts, rowid, titulo, descricao)
+            VALUES ('delete', old.id, old.titulo, old.descricao);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS eventos_fts_au AFTER UPDATE OF titulo, descricao ON eventos BEGIN
+            INSERT INTO eventos_fts (eventos_fts, rowid, titulo, descricao)
+            VALUES ('delete', old.id, old.titulo, old.descricao);
+            INSERT INTO eventos_fts (rowid, titulo, descricao)
+            VALUES (new.id, new.titulo, new.descricao);
+        END
+    """)
+    # Eventos que já existiam
+    conn.execute("INSERT INTO eventos_fts (eventos_fts) VALUES ('rebuild')")
+
+
+def _migracao_estatisticas(conn):
+    # Contagens pré-agregadas do dashboard (ver estatisticas.py), calculadas
+    # aqui para os eventos existentes e depois mantidas pelo repositório
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS estatisticas_eventos (
+            id_calendario INTEGER NOT NULL,
+            mes TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            eventos INTEGER NOT NULL DEFAULT 0,
+            dias INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (id_calendario, mes, tipo)
+        )
+    """)
+    conn.execute("DELETE FROM estatisticas_eventos")
+    eventos = pd.read_sql_query(
+        "SELECT id_calendario, data, fim, tipo, recorrencia, excecoes FROM eventos", conn
+    )
+    conn.executemany(
+        "INSERT INTO estatisticas_eventos (id_calendario, mes, tipo, eventos, dias) VALUES (?, ?, ?, ?, ?)",
+        linhas_estatisticas(eventos)
+    )
+
+
+MIGRACOES = [
+    _migracao_esquema_base,
+    _migracao_datas_e_indices,
+    _migracao_versoes_dados,
+    _migracao_recorrencia,
+    _migracao_busca_textual,
+    _migracao_estatisticas,
+]
+VERSAO_ESQUEMA = len(MIGRACOES)
+
+
+def versao_esquema(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def preparar_banco(conn):
+    if versao_esquema(conn) >= VERSAO_ESQUEMA:
+        return
+
+    # BEGIN IMMEDIATE: se outro processo estiver migrando ao mesmo tempo,
+    # espera por ele e relê a versão antes de aplicar qualquer passo
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        atual = versao_esquema(conn)
+        for passo in MIGRACOES[atual:]:
+            passo(conn)
+        if atual < VERSAO_ESQUEMA:
+            conn.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dias_letivos import montar_calendario_letivo  # noqa: E402
+from feed_eventos import montar_feed_eventos  # noqa: E402
+from gerar_banco import eventos_sinteticos, feriados_csv, gerar_banco, semestres  # noqa: E402
+from pdf_calendario import bloco_mes, gerar_pdf, novo_documento  # noqa: E402
+from recorrencia import expandir_recorrencias  # noqa: E402
+from repositorio import criar_repositorio  # noqa: E402
+
+# ======================================
+# BENCHMARKS DOS CAMINHOS QUENTES
+# ======================================
+# Para cada escala, gera um banco sintético (gerar_banco.py) e mede a mediana
+# de alguns caminhos da página:
+#   carregar_eventos -> eventos de um calendário no semestre
+#   feed             -> ocorrências + lista de eventos do calendário visual
+#   dashboard        -> ocorrências por tipo e por mês e contagem da tabela do dashboard
+#   gerar_pdf        -> dias letivos + PDF do semestre
+#   gerar_pdf_todos_os_anos -> PDF de todos os eventos do calendário (um ano
+#                      por par de semestres: 1, 2 e 3 anos nas escalas)
+#   insercao_lote    -> LOTE_INSERCAO eventos em uma transação
+# E, fora das escalas, o custo fixo de cada PDF (pdf_calendario.novo_documento,
+# com a fonte registrada por add_font) e um lote de CALENDARIOS_LOTE PDFs do
+# mesmo ano, com os feriados em comum, para ver o reaproveitamento das grades
+# dos meses (pdf_calendario.bloco_mes).
+# O resultado vai para um JSON; tempos acima de benchmarks/limites.json (ms,
+# por escala e nos grupos fonte_pdf_ms e lote_pdf) ou mais lentos que um
+# resultado anterior (--base) além da tolerância fazem o script sair com
+# código 1.
+#
+#   python benchmarks/desempenho.py --saida resultados.json
+#   python benchmarks/desempenho.py --escalas grande --base resultados.json
+
+ESCALAS = {
+    "pequena": {"calendarios": 2, "semestres": 2, "eventos": 500},
+    "media": {"calendarios": 5, "semestres": 4, "eventos": 5000},
+    "grande": {"calendarios": 10, "semestres": 6, "eventos": 50000},
+}
+LIMITES_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "limites.json")
+LOTE_INSERCAO = 1000
+CALENDARIOS_LOTE = 20
+EVENTOS_LOTE = 20
+# Diferença mínima contra a base, para tempos de menos de 1 ms não acusarem
+# ruído como regressão
+FOLGA_BASE_MS = 1.0
+
+
+def _mediana_ms(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return round(statistics.median(tempos), 2)
+
+
+def medir_escala(url, parametros, repeticoes):
+    gerar_banco(url, parametros["calendarios"], parametros["semestres"], parametros["eventos"])
+    repo = criar_repositorio(url)
+    try:
+        calendarios = repo.carregar_calendarios()
+        id_cal = int(calendarios["id"].iloc[len(calendarios) // 2])
+        semestre = repo.carregar_semestres_por_calendario(id_cal).iloc[0]
+        inicio = pd.to_datetime(semestre["data_inicio"]).date()
+        fim = pd.to_datetime(semestre["data_fim"]).date()
+        df = repo.carregar_eventos(id_cal, inicio, fim)
+        df_todos = repo.carregar_eventos(id_cal)
+
+        def dashboard():
+            ocorrencias = repo.ocorrencias_por_mes(id_cal, inicio, fim)
+            ocorrencias.groupby("tipo")["eventos"].sum()
+            ocorrencias.groupby("mes")["eventos"].sum()
+            repo.contar_ocorrencias(id_cal, inicio=inicio, fim=fim)
+
+        def pdf():
+            gerar_pdf(df, titulo_extra="Benchmark", letivo=montar_calendario_letivo(df, inicio, fim),
+                      inicio=inicio, fim=fim)
+
+        def pdf_todos_os_anos():
+            gerar_pdf(df_todos, titulo_extra="Benchmark")
+
+        lote, _ = eventos_sinteticos(semestres(2025, parametros["semestres"]), LOTE_INSERCAO, random.Random(1))
+        id_lote = repo.inserir_calendario("Benchmark lote", "", "Geral")
+
+        tempos = {
+            "carregar_eventos": _mediana_ms(lambda: repo.carregar_eventos(id_cal, inicio, fim), repeticoes),
+            "feed": _mediana_ms(lambda: montar_feed_eventos(expandir_recorrencias(df, inicio, fim)), repeticoes),
+            "dashboard": _mediana_ms(dashboard, repeticoes),
+            "gerar_pdf": _mediana_ms(pdf, repeticoes),
+            "gerar_pdf_todos_os_anos": _mediana_ms(pdf_todos_os_anos, repeticoes),
+            "insercao_lote": _mediana_ms(lambda: repo.inserir_eventos_lote(id_lote, lote), repeticoes),
+        }
+        return {"parametros": parametros, "eventos_no_semestre": len(df), "tempos_ms": tempos}
+    finally:
+        repo.fechar()
+
+
+def _documento_minimo():
+    pdf = novo_documento()
+    pdf.add_page()
+    pdf.set_font("DejaVu", size=10)
+    pdf.cell(0, 8, text="Calendário Acadêmico – 2025 | Trimestre 1")
+    return bytes(pdf.output())
+
+
+def medir_fonte(repeticoes):
+    # configuracao: só o FPDF com a fonte registrada; documento: uma linha de
+    # texto até o output (recorte e compressão da fonte)
+    return {
+        "configuracao": _mediana_ms(novo_documento, repeticoes),
+        "documento": _mediana_ms(_documento_minimo, repeticoes),
+    }
+
+
+def _calendarios_lote():
+    # Feriados do CSV de 2026 + EVENTOS_LOTE eventos próprios por calendário
+    periodos = semestres(2026, 2)
+    feriados = [f for f in feriados_csv() if f[0].startswith("2026")]
+    rnd = random.Random(7)
+    calendarios = []
+    for _ in range(CALENDARIOS_LOTE):
+        registros, _ = eventos_sinteticos(periodos, EVENTOS_LOTE, rnd)
+        df = pd.DataFrame(feriados + registros, columns=["data", "fim", "tipo", "titulo", "descricao"])
+        df["data"] = pd.to_datetime(df["data"])
+        df["fim"] = pd.to_datetime(df["fim"])
+        df["id"] = range(len(df))
+        df["recorrencia"] = None
+        calendarios.append(df)
+    return calendarios
+
+
+def medir_lote_pdf(repeticoes):
+    # Cada repetição começa com o cache de blocos vazio: só conta o que o
+    # próprio lote reaproveita
+    calendarios = _calendarios_lote()
+
+    def lote():
+        bloco_mes.cache_clear()
+        for df in calendarios:
+            gerar_pdf(df, titulo_extra="Benchmark", inicio=date(2026, 1, 1), fim=date(2026, 12, 31))
+
+    tempo = _mediana_ms(lote, repeticoes)
+    info = bloco_mes.cache_info()
+    return {
+        "pdfs": len(calendarios),
+        "lote_ms": tempo,
+        "por_pdf_ms": round(tempo / len(calendarios), 2),
+        "blocos_reaproveitados": round(info.hits / max(info.hits + info.misses, 1), 3),
+    }
+
+
+def tempos_por_grupo(escalas, fonte=None, lote_pdf=None):
+    # Tempos verificados contra limites.json e a base: um grupo por escala,
+    # mais o custo fixo da fonte e o lote de PDFs (só os valores em ms;
+    # blocos_reaproveitados é derivado)
+    grupos = {escala: resultado["tempos_ms"] for escala, resultado in escalas.items()}
+    if fonte:
+        grupos["fonte_pdf_ms"] = dict(fonte)
+    if lote_pdf:
+        grupos["lote_pdf"] = {nome: ms for nome, ms in lote_pdf.items() if nome.endswith("_ms")}
+    return grupos
+
+
+def verificar(tempos, limites, base=None, tolerancia=0.5):
+    # Lista de mensagens para cada tempo acima do limite ou da base
+    # (tempos e base no formato de tempos_por_grupo)
+    problemas = []
+    for grupo, medidos in tempos.items():
+        for nome, ms in medidos.items():
+            limite = limites.get(grupo, {}).get(nome)
+            if limite is not None and ms > limite:
+                problemas.append(f"{grupo}/{nome}: {ms:.1f} ms acima do limite de {limite} ms")
+            anterior = (base or {}).get(grupo, {}).get(nome)
+            if anterior and ms > anterior * (1 + tolerancia) + FOLGA_BASE_MS:
+                problemas.append(f"{grupo}/{nome}: {ms:.1f} ms contra {anterior:.1f} ms na base")
+    return problemas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do calendário em bancos sintéticos.")
+    parser.add_argument("--escalas", default="pequena,media", help=f"separadas por vírgula: {', '.join(ESCALAS)}")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", default=None, help="arquivo JSON com os resultados")
+    parser.add_argument("--limites", default=LIMITES_PADRAO, help="JSON com os limites em ms por escala")
+    parser.add_argument("--base", default=None, help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.5, help="piora aceita em relação à base (0.5 = 50%%)")
+    parser.add_argument("--banco", default=None, help="URL postgresql:// vazia, uma escala por vez (padrão: SQLite temporário por escala)")
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        for escala in [e.strip() for e in args.escalas.split(",") if e.strip()]:
+            url = args.banco or os.path.join(pasta, f"{escala}.db")
+            resultados[escala] = medir_escala(url, ESCALAS[escala], args.repeticoes)
+            tempos = resultados[escala]["tempos_ms"]
+            print(f"{escala:8s} " + "  ".join(f"{nome}={ms:.1f}ms" for nome, ms in tempos.items()))
+    fonte = medir_fonte(max(args.repeticoes, 30))
+    print("fonte    " + "  ".join(f"{nome}={ms:.1f}ms" for nome, ms in fonte.items()))
+    lote_pdf = medir_lote_pdf(args.repeticoes)
+    print("lote     " + "  ".join(f"{nome}={valor}" for nome, valor in lote_pdf.items()))
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({
+                "data": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "plataforma": platform.platform(),
+                "escalas": resultados,
+                "fonte_pdf_ms": fonte,
+                "lote_pdf": lote_pdf,
+            }, f, ensure_ascii=False, indent=2)
+
+    limites = {}
+    if args.limites and os.path.exists(args.limites):
+        with open(args.limites, encoding="utf-8") as f:
+            limites = json.load(f)
+    base = None
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            anterior = json.load(f)
+        base = tempos_por_grupo(anterior["escalas"], anterior.get("fonte_pdf_ms"), anterior.get("lote_pdf"))
+
+    problemas = verificar(tempos_por_grupo(resultados, fonte, lote_pdf), limites, base, args.tolerancia)
+    for problema in problemas:
+        print("REGRESSÃO:", problema)
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repositorio import criar_repositorio  # noqa: E402
+
+# ======================================
+# TESTE DE ESTRESSE – SESSÕES CONCORRENTES
+# ======================================
+# Simula várias sessões do Streamlit (threads) lendo e escrevendo no mesmo
+# banco através do repositório (SQLite temporário ou o PostgreSQL de --banco),
+# opcionalmente em vários processos (como réplicas do app). Falha (código de
+# saída 1) se alguma operação der erro (ex.: "database is locked") ou se o
+# número de eventos gravados não bater.
+#
+#   python benchmarks/estresse_concorrencia.py --sessoes 32 --processos 2 --segundos 10
+#   python benchmarks/estresse_concorrencia.py --banco postgresql://localhost/estresse
+
+# Mensagens de erro distintas mostradas no relatório
+MAX_MENSAGENS_FALHA = 10
+
+
+def _preparar(url, n_calendarios):
+    repo = criar_repositorio(url)
+    try:
+        repo.preparar()
+        ids = []
+        for i in range(n_calendarios):
+            nome = f"Estresse {i}"
+            id_cal = repo.id_calendario_por_nome(nome)
+            if id_cal is None:
+                id_cal = repo.inserir_calendario(nome, "", "Geral")
+            ids.append(id_cal)
+        return ids
+    finally:
+        repo.fechar()
+
+
+def _contar_eventos(url, ids):
+    repo = criar_repositorio(url)
+    try:
+        return sum(len(repo.carregar_eventos(id_cal)) for id_cal in ids)
+    finally:
+        repo.fechar()
+
+
+def _sessao(repo, ids, fim_em, taxa_escrita, resultado, trava):
+    rnd = random.Random()
+    leituras = escritas = 0
+    falhas = Counter()
+    while time.perf_counter() < fim_em:
+        id_cal = rnd.choice(ids)
+        inicio = date(2026, 1, 1) + timedelta(days=rnd.randrange(300))
+        try:
+            if rnd.random() < taxa_escrita:
+                repo.inserir_evento(inicio, "aula", "Estresse", "", inicio + timedelta(days=2), id_cal)
+                escritas += 1
+            else:
+                repo.versao_dados(id_cal)
+                repo.carregar_eventos(id_cal, inicio, inicio + timedelta(days=180))
+                leituras += 1
+        except Exception as erro:
+            falhas[f"{type(erro).__name__}: {erro}"] += 1
+    with trava:
+        resultado["leituras"] += leituras
+        resultado["escritas"] += escritas
+        resultado["erros"] += sum(falhas.values())
+        resultado["falhas"].update(falhas)
+
+
+def executar_processo(url, ids, sessoes, segundos, taxa_escrita):
+    repo = criar_repositorio(url)
+    resultado = {"leituras": 0, "escritas": 0, "erros": 0, "falhas": Counter()}
+    trava = threading.Lock()
+    fim_em = time.perf_counter() + segundos
+    threads = [
+        threading.Thread(target=_sessao, args=(repo, ids, fim_em, taxa_escrita, resultado, trava))
+        for _ in range(sessoes)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    repo.fechar()
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estresse de sessões concorrentes no banco do calendário.")
+    parser.add_argument("--sessoes", type=int, default=32, help="threads (sessões) por processo")
+    parser.add_argument("--processos", type=int, default=2, help="processos (réplicas) simultâneos")
+    parser.add_argument("--segundos", type=float, default=5.0)
+    parser.add_argument("--taxa-escrita", type=float, default=0.1, help="fração de operações de escrita")
+    parser.add_argument("--calendarios", type=int, default=5)
+    parser.add_argument("--banco", default=None, help="URL postgresql:// (padrão: SQLite temporário)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        url = args.banco or os.path.join(pasta, "estresse.db")
+        ids = _preparar(url, args.calendarios)
+        antes = _contar_eventos(url, ids)
+
+        with ProcessPoolExecutor(max_workers=args.processos) as executor:
+            futuros = [
+                executor.submit(executar_processo, url, ids, args.sessoes, args.segundos, args.taxa_escrita)
+                for _ in range(args.processos)
+            ]
+            parciais = [f.result() for f in futuros]
+
+        total = {k: sum(p[k] for p in parciais) for k in ("leituras", "escritas", "erros")}
+        falhas = sum((p["falhas"] for p in parciais), Counter())
+        gravados = _contar_eventos(url, ids) - antes
+
+    print(
+        f"{args.processos} processos x {args.sessoes} sessões em {args.segundos:.0f}s: "
+        f"{total['leituras']} leituras ({total['leituras'] / args.segundos:.0f}/s), "
+        f"{total['escritas']} escritas ({total['escritas'] / args.segundos:.0f}/s), "
+        f"{total['erros']} erros"
+    )
+    for mensagem, vezes in falhas.most_common(MAX_MENSAGENS_FALHA):
+        print(f"  {vezes}x {mensagem}")
+    if total["erros"]:
+        print(f"FALHA: {total['erros']} operações com erro")
+        return 1
+    if gravados != total["escritas"]:
+        print(f"FALHA: {gravados} eventos no banco para {total['escritas']} escritas confirmadas")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
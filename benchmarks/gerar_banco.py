@@ -0,0 +1,133 @@
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from recorrencia import montar_regra  # noqa: E402
+from repositorio import criar_repositorio  # noqa: E402
+
+# ======================================
+# GERADOR DE BANCOS SINTÉTICOS
+# ======================================
+# Cria um calendario.db (ou popula um PostgreSQL) com N calendários, M
+# semestres por calendário e K eventos por calendário, com tipos e durações
+# parecidos com os de um calendário real:
+#   - feriados: os de calendario_consolidado_2025_2027.csv, repetidos em cada
+#     calendário (um dia cada)
+#   - aula: blocos de 1 a 5 dias, concentrados dentro dos semestres
+#   - reunião: um dia
+#   - evento: de 1 a 7 dias, alguns de várias semanas (recessos, semanas
+#     acadêmicas)
+#   - uma fração das aulas entra como série semanal (recorrencia)
+#
+#   python benchmarks/gerar_banco.py --saida /tmp/bench.db --calendarios 10 --semestres 4 --eventos 5000
+
+CSV_FERIADOS = os.path.join(RAIZ, "calendario_consolidado_2025_2027.csv")
+NIVEIS = ["Graduação", "Pós-graduação", "Técnico", "FIC", "Geral"]
+
+# Fração de cada tipo entre os eventos gerados (além dos feriados do CSV)
+DISTRIBUICAO_TIPOS = {"aula": 0.70, "reunião": 0.15, "evento": 0.15}
+FRACAO_RECORRENTES = 0.01
+TITULOS = {
+    "aula": ["Aula", "Aula prática", "Laboratório", "Aula de campo", "Avaliação"],
+    "reunião": ["Reunião pedagógica", "Conselho de Classe", "Reunião de colegiado", "Reunião de área"],
+    "evento": ["Semana acadêmica", "Recesso", "Feira de ciências", "Palestra", "Jogos internos"],
+}
+
+
+def feriados_csv():
+    df = pd.read_csv(CSV_FERIADOS).dropna(subset=["tipo"])
+    return [(r.data, r.data, r.tipo, r.titulo, "") for r in df.itertuples(index=False)]
+
+
+def semestres(ano_inicial, quantidade):
+    # Dois semestres por ano: fevereiro a junho e agosto a dezembro
+    periodos = []
+    for i in range(quantidade):
+        ano = ano_inicial + i // 2
+        if i % 2 == 0:
+            periodos.append((f"{ano}.1", date(ano, 2, 9), date(ano, 6, 30)))
+        else:
+            periodos.append((f"{ano}.2", date(ano, 8, 3), date(ano, 12, 18)))
+    return periodos
+
+
+def _duracao(tipo, rnd):
+    if tipo == "aula":
+        return rnd.randint(0, 4)
+    if tipo == "reunião":
+        return 0
+    return rnd.choice([0, 0, 1, 2, 4, 6, 13, 20])
+
+
+def eventos_sinteticos(periodos, quantidade, rnd):
+    # Tuplas (data, fim, tipo, titulo, descricao) e séries (inicio, fim, regra)
+    tipos = rnd.choices(list(DISTRIBUICAO_TIPOS), weights=list(DISTRIBUICAO_TIPOS.values()), k=quantidade)
+    registros = []
+    series = []
+    for tipo in tipos:
+        _, inicio, fim = rnd.choice(periodos)
+        # 90% dentro do semestre; o resto nas férias em volta dele
+        if rnd.random() < 0.9:
+            dia = inicio + timedelta(days=rnd.randrange((fim - inicio).days + 1))
+        else:
+            dia = inicio - timedelta(days=rnd.randint(1, 40))
+        if tipo == "aula" and rnd.random() < FRACAO_RECORRENTES:
+            series.append((inicio, fim, montar_regra(rnd.sample(range(5), 2))))
+            continue
+        titulo = rnd.choice(TITULOS[tipo])
+        registros.append((
+            dia.isoformat(),
+            (dia + timedelta(days=_duracao(tipo, rnd))).isoformat(),
+            tipo,
+            titulo,
+            f"{titulo} gerada para benchmark" if rnd.random() < 0.5 else "",
+        ))
+    return registros, series
+
+
+def gerar_banco(url, calendarios=3, semestres_por_calendario=4, eventos_por_calendario=1000,
+                ano_inicial=2025, semente=42):
+    # Devolve o resumo do que foi criado
+    rnd = random.Random(semente)
+    repo = criar_repositorio(url)
+    try:
+        repo.preparar()
+        periodos = semestres(ano_inicial, semestres_por_calendario)
+        feriados = feriados_csv()
+        total = 0
+        for i in range(calendarios):
+            id_cal = repo.inserir_calendario(f"Benchmark {i + 1}", "Gerado por gerar_banco.py", NIVEIS[i % len(NIVEIS)])
+            for nome, inicio, fim in periodos:
+                repo.inserir_semestre(id_cal, nome, inicio, fim)
+            registros, series = eventos_sinteticos(periodos, eventos_por_calendario, rnd)
+            repo.inserir_eventos_lote(id_cal, feriados + registros)
+            for inicio, fim, regra in series:
+                repo.inserir_evento(inicio, "aula", "Aula semanal", "", fim, id_cal, regra)
+            total += len(feriados) + len(registros) + len(series)
+        return {"calendarios": calendarios, "semestres": calendarios * len(periodos), "eventos": total}
+    finally:
+        repo.fechar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um banco de calendário sintético para benchmarks.")
+    parser.add_argument("--saida", required=True, help="arquivo SQLite ou URL postgresql:// (precisa estar vazio)")
+    parser.add_argument("--calendarios", type=int, default=3)
+    parser.add_argument("--semestres", type=int, default=4, help="semestres por calendário")
+    parser.add_argument("--eventos", type=int, default=1000, help="eventos por calendário, além dos feriados")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    resumo = gerar_banco(args.saida, args.calendarios, args.semestres, args.eventos, semente=args.semente)
+    print(f"{resumo['calendarios']} calendários, {resumo['semestres']} semestres, {resumo['eventos']} eventos")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,37 @@
+import functools
+import io
+import os
+import tempfile
+from concurrent.futures import wait
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
-import sqlite3
 from streamlit_calendar import calendar
-from fpdf import FPDF
 from datetime import datetime, date, timedelta
-import hashlib
-import calendar as cal
+
+import repositorio
+from banco import data_iso
+from repositorio import ErroIntegridade, criar_repositorio
+from pdf_calendario import FilaPdf, nome_arquivo_pdf
+from feed_eventos import montar_feed_eventos
+from dias_letivos import montar_calendario_letivo
+from conflitos import IndiceIntervalos, conflitos_evento, validar_eventos
+from exportacao_lote import exportar_todos
+from importacao import importar_eventos, ler_linhas
+from recorrencia import (
+    NOMES_DIAS, descrever_regra, expandir_recorrencias, formatar_datas_usuario,
+    ler_datas_usuario, ler_regra, montar_regra, ocorrencias
+)
+from exportacao_eventos import FORMATOS as FORMATOS_EXPORTACAO, exportar_eventos
+import instrumentacao
+from instrumentacao import etapa, iniciar_execucao, trecho
 
 # ======================================
 # CONFIGURAÇÃO DA PÁGINA
 # ======================================
 st.set_page_config(page_title="Calendário Acadêmico – IFTO", layout="wide")
+iniciar_execucao()
+etapa("inicio")
 
 st.markdown(
     """
@@ -21,288 +42,330 @@ st.markdown(
     unsafe_allow_html=True
 )
 # ======================================
-# CORES E PRIORIDADES
+# NÍVEIS DE ENSINO
 # ======================================
-
-UI_CORES = {
-    "aula": "#008542",      # verde IFTO
-    "evento": "#F2AF00",    # amarelo
-    "feriado": "#D62828",   # vermelho
-    "reunião": "#006666",   # verde petróleo
-}
-
-PDF_CORES = {
-    "aula": (0, 133, 66),
-    "evento": (242, 175, 0),
-    "feriado": (214, 40, 40),
-    "reunião": (0, 102, 102),
-}
-
-PRIORIDADE = ["feriado", "reunião", "evento", "aula"]
-
 NIVEIS_ENSINO = ["Geral", "Graduação", "Pós-graduação", "Técnico", "FIC", "Outro"]
 
 # ======================================
-# BANCO DE DADOS (SQLite)
+# BANCO DE DADOS (repositório)
 # ======================================
+# Uma instância por processo. O banco vem de CALENDARIO_DB_URL: por padrão o
+# arquivo SQLite calendario.db; com uma URL postgresql:// várias réplicas do
+# app podem compartilhar o mesmo banco (ver repositorio.py).
 @st.cache_resource
-def get_connection():
-    conn = sqlite3.connect("calendario.db", check_same_thread=False)
-
-    # ---- Tabela de calendários ----
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS calendarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome_calendario TEXT UNIQUE NOT NULL,
-            descricao TEXT
-        )
-    """)
-    conn.commit()
-
-    # Adiciona coluna nivel_ensino se não existir (migração suave)
-    try:
-        conn.execute("ALTER TABLE calendarios ADD COLUMN nivel_ensino TEXT;")
-        conn.commit()
-    except Exception:
-        pass
-
-    # Garante que exista pelo menos um calendário padrão
-    cur_cal = conn.execute("SELECT * FROM calendarios")
-    if cur_cal.fetchone() is None:
-        conn.execute(
-            "INSERT INTO calendarios (nome_calendario, descricao, nivel_ensino) VALUES (?, ?, ?)",
-            ("Calendário Geral", "Calendário padrão inicial", "Geral")
-        )
-        conn.commit()
-
-    # ---- Tabela de eventos ----
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS eventos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data TEXT NOT NULL,
-            tipo TEXT NOT NULL,
-            titulo TEXT NOT NULL,
-            descricao TEXT
-        )
-    """)
-    # ---- Tabela de eventos ----
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS eventos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data TEXT NOT NULL,
-            tipo TEXT NOT NULL,
-            titulo TEXT NOT NULL,
-            descricao TEXT
-        )
-    """)
-    conn.commit()
+def get_repositorio():
+    repo = criar_repositorio()
+    repo.preparar()
+    return repo
 
-    # ---------- MIGRAÇÕES SEGURAS ----------
-    def coluna_existe(tabela, coluna):
-        info = conn.execute(f"PRAGMA table_info({tabela})").fetchall()
-        return coluna in [col[1] for col in info]
 
-    if not coluna_existe("eventos", "fim"):
-        conn.execute("ALTER TABLE eventos ADD COLUMN fim TEXT;")
-        conn.commit()
+repo = get_repositorio()
 
-    if not coluna_existe("eventos", "id_calendario"):
-        conn.execute("ALTER TABLE eventos ADD COLUMN id_calendario INTEGER;")
-        conn.commit()
 
+# Métricas no formato do Prometheus em http://127.0.0.1:<porta>/metrics, se
+# CALENDARIO_INSTRUMENTACAO e CALENDARIO_METRICAS_PORTA estiverem definidas
+# (endereço em CALENDARIO_METRICAS_ENDERECO, ver instrumentacao.py)
+@st.cache_resource
+def servidor_metricas(porta):
+    return instrumentacao.iniciar_servidor_metricas(porta)
 
 
-    # Coluna fim
-    try:
-        conn.execute("ALTER TABLE eventos ADD COLUMN fim TEXT;")
-        conn.commit()
-    except Exception:
-        pass
+if instrumentacao.ATIVO and os.environ.get("CALENDARIO_METRICAS_PORTA"):
+    servidor_metricas(int(os.environ["CALENDARIO_METRICAS_PORTA"]))
 
-    # Coluna id_calendario
-    try:
-        conn.execute("ALTER TABLE eventos ADD COLUMN id_calendario INTEGER;")
-        conn.commit()
-    except Exception:
-        pass
-
-    # ---- Tabela de usuários ----
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            senha TEXT NOT NULL,
-            perfil TEXT NOT NULL
-        )
-    """)
-    conn.commit()
-
-    # Usuário admin padrão
-    cursor = conn.execute("SELECT * FROM usuarios WHERE username = 'admin'")
-    if cursor.fetchone() is None:
-        senha_hash = hashlib.sha256("admin123".encode()).hexdigest()
-        conn.execute(
-            "INSERT INTO usuarios (username, senha, perfil) VALUES (?, ?, ?)",
-            ("admin", senha_hash, "admin")
-        )
-        conn.commit()
-
-    # ---- Tabela de semestres (por calendário) ----
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS semestres (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_calendario INTEGER NOT NULL,
-            nome_semestre TEXT NOT NULL,
-            data_inicio TEXT NOT NULL,
-            data_fim TEXT NOT NULL,
-            UNIQUE (id_calendario, nome_semestre)
-        )
-    """)
-    conn.commit()
+# ======================================
+# VERSÕES DOS DADOS / CACHE DE LEITURA
+# ======================================
+# Cada escrita incrementa a versão do calendário afetado (e a versão global,
+# id 0, quando muda a lista de calendários). As leituras em cache usam a versão
+# como parte da chave, então só voltam ao banco depois de uma escrita.
+VERSAO_GLOBAL = repositorio.VERSAO_GLOBAL
+TAMANHO_PAGINA = repositorio.TAMANHO_PAGINA
+CACHE_MAX_ENTRADAS = 64
 
-    return conn
 
+def versao_dados(id_calendario):
+    return repo.versao_dados(id_calendario)
 
-conn = get_connection()
+# ======================================
+# FRAGMENTOS (REEXECUÇÃO POR SEÇÃO)
+# ======================================
+# Cada seção interativa da página é um st.fragment: um widget dentro dela
+# reexecuta só a função da seção, com os dados vindos do cache. Escritas no
+# banco chamam st.rerun(), que volta a executar a página toda. Com a
+# instrumentação ligada, as execuções só do fragmento são medidas à parte
+# ("fragmento:<seção>").
+def fragmento(nome):
+    def decorar(funcao):
+        @functools.wraps(funcao)
+        def executar(*args, **kwargs):
+            ctx = get_script_run_ctx()
+            so_fragmento = instrumentacao.ATIVO and bool(ctx and ctx.fragment_ids_this_run)
+            if not so_fragmento:
+                return funcao(*args, **kwargs)
+            iniciar_execucao()
+            etapa(f"fragmento:{nome}")
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                instrumentacao.finalizar_execucao()
+        return st.fragment(executar)
+    return decorar
 
 # ======================================
 # FUNÇÕES DE USUÁRIO / LOGIN
 # ======================================
 def autenticar_usuario(username, senha):
-    senha_hash = hashlib.sha256(senha.encode()).hexdigest()
-    cursor = conn.execute(
-        "SELECT username, perfil FROM usuarios WHERE username = ? AND senha = ?",
-        (username, senha_hash)
-    )
-    row = cursor.fetchone()
-    if row:
-        return {"username": row[0], "perfil": row[1]}
-    return None
+    return repo.autenticar_usuario(username, senha)
 
 
 def criar_usuario(username, senha, perfil):
-    senha_hash = hashlib.sha256(senha.encode()).hexdigest()
-    conn.execute(
-        "INSERT INTO usuarios (username, senha, perfil) VALUES (?, ?, ?)",
-        (username, senha_hash, perfil)
-    )
-    conn.commit()
+    repo.criar_usuario(username, senha, perfil)
 
 # ======================================
 # FUNÇÕES DE CALENDÁRIOS
 # ======================================
 def carregar_calendarios():
-    return pd.read_sql_query(
-        "SELECT * FROM calendarios ORDER BY nome_calendario",
-        conn
-    )
+    return _carregar_calendarios_versao(versao_dados(VERSAO_GLOBAL))
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def _carregar_calendarios_versao(versao):
+    return repo.carregar_calendarios()
 
 
 def inserir_calendario(nome, descricao, nivel_ensino):
-    conn.execute(
-        "INSERT INTO calendarios (nome_calendario, descricao, nivel_ensino) VALUES (?, ?, ?)",
-        (nome, descricao, nivel_ensino)
-    )
-    conn.commit()
+    return repo.inserir_calendario(nome, descricao, nivel_ensino)
 
 
 def atualizar_calendario(id_cal, nome, descricao, nivel_ensino):
-    conn.execute(
-        "UPDATE calendarios SET nome_calendario = ?, descricao = ?, nivel_ensino = ? WHERE id = ?",
-        (nome, descricao, nivel_ensino, id_cal)
-    )
-    conn.commit()
+    repo.atualizar_calendario(id_cal, nome, descricao, nivel_ensino)
 
 
 def excluir_calendario(id_cal):
-    # Apagar eventos e semestres ligados ao calendário
-    conn.execute("DELETE FROM eventos WHERE id_calendario = ?", (id_cal,))
-    conn.execute("DELETE FROM semestres WHERE id_calendario = ?", (id_cal,))
-    conn.execute("DELETE FROM calendarios WHERE id = ?", (id_cal,))
-    conn.commit()
+    repo.excluir_calendario(id_cal)
 
 # ======================================
 # FUNÇÕES PARA SEMESTRES ACADÊMICOS
 # ======================================
 def carregar_semestres_por_calendario(id_calendario: int):
-    return pd.read_sql_query(
-        "SELECT * FROM semestres WHERE id_calendario = ? ORDER BY data_inicio",
-        conn,
-        params=(id_calendario,)
-    )
+    return _carregar_semestres_versao(int(id_calendario), versao_dados(id_calendario))
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def _carregar_semestres_versao(id_calendario, versao):
+    return repo.carregar_semestres_por_calendario(id_calendario)
+
+
+def inserir_semestre(id_calendario, nome_semestre, data_inicio, data_fim):
+    repo.inserir_semestre(id_calendario, nome_semestre, data_inicio, data_fim)
+
+
+def atualizar_semestre(id_semestre, id_calendario, data_inicio, data_fim):
+    repo.atualizar_semestre(id_semestre, id_calendario, data_inicio, data_fim)
+
+
+def excluir_semestre(id_semestre, id_calendario):
+    repo.excluir_semestre(id_semestre, id_calendario)
 
 # ======================================
 # FUNÇÕES DE EVENTOS
 # ======================================
-def carregar_eventos():
-    df = pd.read_sql_query("SELECT * FROM eventos ORDER BY date(data)", conn)
+def carregar_eventos_cache(id_calendario, inicio=None, fim=None):
+    # Leitura usada pela página: mesma consulta de carregar_eventos, mas
+    # reaproveitada entre execuções até a próxima escrita no calendário
+    return _carregar_eventos_versao(
+        int(id_calendario),
+        data_iso(inicio),
+        data_iso(fim),
+        versao_dados(id_calendario)
+    )
 
-    if df.empty:
-        return df
 
-    # Garante que a coluna fim exista
-    if "fim" not in df.columns:
-        df["fim"] = df["data"]
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def _carregar_eventos_versao(id_calendario, inicio, fim, versao):
+    return carregar_eventos(id_calendario, inicio, fim)
 
-    # Converte para datetime com segurança
-    df["data"] = pd.to_datetime(df["data"], errors="coerce")
-    df["fim"] = pd.to_datetime(df["fim"], errors="coerce")
 
-    # Corrige nulos/erros
-    hoje = pd.to_datetime(date.today())
-    df["data"] = df["data"].fillna(hoje)
-    df["fim"] = df["fim"].fillna(df["data"])
+def carregar_eventos(id_calendario=None, inicio=None, fim=None):
+    return repo.carregar_eventos(id_calendario, inicio, fim)
 
-    # Garante que tipo esteja em minúsculo e sem espaços
-    df["tipo"] = df["tipo"].astype(str).str.strip().str.lower()
 
-    return df
+def pagina_eventos_cache(id_calendario, busca="", pagina=1, inicio=None, fim=None):
+    # Uma página (LIMIT/OFFSET no banco) dos eventos do calendário, com busca
+    # por título; devolve (DataFrame da página, total, página efetiva)
+    versao = versao_dados(id_calendario)
+    args = (int(id_calendario), (busca or "").strip(), data_iso(inicio), data_iso(fim))
+    df, total = _pagina_eventos_versao(*args, max(int(pagina), 1), versao)
+    n_paginas = max((total + TAMANHO_PAGINA - 1) // TAMANHO_PAGINA, 1)
+    if pagina > n_paginas:
+        pagina = n_paginas
+        df, total = _pagina_eventos_versao(*args, pagina, versao)
+    return df, total, int(pagina)
 
 
-def inserir_evento(data_inicio, tipo, titulo, descricao, data_fim, id_calendario):
-    if data_fim is None:
-        data_fim = data_inicio
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO eventos (data, tipo, titulo, descricao, fim, id_calendario) "
-        "VALUES (?, ?, ?, ?, ?, ?)",
-        (str(data_inicio), tipo, titulo, descricao, str(data_fim), id_calendario)
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def _pagina_eventos_versao(id_calendario, busca, inicio, fim, pagina, versao):
+    return repo.pagina_eventos(
+        id_calendario, busca, inicio, fim, TAMANHO_PAGINA, (pagina - 1) * TAMANHO_PAGINA
     )
-    conn.commit()
-
-
-def atualizar_evento(id_evento, data_inicio, tipo, titulo, descricao, data_fim):
-    if data_fim is None:
-        data_fim = data_inicio
-
-    cur = conn.cursor()
-    cur.execute(
-        """
-        UPDATE eventos 
-        SET data = ?, tipo = ?, titulo = ?, descricao = ?, fim = ?
-        WHERE id = ?
-        """,
-        (
-            str(data_inicio),
-            tipo.strip().lower(),
-            titulo,
-            descricao,
-            str(data_fim),
-            id_evento
-        )
+
+
+def ocorrencias_por_mes_cache(id_calendario, inicio=None, fim=None):
+    # Ocorrências do período por mês × tipo (meses inteiros da tabela
+    # pré-agregada estatisticas_eventos, pontas contadas dos eventos)
+    return _ocorrencias_por_mes_versao(
+        int(id_calendario), data_iso(inicio), data_iso(fim), versao_dados(id_calendario)
+    )
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def _ocorrencias_por_mes_versao(id_calendario, inicio, fim, versao):
+    return repo.ocorrencias_por_mes(id_calendario, inicio, fim)
+
+
+def contar_ocorrencias_cache(id_calendario, busca="", inicio=None, fim=None):
+    # Ocorrências dos eventos da tabela (mesmo filtro e busca)
+    return _contar_ocorrencias_versao(
+        int(id_calendario), (busca or "").strip(), data_iso(inicio), data_iso(fim), versao_dados(id_calendario)
+    )
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def _contar_ocorrencias_versao(id_calendario, busca, inicio, fim, versao):
+    return repo.contar_ocorrencias(id_calendario, busca, inicio, fim)
+
+
+def carregar_ocorrencias_cache(id_calendario, inicio=None, fim=None):
+    # Como carregar_eventos_cache, mas com os eventos recorrentes já
+    # expandidos (uma linha por ocorrência) só dentro de [inicio, fim]
+    return _carregar_ocorrencias_versao(
+        int(id_calendario),
+        data_iso(inicio),
+        data_iso(fim),
+        versao_dados(id_calendario)
+    )
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def _carregar_ocorrencias_versao(id_calendario, inicio, fim, versao):
+    df = _carregar_eventos_versao(id_calendario, inicio, fim, versao)
+    return expandir_recorrencias(df, inicio, fim)
+
+
+def calendario_letivo_cache(id_calendario, inicio, fim):
+    # Dias letivos do semestre (dias_letivos.py); refeito só depois de uma
+    # escrita no calendário, como as demais leituras
+    return _calendario_letivo_versao(
+        int(id_calendario),
+        data_iso(inicio),
+        data_iso(fim),
+        versao_dados(id_calendario)
+    )
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def _calendario_letivo_versao(id_calendario, inicio, fim, versao):
+    df = _carregar_ocorrencias_versao(id_calendario, inicio, fim, versao)
+    return montar_calendario_letivo(df, inicio, fim)
+
+
+def carregar_feed_cache(id_calendario, inicio=None, fim=None):
+    return _carregar_feed_versao(
+        int(id_calendario),
+        data_iso(inicio),
+        data_iso(fim),
+        versao_dados(id_calendario)
+    )
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def _carregar_feed_versao(id_calendario, inicio, fim, versao):
+    df = _carregar_ocorrencias_versao(id_calendario, inicio, fim, versao)
+    if df.empty:
+        ano_base = date.today().year
+    else:
+        ano_base = int(df["data"].dt.year.mode()[0])
+    with trecho("montar_feed"):
+        return montar_feed_eventos(df), ano_base
+
+
+def inserir_evento(data_inicio, tipo, titulo, descricao, data_fim, id_calendario,
+                   recorrencia=None, excecoes=None):
+    repo.inserir_evento(
+        data_inicio, tipo, titulo, descricao, data_fim, id_calendario, recorrencia, excecoes
     )
-    conn.commit()
 
 
+def atualizar_evento(id_evento, data_inicio, tipo, titulo, descricao, data_fim,
+                     recorrencia=None, excecoes=None):
+    repo.atualizar_evento(
+        id_evento, data_inicio, tipo, titulo, descricao, data_fim, recorrencia, excecoes
+    )
+
 
 def excluir_evento(id_evento):
-    cur = conn.cursor()
-    cur.execute("DELETE FROM eventos WHERE id = ?", (id_evento,))
-    conn.commit()
+    repo.excluir_evento(id_evento)
+
+
+def regra_recorrencia(data_inicio, data_fim, dias_semana, intervalo, texto_excecoes):
+    # Regra e exceções do formulário; ValueError com a mensagem para a tela
+    if not dias_semana:
+        raise ValueError("Escolha ao menos um dia da semana para a repetição.")
+    regra = montar_regra(dias_semana, intervalo)
+    excecoes = ",".join(ler_datas_usuario(texto_excecoes))
+    if not len(ocorrencias(data_inicio, data_fim, regra, excecoes)):
+        raise ValueError("A repetição não gera nenhuma data entre o início e o fim.")
+    return regra, excecoes
+
+
+@st.cache_resource(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def _indice_conflitos_versao(id_calendario, versao):
+    # Compartilhado (sem cópia) entre as sessões: o índice não é alterado
+    return IndiceIntervalos(_carregar_eventos_versao(id_calendario, None, None, versao))
+
+
+def indice_conflitos_cache(id_calendario):
+    return _indice_conflitos_versao(int(id_calendario), versao_dados(id_calendario))
+
+
+def texto_conflitos(df_conflitos):
+    linhas = [
+        f"- {r.id} – {r.tipo} – {r.titulo} (a partir de {r.primeiro_dia.strftime('%d/%m/%Y')})"
+        for r in df_conflitos.itertuples()
+    ]
+    return "⚠️ Conflita com:\n" + "\n".join(linhas)
+
+
+def seletor_eventos(id_calendario, chave):
+    # Busca + página + selectbox só com os eventos da página; devolve o id
+    # escolhido ou None
+    busca = st.text_input("Buscar por título", key=f"{chave}_busca")
+    pagina = st.number_input("Página", min_value=1, value=1, step=1, key=f"{chave}_pagina")
+    df_pagina, total, pagina = pagina_eventos_cache(id_calendario, busca, pagina)
+    if df_pagina.empty:
+        st.info("Nenhum evento encontrado." if busca else "Nenhum evento cadastrado para este calendário.")
+        return None
+    n_paginas = (total + TAMANHO_PAGINA - 1) // TAMANHO_PAGINA
+    st.caption(f"Página {pagina} de {n_paginas} · {total} eventos")
+    escolhido = st.selectbox(
+        "Selecione o evento",
+        df_pagina.apply(rotulo_evento, axis=1).tolist(),
+        key=f"{chave}_evento"
+    )
+    return int(escolhido.split(" - ")[0])
+
+
+def rotulo_evento(r):
+    rotulo = f"{r['id']} - {r['data'].strftime('%d/%m/%Y')} a {r['fim'].strftime('%d/%m/%Y')} - {r['titulo']}"
+    if isinstance(r.get("recorrencia"), str) and r["recorrencia"]:
+        rotulo += f" ({descrever_regra(r['recorrencia'])})"
+    return rotulo
 
 # ======================================
 # CONTROLE DE SESSÃO / LOGIN
 # ======================================
+etapa("login")
 if "logged" not in st.session_state:
     st.session_state.logged = False
     st.session_state.username = ""
@@ -338,6 +401,7 @@ if st.sidebar.button("Sair"):
 # ======================================
 # GERENCIAMENTO DE USUÁRIOS E CALENDÁRIOS (ADMIN)
 # ======================================
+etapa("admin_calendarios")
 df_calendarios = carregar_calendarios()
 
 if st.session_state.perfil == "admin":
@@ -355,7 +419,7 @@ if st.session_state.perfil == "admin":
                     criar_usuario(novo_user, nova_senha, novo_perfil)
                     st.sidebar.success("Usuário criado com sucesso!")
                     st.rerun()
-                except sqlite3.IntegrityError:
+                except ErroIntegridade:
                     st.sidebar.error("Usuário já existe.")
 
     # ---- CALENDÁRIOS ----
@@ -373,7 +437,7 @@ if st.session_state.perfil == "admin":
                     inserir_calendario(nome_cal, desc_cal, nivel_cal)
                     st.sidebar.success("Calendário criado!")
                     st.rerun()
-                except sqlite3.IntegrityError:
+                except ErroIntegridade:
                     st.sidebar.error("Já existe um calendário com esse nome.")
 
     with st.sidebar.expander("✏️ Editar / Excluir calendário"):
@@ -422,6 +486,7 @@ else:
 # ======================================
 # SELEÇÃO DE CALENDÁRIO E SEMESTRE (VISUALIZAÇÃO)
 # ======================================
+etapa("selecao")
 st.markdown("## 🗂 Seleção de Calendário e Semestre")
 
 df_calendarios = carregar_calendarios()
@@ -475,9 +540,57 @@ else:
     )
     st.caption("Dashboard, calendário e PDF serão filtrados por este calendário e semestre.")
 
+# ======================================
+# BUSCA DE EVENTOS (TODOS OS CALENDÁRIOS)
+# ======================================
+etapa("busca")
+
+
+@fragmento("busca")
+def secao_busca(df_calendarios):
+    with st.expander("🔎 Buscar eventos em todos os calendários"):
+        texto_busca = st.text_input("Buscar no título e na descrição", key="busca_texto",
+                                    placeholder="ex.: conselho de classe")
+        col_cal, col_nivel, col_tipo = st.columns(3)
+        busca_cal = col_cal.selectbox("Calendário", ["Todos"] + df_calendarios["nome_calendario"].tolist(),
+                                      key="busca_calendario")
+        niveis = sorted(df_calendarios["nivel_ensino"].fillna("Geral").replace("", "Geral").unique())
+        busca_nivel = col_nivel.selectbox("Nível de ensino", ["Todos"] + niveis, key="busca_nivel")
+        busca_tipo = col_tipo.selectbox("Tipo", ["Todos", "aula", "evento", "feriado", "reunião"], key="busca_tipo")
+        busca_periodo = st.date_input("Período (opcional)", value=(), key="busca_periodo")
+
+        if texto_busca.strip():
+            id_busca = None if busca_cal == "Todos" else repo.id_calendario_por_nome(busca_cal)
+            periodo = tuple(busca_periodo) if isinstance(busca_periodo, (tuple, list)) else (busca_periodo,)
+            df_busca, total_busca = repo.buscar_eventos(
+                texto_busca,
+                id_calendario=id_busca,
+                nivel_ensino=None if busca_nivel == "Todos" else busca_nivel,
+                tipo=None if busca_tipo == "Todos" else busca_tipo,
+                inicio=periodo[0] if periodo else None,
+                fim=periodo[-1] if periodo else None
+            )
+            if df_busca.empty:
+                st.info("Nenhum evento encontrado.")
+            else:
+                df_busca = df_busca[["nome_calendario", "data", "fim", "tipo", "titulo", "descricao", "recorrencia"]].copy()
+                df_busca["data"] = df_busca["data"].dt.strftime("%d/%m/%Y")
+                df_busca["fim"] = df_busca["fim"].dt.strftime("%d/%m/%Y")
+                df_busca["recorrencia"] = [descrever_regra(r) if isinstance(r, str) and r else "" for r in df_busca["recorrencia"]]
+                df_busca = df_busca.rename(columns={"nome_calendario": "calendário", "recorrencia": "repetição"})
+                st.dataframe(df_busca, use_container_width=True, hide_index=True)
+                if total_busca > len(df_busca):
+                    st.caption(f"Mostrando os {len(df_busca)} primeiros de {total_busca} eventos; refine a busca.")
+                else:
+                    st.caption(f"{total_busca} eventos encontrados.")
+
+
+secao_busca(df_calendarios)
+
 # ======================================
 # GERENCIAMENTO DE SEMESTRES (ADMIN – POR CALENDÁRIO)
 # ======================================
+etapa("admin_semestres")
 if st.session_state.perfil == "admin":
     st.sidebar.markdown("### 📚 Semestres do calendário selecionado")
 
@@ -496,15 +609,10 @@ if st.session_state.perfil == "admin":
                 st.sidebar.error("Data de início não pode ser maior que a data de fim.")
             else:
                 try:
-                    conn.execute(
-                        "INSERT INTO semestres (id_calendario, nome_semestre, data_inicio, data_fim) "
-                        "VALUES (?, ?, ?, ?)",
-                        (id_cal_visual, novo_nome_sem, novo_ini.isoformat(), novo_fim.isoformat())
-                    )
-                    conn.commit()
+                    inserir_semestre(id_cal_visual, novo_nome_sem, novo_ini, novo_fim)
                     st.sidebar.success("Semestre adicionado!")
                     st.rerun()
-                except sqlite3.IntegrityError:
+                except ErroIntegridade:
                     st.sidebar.error("Já existe um semestre com esse nome neste calendário.")
 
     # Editar / excluir semestre
@@ -535,17 +643,12 @@ if st.session_state.perfil == "admin":
                 if novo_ini_ed > novo_fim_ed:
                     st.sidebar.error("Data inicial não pode ser maior que a final.")
                 else:
-                    conn.execute(
-                        "UPDATE semestres SET data_inicio=?, data_fim=? WHERE id=?",
-                        (novo_ini_ed.isoformat(), novo_fim_ed.isoformat(), int(row_sem["id"]))
-                    )
-                    conn.commit()
+                    atualizar_semestre(int(row_sem["id"]), id_cal_visual, novo_ini_ed, novo_fim_ed)
                     st.sidebar.success("Semestre atualizado!")
                     st.rerun()
 
             if st.button("Excluir semestre", key="btn_del_sem"):
-                conn.execute("DELETE FROM semestres WHERE id = ?", (int(row_sem["id"]),))
-                conn.commit()
+                excluir_semestre(int(row_sem["id"]), id_cal_visual)
                 st.sidebar.success("Semestre excluído!")
                 st.rerun()
 else:
@@ -555,12 +658,16 @@ else:
 # ======================================
 # SIDEBAR – CRUD EVENTOS (somente admin/editor)
 # ======================================
-df_eventos_all = carregar_eventos()
+etapa("crud_eventos")
 
-if st.session_state.perfil in ["admin", "editor"]:
-    st.sidebar.markdown("## ⚙️ Gerenciamento de eventos")
 
-    operacao = st.sidebar.radio(
+# Fragmento: mexer nos campos só reexecuta esta parte; gravações chamam
+# st.rerun() para atualizar a página inteira
+@fragmento("crud_eventos")
+def secao_eventos(id_calendario, nome_calendario, nivel):
+    st.markdown("## ⚙️ Gerenciamento de eventos")
+
+    operacao = st.radio(
         "Operação",
         ["Adicionar", "Editar", "Excluir"],
         index=0
@@ -568,57 +675,85 @@ if st.session_state.perfil in ["admin", "editor"]:
 
     # ---------- ADICIONAR ----------
     if operacao == "Adicionar":
-        st.sidebar.markdown("### ➕ Adicionar evento (com período)")
-        st.sidebar.caption(f"Calendário ativo: {nome_puro} ({nivel_cal_visual})")
+        st.markdown("### ➕ Adicionar evento (com período)")
+        st.caption(f"Calendário ativo: {nome_calendario} ({nivel})")
 
-        data_inicio = st.sidebar.date_input("Data de início", value=date.today())
-        data_fim = st.sidebar.date_input("Data de fim", value=date.today())
-        tipo_new = st.sidebar.selectbox(
+        data_inicio = st.date_input("Data de início", value=date.today())
+        data_fim = st.date_input("Data de fim", value=date.today())
+        tipo_new = st.selectbox(
             "Tipo do evento",
             ["aula", "evento", "feriado", "reunião"]
         )
-        titulo_new = st.sidebar.text_input("Título")
-        descricao_new = st.sidebar.text_area("Descrição")
+        titulo_new = st.text_input("Título")
+        descricao_new = st.text_area("Descrição")
+
+        # Repetição semanal: um único registro, de data de início até data de fim
+        repetir_new = st.checkbox("Repetir toda semana (até a data de fim)")
+        if repetir_new:
+            dias_new = st.multiselect(
+                "Dias da semana",
+                list(range(7)),
+                default=[data_inicio.weekday()],
+                format_func=lambda d: NOMES_DIAS[d]
+            )
+            intervalo_new = st.number_input("A cada quantas semanas", min_value=1, value=1, step=1)
+            excecoes_new = st.text_input("Sem ocorrência em (dd/mm/aaaa, separadas por vírgula)")
+
+        # Conflitos com os eventos já cadastrados, refeitos a cada alteração
+        # dos campos
+        conflitos_new = pd.DataFrame()
+        if data_fim >= data_inicio:
+            try:
+                regra_prev = (
+                    regra_recorrencia(data_inicio, data_fim, dias_new, intervalo_new, excecoes_new)
+                    if repetir_new else (None, None)
+                )
+            except ValueError:
+                regra_prev = None
+            if regra_prev is not None:
+                conflitos_new = conflitos_evento(
+                    indice_conflitos_cache(id_calendario), data_inicio, data_fim, tipo_new, *regra_prev
+                )
+        ignorar_conflitos_new = True
+        if not conflitos_new.empty:
+            st.warning(texto_conflitos(conflitos_new))
+            ignorar_conflitos_new = st.checkbox("Salvar mesmo com conflitos", key="ignorar_conflitos_new")
 
-        if st.sidebar.button("Salvar evento"):
+        if st.button("Salvar evento"):
             if data_fim < data_inicio:
-                st.sidebar.error("A data final não pode ser menor que a data inicial.")
+                st.error("A data final não pode ser menor que a data inicial.")
             elif titulo_new.strip() == "":
-                st.sidebar.error("Informe um título válido.")
+                st.error("Informe um título válido.")
+            elif not ignorar_conflitos_new:
+                st.error("Revise os conflitos ou marque \"Salvar mesmo com conflitos\".")
             else:
-                inserir_evento(data_inicio, tipo_new, titulo_new, descricao_new, data_fim, id_cal_visual)
-                st.sidebar.success("Evento salvo com sucesso!")
-                st.rerun()
+                try:
+                    regra_new, excecoes_regra_new = (
+                        regra_recorrencia(data_inicio, data_fim, dias_new, intervalo_new, excecoes_new)
+                        if repetir_new else (None, None)
+                    )
+                except ValueError as erro:
+                    st.error(str(erro))
+                else:
+                    inserir_evento(
+                        data_inicio, tipo_new, titulo_new, descricao_new, data_fim, id_calendario,
+                        regra_new, excecoes_regra_new
+                    )
+                    st.success("Evento salvo com sucesso!")
+                    st.rerun()
 
     # ---------- EDITAR ----------
     elif operacao == "Editar":
-        st.sidebar.markdown("### ✏️ Editar evento")
-        df_evt_cal = df_eventos_all.copy()
-
-        if "id_calendario" in df_evt_cal.columns:
-            df_evt_cal = df_evt_cal[df_evt_cal["id_calendario"] == id_cal_visual]
-        else:
-            df_evt_cal = df_evt_cal.iloc[0:0].copy()
+        st.markdown("### ✏️ Editar evento")
+        id_escolhido = seletor_eventos(id_calendario, "editar")
 
-        if df_evt_cal.empty:
-            st.sidebar.info("Nenhum evento cadastrado para este calendário.")
-        else:
-            df_evt_cal = df_evt_cal.copy()
-            df_evt_cal["data"] = pd.to_datetime(df_evt_cal["data"], errors="coerce")
-            df_evt_cal["fim"] = pd.to_datetime(df_evt_cal["fim"], errors="coerce")
-            df_evt_cal["label"] = df_evt_cal.apply(
-                lambda r: f"{r['id']} - {r['data'].strftime('%d/%m/%Y')} a {r['fim'].strftime('%d/%m/%Y')} - {r['titulo']}",
-                axis=1
-            )
-            escolhido = st.sidebar.selectbox("Selecione o evento", df_evt_cal["label"])
-            id_escolhido = int(escolhido.split(" - ")[0])
-            df_sel = df_evt_cal[df_evt_cal["id"] == id_escolhido]
-            if df_sel.empty:
-                st.sidebar.error("Evento não encontrado. Atualize a página.")
+        if id_escolhido is not None:
+            row_evt = repo.carregar_evento(id_escolhido)
+            if row_evt is None:
+                st.error("Evento não encontrado. Atualize a página.")
                 st.stop()
-            row_evt = df_sel.iloc[0]
 
-            with st.sidebar.form("form_editar"):
+            with st.form("form_editar"):
                 data_edit_inicio = st.date_input("Data de início", row_evt["data"].date())
                 data_edit_fim = st.date_input("Data de fim", row_evt["fim"].date())
                 tipo_edit = st.selectbox(
@@ -629,140 +764,241 @@ if st.session_state.perfil in ["admin", "editor"]:
                 titulo_edit = st.text_input("Título", value=row_evt["titulo"])
                 descricao_edit = st.text_area("Descrição", value=row_evt["descricao"] or "")
 
+                regra_atual = row_evt.get("recorrencia")
+                regra_atual = regra_atual if isinstance(regra_atual, str) and regra_atual else None
+                regra_lida = ler_regra(regra_atual) if regra_atual else {"dias": [], "intervalo": 1}
+                repetir_edit = st.checkbox("Repetir toda semana (até a data de fim)", value=bool(regra_atual))
+                dias_edit = st.multiselect(
+                    "Dias da semana",
+                    list(range(7)),
+                    default=regra_lida["dias"] or [row_evt["data"].weekday()],
+                    format_func=lambda d: NOMES_DIAS[d]
+                )
+                intervalo_edit = st.number_input(
+                    "A cada quantas semanas", min_value=1, value=regra_lida["intervalo"], step=1
+                )
+                excecoes_edit = st.text_input(
+                    "Sem ocorrência em (dd/mm/aaaa, separadas por vírgula)",
+                    value=formatar_datas_usuario(row_evt.get("excecoes"))
+                )
+                ignorar_conflitos_edit = st.checkbox("Salvar mesmo com conflitos")
+
                 salvar_evt = st.form_submit_button("Salvar alterações")
 
             if salvar_evt:
                 if data_edit_fim < data_edit_inicio:
-                    st.sidebar.error("A data final não pode ser menor que a inicial.")
+                    st.error("A data final não pode ser menor que a inicial.")
                 elif titulo_edit.strip() == "":
-                    st.sidebar.error("Título inválido.")
+                    st.error("Título inválido.")
                 else:
-                    atualizar_evento(
-                        id_escolhido,
-                        data_edit_inicio,
-                        tipo_edit,
-                        titulo_edit,
-                        descricao_edit,
-                        data_edit_fim
-                    )
-                    st.sidebar.success("Evento atualizado!")
-                    st.rerun()
+                    try:
+                        regra_edit, excecoes_regra_edit = (
+                            regra_recorrencia(
+                                data_edit_inicio, data_edit_fim, dias_edit, intervalo_edit, excecoes_edit
+                            )
+                            if repetir_edit else (None, None)
+                        )
+                    except ValueError as erro:
+                        st.error(str(erro))
+                    else:
+                        conflitos_edit = conflitos_evento(
+                            indice_conflitos_cache(id_calendario),
+                            data_edit_inicio,
+                            data_edit_fim,
+                            tipo_edit,
+                            regra_edit,
+                            excecoes_regra_edit,
+                            ignorar_id=id_escolhido
+                        )
+                        if not conflitos_edit.empty and not ignorar_conflitos_edit:
+                            st.warning(texto_conflitos(conflitos_edit))
+                            st.error("Revise os conflitos ou marque \"Salvar mesmo com conflitos\".")
+                        else:
+                            atualizar_evento(
+                                id_escolhido,
+                                data_edit_inicio,
+                                tipo_edit,
+                                titulo_edit,
+                                descricao_edit,
+                                data_edit_fim,
+                                regra_edit,
+                                excecoes_regra_edit
+                            )
+                            st.success("Evento atualizado!")
+                            st.rerun()
 
     # ---------- EXCLUIR ----------
     elif operacao == "Excluir":
-        st.sidebar.markdown("### 🗑️ Excluir evento")
-        df_evt_cal = df_eventos_all.copy()
-        if "id_calendario" in df_evt_cal.columns:
-            df_evt_cal = df_evt_cal[df_evt_cal["id_calendario"] == id_cal_visual]
-        else:
-            df_evt_cal = df_evt_cal.iloc[0:0].copy()
+        st.markdown("### 🗑️ Excluir evento")
+        id_escolhido = seletor_eventos(id_calendario, "excluir")
 
-        if df_evt_cal.empty:
-            st.sidebar.info("Nenhum evento cadastrado para este calendário.")
-        else:
-            df_evt_cal = df_evt_cal.copy()
-            df_evt_cal["data"] = pd.to_datetime(df_evt_cal["data"], errors="coerce")
-            df_evt_cal["fim"] = pd.to_datetime(df_evt_cal["fim"], errors="coerce")
-            df_evt_cal["label"] = df_evt_cal.apply(
-                lambda r: f"{r['id']} - {r['data'].strftime('%d/%m/%Y')} a {r['fim'].strftime('%d/%m/%Y')} - {r['titulo']}",
-                axis=1
-            )
-            escolhido = st.sidebar.selectbox("Selecione o evento", df_evt_cal["label"])
-            id_escolhido = int(escolhido.split(" - ")[0])
-
-            if st.sidebar.button("Excluir definitivamente"):
+        if id_escolhido is not None:
+            if st.button("Excluir definitivamente"):
                 excluir_evento(id_escolhido)
-                st.sidebar.success("Evento excluído.")
+                st.success("Evento excluído.")
                 st.rerun()
+    # ---------- IMPORTAR CSV/XLSX ----------
+    with st.expander("📥 Importar eventos (CSV/XLSX)"):
+        st.caption(
+            f"Destino: {nome_calendario}. Colunas: data, tipo, titulo (descricao e fim opcionais). "
+            "Dias consecutivos do mesmo evento viram um único período."
+        )
+        if "importacao_concluida" in st.session_state:
+            st.success(st.session_state.pop("importacao_concluida"))
+        arquivo_import = st.file_uploader("Arquivo", type=["csv", "xlsx"], key="import_arquivo")
+        simular_import = st.checkbox("Apenas simular (não grava)", value=True, key="import_simular")
+
+        if arquivo_import is not None and st.button("Importar", key="btn_importar"):
+            try:
+                relatorio = importar_eventos(
+                    repo,
+                    ler_linhas(arquivo_import, arquivo_import.name),
+                    id_calendario,
+                    simular=simular_import
+                )
+            except ValueError as erro:
+                st.error(str(erro))
+            else:
+                st.write(
+                    f"{relatorio['linhas']} linhas lidas ({relatorio['ignoradas']} em branco) → "
+                    f"{relatorio['novos']} eventos novos, {relatorio['ja_existentes']} já existentes. "
+                    f"{relatorio['linhas_por_segundo']:.0f} linhas/s."
+                )
+                if simular_import:
+                    st.dataframe(relatorio["eventos"], use_container_width=True)
+                elif relatorio["gravados"]:
+                    # Página inteira de novo, para o dashboard e o calendário
+                    st.session_state["importacao_concluida"] = f"{relatorio['gravados']} eventos importados!"
+                    st.rerun()
+
+
+if st.session_state.perfil in ["admin", "editor"]:
+    with st.sidebar:
+        secao_eventos(id_cal_visual, nome_puro, nivel_cal_visual)
 else:
     st.sidebar.warning("Você possui permissão apenas para visualizar o calendário e o dashboard.")
 
 # ======================================
 # DASHBOARD (FILTRADO POR CALENDÁRIO + SEMESTRE)
 # ======================================
-st.markdown("## 📊 Dashboard")
-
-df_eventos = carregar_eventos()
-if not df_eventos.empty and "id_calendario" in df_eventos.columns:
-    df_eventos = df_eventos[df_eventos["id_calendario"] == id_cal_visual]
-else:
-    df_eventos = df_eventos.iloc[0:0].copy()
+etapa("dashboard")
 
-if inicio_sem and fim_sem and not df_eventos.empty:
-    df_eventos_sem = df_eventos[
-        (df_eventos["data"].dt.date <= fim_sem) &
-        (df_eventos["fim"].dt.date >= inicio_sem)
-    ]
-else:
-    df_eventos_sem = df_eventos.copy()
-
-if df_eventos_sem.empty:
-    st.info("Nenhum evento cadastrado para este calendário/semestre.")
-else:
-    col1, col2, col3 = st.columns(3)
 
-    col1.metric("Total de eventos", len(df_eventos_sem))
-    col2.metric("Aulas", int((df_eventos_sem["tipo"] == "aula").sum()))
-    col3.metric("Feriados", int((df_eventos_sem["tipo"] == "feriado").sum()))
+@fragmento("dashboard")
+def secao_dashboard(id_calendario, inicio, fim):
+    st.markdown("## 📊 Dashboard")
 
-    df_eventos_sem["mes"] = df_eventos_sem["data"].dt.to_period("M").astype(str)
+    # Totais e gráficos contam ocorrências (cada ocorrência de uma série
+    # conta) dentro do semestre, como as ocorrências da tabela abaixo
+    df_ocorrencias = ocorrencias_por_mes_cache(id_calendario, inicio, fim)
 
-    st.markdown("### Eventos por tipo")
-    st.bar_chart(df_eventos_sem["tipo"].value_counts())
+    if df_ocorrencias.empty:
+        st.info("Nenhum evento cadastrado para este calendário/semestre.")
+    else:
+        por_tipo = df_ocorrencias.groupby("tipo")["eventos"].sum()
+        col1, col2, col3 = st.columns(3)
+
+        col1.metric("Total de eventos", int(por_tipo.sum()))
+        col2.metric("Aulas", int(por_tipo.get("aula", 0)))
+        col3.metric("Feriados", int(por_tipo.get("feriado", 0)))
+
+        st.markdown("### Eventos por tipo")
+        st.bar_chart(por_tipo[por_tipo > 0].sort_values(ascending=False))
+
+        st.markdown("### Eventos por mês (data de início)")
+        st.line_chart(df_ocorrencias.groupby("mes")["eventos"].sum())
+
+        st.markdown("### Tabela de eventos")
+        # Só a página visível é buscada no banco e formatada; eventos recorrentes
+        # aparecem uma vez, com a regra de repetição
+        col_busca, col_pagina = st.columns([3, 1])
+        busca_tabela = col_busca.text_input("Buscar por título", key="tabela_busca")
+        pagina_tabela = col_pagina.number_input("Página", min_value=1, value=1, step=1, key="tabela_pagina")
+        df_show, total_tabela, pagina_tabela = pagina_eventos_cache(
+            id_calendario, busca_tabela, pagina_tabela, inicio, fim
+        )
+        df_show = df_show[["id", "data", "fim", "tipo", "titulo", "descricao", "recorrencia"]].copy()
+        df_show["data"] = df_show["data"].dt.strftime("%d/%m/%Y")
+        df_show["fim"] = df_show["fim"].dt.strftime("%d/%m/%Y")
+        df_show["recorrencia"] = [descrever_regra(r) if isinstance(r, str) and r else "" for r in df_show["recorrencia"]]
+        df_show = df_show.rename(columns={"recorrencia": "repetição"})
+        st.dataframe(df_show, use_container_width=True, hide_index=True)
+        n_paginas_tabela = max((total_tabela + TAMANHO_PAGINA - 1) // TAMANHO_PAGINA, 1)
+        ocorrencias_tabela = contar_ocorrencias_cache(id_calendario, busca_tabela, inicio, fim)
+        st.caption(
+            f"Página {pagina_tabela} de {n_paginas_tabela} · {total_tabela} eventos · "
+            f"{ocorrencias_tabela} ocorrências"
+        )
 
-    st.markdown("### Eventos por mês (data de início)")
-    st.line_chart(df_eventos_sem.groupby("mes")["id"].count())
 
-    st.markdown("### Tabela de eventos")
-    df_show = df_eventos_sem[["id", "data", "fim", "tipo", "titulo", "descricao"]].copy()
-    df_show["data"] = df_show["data"].dt.strftime("%d/%m/%Y")
-    df_show["fim"] = df_show["fim"].dt.strftime("%d/%m/%Y")
-    st.dataframe(df_show, use_container_width=True)
+secao_dashboard(id_cal_visual, inicio_sem, fim_sem)
 
 # ======================================
-# EVENTOS PARA O CALENDÁRIO (FILTRADO)
+# VISÃO GERAL DA INSTITUIÇÃO (TODOS OS CALENDÁRIOS)
 # ======================================
-df_eventos_cal = carregar_eventos().copy()
+etapa("visao_geral")
 
-# Filtra pelo calendário selecionado
-if not df_eventos_cal.empty and "id_calendario" in df_eventos_cal.columns:
-    df_eventos_cal = df_eventos_cal[df_eventos_cal["id_calendario"] == id_cal_visual]
-else:
-    df_eventos_cal = df_eventos_cal.iloc[0:0].copy()
 
-# Filtra pelo semestre apenas se existir semestre ativo
-if inicio_sem and fim_sem and not df_eventos_cal.empty:
-    df_eventos_cal = df_eventos_cal[
-        (df_eventos_cal["fim"].dt.date >= inicio_sem) &
-        (df_eventos_cal["data"].dt.date <= fim_sem)
-    ]
+@fragmento("visao_geral")
+def secao_visao_geral(ano_padrao):
+    with st.expander("🏫 Visão geral de todos os calendários"):
+        ano_resumo = st.number_input("Ano", min_value=2000, max_value=2100,
+                                     value=ano_padrao, step=1, key="resumo_ano")
+        df_resumo = repo.resumo_institucional(date(int(ano_resumo), 1, 1), date(int(ano_resumo), 12, 31))
+        if df_resumo.empty:
+            st.info("Nenhum evento cadastrado neste ano.")
+        else:
+            tabela_resumo = df_resumo.pivot_table(
+                index=["nome_calendario", "nivel_ensino"], columns="tipo", values="eventos",
+                aggfunc="sum", fill_value=0
+            )
+            tabela_resumo["total"] = tabela_resumo.sum(axis=1)
+            tabela_resumo["dias de evento"] = df_resumo.groupby(["nome_calendario", "nivel_ensino"])["dias"].sum()
+            tabela_resumo.index.names = ["calendário", "nível de ensino"]
+            st.dataframe(tabela_resumo.reset_index(), use_container_width=True, hide_index=True)
 
-eventos_global = []
-if not df_eventos_cal.empty:
-    for _, row in df_eventos_cal.iterrows():
-        tipo_norm = str(row["tipo"]).strip().lower()
-        cor_hex = UI_CORES.get(tipo_norm, "#555555")
 
-        end_exclusive = (row["fim"] + timedelta(days=1)).strftime("%Y-%m-%d")
+secao_visao_geral((inicio_sem or date.today()).year)
 
-        eventos_global.append({
-            "title": row["titulo"],
-            "start": row["data"].strftime("%Y-%m-%d"),
-            "end": end_exclusive,
-            "description": row["descricao"] or "",
-            "color": cor_hex
-        })
+# ======================================
+# DIAS LETIVOS DO SEMESTRE
+# ======================================
+etapa("dias_letivos")
+
+
+@fragmento("dias_letivos")
+def secao_dias_letivos(id_calendario, inicio, fim):
+    if inicio is None:
+        return
+    letivo = calendario_letivo_cache(id_calendario, inicio, fim)
+
+    st.markdown("### 📆 Dias letivos")
+    st.caption("Segunda a sexta, sem os dias marcados como feriado.")
+    col_total, col_meses = st.columns([1, 3])
+    col_total.metric("Dias letivos no semestre", letivo.total)
+    col_meses.bar_chart(letivo.por_mes())
+
+    col_entre, col_enesimo = st.columns(2)
+    with col_entre:
+        letivo_de = st.date_input("De", value=inicio, key="letivo_de")
+        letivo_ate = st.date_input("Até", value=fim, key="letivo_ate")
+        st.write(f"**{letivo.dias_letivos_entre(letivo_de, letivo_ate)}** dias letivos no intervalo.")
+    with col_enesimo:
+        letivo_apos = st.date_input("Depois de", value=inicio, key="letivo_apos")
+        letivo_n = st.number_input("Quantos dias letivos", min_value=1, value=1, step=1, key="letivo_n")
+        dia_n = letivo.enesimo_dia_letivo(letivo_apos, int(letivo_n))
+        if dia_n is None:
+            st.write("O semestre termina antes disso.")
+        else:
+            st.write(f"{int(letivo_n)}º dia letivo: **{dia_n.strftime('%d/%m/%Y')}**")
 
-if not df_eventos_cal.empty:
-    ano_base = int(df_eventos_cal["data"].dt.year.mode()[0])
-else:
-    ano_base = date.today().year
+
+secao_dias_letivos(id_cal_visual, inicio_sem, fim_sem)
 
 # ======================================
 # CALENDÁRIO ANUAL – 12 MESES
 # ======================================
-st.markdown("## 🗓️ Visualização em calendário – 12 meses")
-
+etapa("calendario_12_meses")
 meses_nomes = [
     "Janeiro", "Fevereiro", "Março",
     "Abril", "Maio", "Junho",
@@ -770,319 +1006,346 @@ meses_nomes = [
     "Outubro", "Novembro", "Dezembro"
 ]
 
-for linha in range(0, 12, 3):
-    col1, col2, col3 = st.columns(3)
+OPCOES_CALENDARIO_BASE = {
+    "locale": "pt-br",
+    "headerToolbar": {"left": "", "center": "", "right": ""},
+    "dateClick": True
+}
 
-    # --------- COLUNA 1 ---------
-    with col1:
-        mes_num = linha + 1
-        st.subheader(f"{meses_nomes[linha]} / {ano_base}")
-        cal_state = calendar(
-            events=eventos_global,
-            options={
-                "initialView": "dayGridMonth",
-                "initialDate": f"{ano_base}-{mes_num:02d}-01",
-                "locale": "pt-br",
-                "height": 350,
-                "headerToolbar": {"left": "", "center": "", "right": ""},
-                "dateClick": True
-            },
-            key=f"mes_{mes_num}"
-        )
 
-        if cal_state and isinstance(cal_state, dict) and cal_state.get("callback") == "dateClick":
-            if st.session_state.perfil in ["admin", "editor"]:
-                dia = cal_state["dateClick"]["date"]
-                try:
-                    data_click = datetime.fromisoformat(dia).date()
-                except Exception:
-                    data_click = date.today()
-
-                st.markdown(f"### ➕ Novo evento em {data_click.strftime('%d/%m/%Y')}")
-                with st.form(f"add_{mes_num}_1"):
-                    tipo = st.selectbox("Tipo", ["aula", "evento", "feriado", "reunião"])
-                    data_inicio_click = st.date_input("Início", value=data_click)
-                    data_fim_click = st.date_input("Fim", value=data_click)
-                    titulo = st.text_input("Título")
-                    descricao = st.text_area("Descrição")
-                    salvar = st.form_submit_button("Salvar")
-
-                if salvar:
-                    if data_fim_click < data_inicio_click:
-                        st.error("Data final não pode ser menor que a inicial.")
-                    elif titulo.strip() == "":
-                        st.error("Informe um título válido.")
-                    else:
-                        inserir_evento(data_inicio_click, tipo, titulo, descricao, data_fim_click, id_cal_visual)
-                        st.success("Evento cadastrado!")
-                        st.rerun()
-
-    # --------- COLUNA 2 ---------
-    with col2:
-        mes_num = linha + 2
-        st.subheader(f"{meses_nomes[linha + 1]} / {ano_base}")
-        cal_state = calendar(
-            events=eventos_global,
-            options={
-                "initialView": "dayGridMonth",
-                "initialDate": f"{ano_base}-{mes_num:02d}-01",
-                "locale": "pt-br",
-                "height": 350,
-                "headerToolbar": {"left": "", "center": "", "right": ""},
-                "dateClick": True
-            },
-            key=f"mes_{mes_num}"
-        )
+def eventos_da_grade_mensal(eventos, ano, mes):
+    # Intervalo visível de um dayGridMonth em pt-br: 6 semanas começando no
+    # domingo anterior (ou igual) ao dia 1. "end" do FullCalendar é exclusivo.
+    primeiro = date(ano, mes, 1)
+    inicio_grade = primeiro - timedelta(days=(primeiro.weekday() + 1) % 7)
+    fim_grade = inicio_grade + timedelta(days=42)
+    inicio_txt = inicio_grade.isoformat()
+    fim_txt = fim_grade.isoformat()
+    return [ev for ev in eventos if ev["start"] < fim_txt and ev["end"] > inicio_txt]
 
-        if cal_state and isinstance(cal_state, dict) and cal_state.get("callback") == "dateClick":
-            if st.session_state.perfil in ["admin", "editor"]:
-                dia = cal_state["dateClick"]["date"]
-                try:
-                    data_click = datetime.fromisoformat(dia).date()
-                except Exception:
-                    data_click = date.today()
-
-                st.markdown(f"### ➕ Novo evento em {data_click.strftime('%d/%m/%Y')}")
-                with st.form(f"add_{mes_num}_2"):
-                    tipo = st.selectbox("Tipo", ["aula", "evento", "feriado", "reunião"])
-                    data_inicio_click = st.date_input("Início", value=data_click)
-                    data_fim_click = st.date_input("Fim", value=data_click)
-                    titulo = st.text_input("Título")
-                    descricao = st.text_area("Descrição")
-                    salvar = st.form_submit_button("Salvar")
-
-                if salvar:
-                    if data_fim_click < data_inicio_click:
-                        st.error("Data final não pode ser menor que a inicial.")
-                    elif titulo.strip() == "":
-                        st.error("Informe um título válido.")
-                    else:
-                        inserir_evento(data_inicio_click, tipo, titulo, descricao, data_fim_click, id_cal_visual)
-                        st.success("Evento cadastrado!")
-                        st.rerun()
-
-    # --------- COLUNA 3 ---------
-    with col3:
-        mes_num = linha + 3
-        st.subheader(f"{meses_nomes[linha + 2]} / {ano_base}")
+
+def formulario_novo_evento(cal_state, chave_form, id_calendario):
+    if not (cal_state and isinstance(cal_state, dict) and cal_state.get("callback") == "dateClick"):
+        return
+    if st.session_state.perfil not in ["admin", "editor"]:
+        return
+
+    dia = cal_state["dateClick"]["date"]
+    try:
+        data_click = datetime.fromisoformat(dia).date()
+    except Exception:
+        data_click = date.today()
+
+    st.markdown(f"### ➕ Novo evento em {data_click.strftime('%d/%m/%Y')}")
+    with st.form(chave_form):
+        tipo = st.selectbox("Tipo", ["aula", "evento", "feriado", "reunião"])
+        data_inicio_click = st.date_input("Início", value=data_click)
+        data_fim_click = st.date_input("Fim", value=data_click)
+        titulo = st.text_input("Título")
+        descricao = st.text_area("Descrição")
+        salvar = st.form_submit_button("Salvar")
+
+    if salvar:
+        if data_fim_click < data_inicio_click:
+            st.error("Data final não pode ser menor que a inicial.")
+        elif titulo.strip() == "":
+            st.error("Informe um título válido.")
+        else:
+            inserir_evento(data_inicio_click, tipo, titulo, descricao, data_fim_click, id_calendario)
+            st.success("Evento cadastrado!")
+            st.rerun()
+
+
+# Fragmento: cliques nos meses e o formulário de novo evento reexecutam só a
+# grade (o feed vem do cache)
+@fragmento("calendario_12_meses")
+def secao_calendario(id_calendario, inicio, fim):
+    st.markdown("## 🗓️ Visualização em calendário – 12 meses")
+    with trecho("feed"):
+        eventos, ano_base = carregar_feed_cache(id_calendario, inicio, fim)
+
+    modo_visualizacao = st.radio(
+        "Modo de visualização",
+        ["Ano completo", "Mês a mês"],
+        horizontal=True,
+        key="modo_visualizacao"
+    )
+
+    if modo_visualizacao == "Ano completo":
+        # Um único componente com visão multi-mês: um iframe e uma cópia dos eventos
+        st.subheader(f"Ano {ano_base}")
         cal_state = calendar(
-            events=eventos_global,
+            events=eventos,
             options={
-                "initialView": "dayGridMonth",
-                "initialDate": f"{ano_base}-{mes_num:02d}-01",
-                "locale": "pt-br",
-                "height": 350,
-                "headerToolbar": {"left": "", "center": "", "right": ""},
-                "dateClick": True
+                **OPCOES_CALENDARIO_BASE,
+                "initialView": "multiMonthYear",
+                "initialDate": f"{ano_base}-01-01",
+                "multiMonthMaxColumns": 3,
+                "multiMonthMinWidth": 280,
             },
-            key=f"mes_{mes_num}"
+            key="ano_completo"
         )
+        formulario_novo_evento(cal_state, "add_ano", id_calendario)
+    else:
+        # Um componente por mês, mas cada um recebe só os eventos da sua grade
+        for linha in range(0, 12, 3):
+            colunas = st.columns(3)
+            for i, coluna in enumerate(colunas):
+                mes_num = linha + i + 1
+                with coluna:
+                    st.subheader(f"{meses_nomes[mes_num - 1]} / {ano_base}")
+                    cal_state = calendar(
+                        events=eventos_da_grade_mensal(eventos, ano_base, mes_num),
+                        options={
+                            **OPCOES_CALENDARIO_BASE,
+                            "initialView": "dayGridMonth",
+                            "initialDate": f"{ano_base}-{mes_num:02d}-01",
+                            "height": 350,
+                        },
+                        key=f"mes_{mes_num}"
+                    )
+                    formulario_novo_evento(cal_state, f"add_{mes_num}_{i + 1}", id_calendario)
 
-        if cal_state and isinstance(cal_state, dict) and cal_state.get("callback") == "dateClick":
-            if st.session_state.perfil in ["admin", "editor"]:
-                dia = cal_state["dateClick"]["date"]
-                try:
-                    data_click = datetime.fromisoformat(dia).date()
-                except Exception:
-                    data_click = date.today()
-
-                st.markdown(f"### ➕ Novo evento em {data_click.strftime('%d/%m/%Y')}")
-                with st.form(f"add_{mes_num}_3"):
-                    tipo = st.selectbox("Tipo", ["aula", "evento", "feriado", "reunião"])
-                    data_inicio_click = st.date_input("Início", value=data_click)
-                    data_fim_click = st.date_input("Fim", value=data_click)
-                    titulo = st.text_input("Título")
-                    descricao = st.text_area("Descrição")
-                    salvar = st.form_submit_button("Salvar")
-
-                if salvar:
-                    if data_fim_click < data_inicio_click:
-                        st.error("Data final não pode ser menor que a inicial.")
-                    elif titulo.strip() == "":
-                        st.error("Informe um título válido.")
-                    else:
-                        inserir_evento(data_inicio_click, tipo, titulo, descricao, data_fim_click, id_cal_visual)
-                        st.success("Evento cadastrado!")
-                        st.rerun()
+
+secao_calendario(id_cal_visual, inicio_sem, fim_sem)
 
 # ======================================
 # EXPORTAÇÃO PARA PDF – POR CALENDÁRIO + SEMESTRE
 # ======================================
-st.markdown("## 📄 Exportar calendário para PDF")
+etapa("pdf")
 
 
-def gerar_pdf(df, titulo_extra=None):
-    # Determinar ano base
-    if df.empty:
-        ano_base = date.today().year
-    else:
-        ano_base = int(df["data"].dt.year.mode()[0])
-        df = df.copy()
-        df = df[df["data"].dt.year == ano_base]
-
-    pdf = FPDF(orientation="L", format="A4")
-    pdf.set_auto_page_break(auto=True, margin=10)
-    pdf.add_font("DejaVu", "", "DejaVuSans.ttf", uni=True)
-
-    nomes_meses = [
-        "Janeiro", "Fevereiro", "Março",
-        "Abril", "Maio", "Junho",
-        "Julho", "Agosto", "Setembro",
-        "Outubro", "Novembro", "Dezembro"
-    ]
-
-    trimestres = [
-        (1, 2, 3),
-        (4, 5, 6),
-        (7, 8, 9),
-        (10, 11, 12)
-    ]
+# ======================================
+# PDFs GERADOS (SEGUNDO PLANO + CACHE)
+# ======================================
+# Nada é lido nem montado antes do clique no botão. O PDF é gerado em uma
+# thread da FilaPdf (pdf_calendario.py), compartilhada pelo processo, enquanto
+# a página mostra o andamento. A chave é o conteúdo que define o PDF:
+# calendário, período do semestre, versão dos dados do calendário e título;
+# repetir o download do mesmo calendário devolve os bytes prontos.
+PDF_CACHE_MAX_ENTRADAS = 16
+PDF_TRABALHADORES = 2
 
-    # Eventos por dia
-    eventos_por_dia = {}
-    for _, row in df.iterrows():
-        inicio = row["data"].date()
-        fim = row["fim"].date()
-        dia = inicio
-        while dia <= fim:
-            eventos_por_dia.setdefault(dia, []).append(row)
-            dia += timedelta(days=1)
-
-    def desenhar_mes_colorido(pdf, ano, mes, x, y, w, h, eventos_mes):
-        cal.setfirstweekday(cal.MONDAY)
-        semanas = cal.monthcalendar(ano, mes)
-
-        pdf.set_font("DejaVu", size=10)
-        pdf.set_xy(x, y)
-        pdf.cell(w, 6, txt=nomes_meses[mes - 1].upper(), ln=False, align="C")
-
-        dias_semana = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
-        header_y = y + 7
-        cell_w = w / 7
-        cell_h = (h - 12) / 6
-
-        pdf.set_font("DejaVu", size=7)
-        for i, ds in enumerate(dias_semana):
-            pdf.set_xy(x + i * cell_w, header_y)
-            pdf.cell(cell_w, 5, txt=ds, border=1, align="C")
-
-        for linha_idx, semana in enumerate(semanas):
-            for col_idx, dia in enumerate(semana):
-                cx = x + col_idx * cell_w
-                cy = header_y + 5 + linha_idx * cell_h
-
-                pdf.rect(cx, cy, cell_w, cell_h)
-
-                if dia > 0:
-                    data_atual = date(ano, mes, dia)
-                    cor = None
-                    for tipo in PRIORIDADE:
-                        if data_atual in eventos_mes[tipo]:
-                            cor = PDF_CORES[tipo]
-                            break
-
-                    if cor:
-                        pdf.set_fill_color(*cor)
-                        pdf.rect(cx, cy, cell_w, cell_h, style="F")
-                        pdf.set_text_color(255, 255, 255)
-                    else:
-                        pdf.set_text_color(0, 0, 0)
 
-                    pdf.set_xy(cx + 1, cy + 1)
-                    pdf.cell(cell_w - 2, 4, txt=str(dia))
+@st.cache_resource
+def fila_pdf():
+    return FilaPdf(trabalhadores=PDF_TRABALHADORES, max_prontos=PDF_CACHE_MAX_ENTRADAS)
+
+
+def pedir_pdf(id_calendario, inicio=None, fim=None, titulo_extra=None, paginacao="trimestre"):
+    # Retorna (TrabalhoPdf, há eventos no período). Sem semestre (inicio e
+    # fim None), o PDF cobre todos os anos com eventos do calendário.
+    id_calendario = int(id_calendario)
+    inicio, fim = data_iso(inicio), data_iso(fim)
+    versao = versao_dados(id_calendario)
+    df = _carregar_eventos_versao(id_calendario, inicio, fim, versao)
+    letivo = _calendario_letivo_versao(id_calendario, inicio, fim, versao)
+    trabalho = fila_pdf().pedir(
+        (id_calendario, inicio, fim, versao, titulo_extra, paginacao),
+        df,
+        titulo_extra=titulo_extra,
+        letivo=letivo,
+        inicio=inicio,
+        fim=fim,
+        paginacao=paginacao
+    )
+    return trabalho, not df.empty
 
-    for idx_trim, trio in enumerate(trimestres, start=1):
-        pdf.add_page()
-        margin_x = 10
-        margin_y = 10
-        titulo_h = 10
-        gap_x = 5
 
-        pdf.set_font("DejaVu", size=14)
-        pdf.set_xy(margin_x, margin_y)
+def aguardar_pdf(trabalho):
+    # Bytes do PDF, ou None se a geração falhou (o erro é mostrado e o
+    # trabalho sai da fila, para o próximo clique tentar de novo)
+    barra = st.progress(trabalho.fracao, text="Gerando PDF...")
+    while not trabalho.futuro.done():
+        wait([trabalho.futuro], timeout=0.1)
+        barra.progress(trabalho.fracao, text="Gerando PDF...")
+    barra.empty()
+    try:
+        return trabalho.futuro.result()
+    except Exception as erro:
+        fila_pdf().descartar(trabalho)
+        st.error(f"Não foi possível gerar o PDF: {erro}")
+        return None
+
+
+@fragmento("pdf")
+def secao_pdf(id_calendario, nome_calendario, nivel, semestre, inicio, fim):
+    st.markdown("## 📄 Exportar calendário para PDF")
+    paginacao = st.radio(
+        "Páginas",
+        ["trimestre", "mes"],
+        format_func=lambda p: {"trimestre": "Um trimestre por página", "mes": "Um mês por página"}[p],
+        horizontal=True,
+        key="pdf_paginacao"
+    )
 
-        titulo_base = f"Calendário Acadêmico – {ano_base} | Trimestre {idx_trim}"
-        if titulo_extra:
-            titulo_final = f"{titulo_base} | {titulo_extra}"
+    if st.button("📄 Gerar PDF do calendário do semestre"):
+        if semestre:
+            titulo_extra = f"{nome_calendario} – {nivel} – {semestre}"
         else:
-            titulo_final = titulo_base
+            titulo_extra = f"{nome_calendario} – {nivel}"
 
-        pdf.cell(0, 8, txt=titulo_final, ln=True, align="C")
+        trabalho, tem_eventos = pedir_pdf(
+            id_calendario, inicio, fim, titulo_extra=titulo_extra, paginacao=paginacao
+        )
+        if not tem_eventos:
+            st.warning(
+                "⚠️ Não há eventos cadastrados para este calendário/semestre. "
+                "O PDF será gerado apenas com o calendário em branco."
+            )
+        with trecho("gerar_pdf"):
+            pdf_bytes = aguardar_pdf(trabalho)
+        if pdf_bytes is not None:
+            st.download_button(
+                label="⬇️ Baixar arquivo PDF",
+                data=pdf_bytes,
+                file_name=nome_arquivo_pdf(nome_calendario, semestre),
+                mime="application/pdf"
+            )
 
-        topo_cal = margin_y + titulo_h + 3
-        largura_util = pdf.w - 2 * margin_x
-        largura_mes = (largura_util - 2 * gap_x) / 3
-        altura_mes = 80
 
-        # Calcular eventos por tipo para o trimestre
-        for i, mes in enumerate(trio):
-            eventos_mes = {tp: set() for tp in PRIORIDADE}
+secao_pdf(id_cal_visual, nome_puro, nivel_cal_visual, semestre_atual, inicio_sem, fim_sem)
 
-            for dia, lista_eventos in eventos_por_dia.items():
-                if dia.month == mes and dia.year == ano_base:
-                    tipos = [str(ev["tipo"]) for ev in lista_eventos]
-                    for tp in PRIORIDADE:
-                        if tp in tipos:
-                            eventos_mes[tp].add(dia)
+# ======================================
+# EXPORTAÇÃO DE EVENTOS (CSV / XLSX / iCalendar)
+# ======================================
+etapa("exportacao_eventos")
 
-            x = margin_x + i * (largura_mes + gap_x)
-            y = topo_cal
-            desenhar_mes_colorido(pdf, ano_base, mes, x, y, largura_mes, altura_mes, eventos_mes)
 
-        # Lista de eventos do trimestre
-        pdf.set_font("DejaVu", size=11)
-        pdf.set_xy(margin_x, topo_cal + altura_mes + 6)
-        pdf.cell(0, 6, txt="Eventos do trimestre (ordenados por data):", ln=True)
+# Acima deste tamanho o arquivo em montagem vai para o disco
+EXPORTACAO_MEMORIA_MAX = 8 * 1024 * 1024
 
-        pdf.set_font("DejaVu", size=9)
-        df_trim = df[df["data"].dt.month.isin(trio)].sort_values("data")
 
-        if df_trim.empty:
-            pdf.set_x(margin_x)
-            pdf.cell(0, 5, txt="• Não há eventos para este trimestre.", ln=True)
-        else:
-            for _, row in df_trim.iterrows():
-                ini = row["data"].strftime("%d/%m/%Y")
-                fim = row["fim"].strftime("%d/%m/%Y")
-                periodo = ini if ini == fim else f"{ini} a {fim}"
-                linha = f"• {periodo} – {row['tipo']} – {row['titulo']}"
-                pdf.set_x(margin_x)
-                pdf.multi_cell(pdf.w - 2 * margin_x, 5, txt=linha)
-
-    caminho = "calendario_ifto.pdf"
-    pdf.output(caminho)
-    return caminho
-
-# Dados filtrados pra exportação
-df_export = carregar_eventos()
-if not df_export.empty and "id_calendario" in df_export.columns:
-    df_export = df_export[df_export["id_calendario"] == id_cal_visual]
-else:
-    df_export = df_export.iloc[0:0].copy()
+def arquivo_exportacao(gerar_pedacos):
+    # Grava os pedaços num arquivo temporário em vez de juntá-los em memória
+    arquivo = tempfile.SpooledTemporaryFile(max_size=EXPORTACAO_MEMORIA_MAX)
+    for pedaco in gerar_pedacos():
+        arquivo.write(pedaco)
+    arquivo.seek(0)
+    return io.BufferedReader(arquivo)
 
-if inicio_sem and fim_sem and not df_export.empty:
-    df_export = df_export[
-        (df_export["data"].dt.date <= fim_sem) &
-        (df_export["fim"].dt.date >= inicio_sem)
-    ]
 
-if df_export.empty:
-    st.warning(
-        "⚠️ Não há eventos cadastrados para este calendário/semestre. "
-        "O PDF será gerado apenas com o calendário em branco."
+@fragmento("exportacao_eventos")
+def secao_exportacao_eventos(id_calendario, nome_calendario, semestre, inicio, fim):
+    st.markdown("## 📤 Exportar eventos (CSV / XLSX / iCalendar)")
+
+    col_fmt, col_escopo = st.columns(2)
+    formato_export = col_fmt.selectbox(
+        "Formato",
+        ["csv", "xlsx", "ics"],
+        format_func=lambda f: {"csv": "CSV", "xlsx": "Excel (XLSX)", "ics": "iCalendar (.ics)"}[f],
+        key="export_formato"
+    )
+    escopo_export = col_escopo.radio(
+        "Eventos",
+        ["Calendário e semestre selecionados", "Todos os calendários"],
+        key="export_escopo"
     )
 
-if st.button("📄 Gerar PDF do calendário do semestre"):
-    if semestre_atual:
-        titulo_extra = f"{nome_puro} – {nivel_cal_visual} – {semestre_atual}"
+    if escopo_export == "Todos os calendários":
+        gerar_pedacos = functools.partial(exportar_eventos, repo, formato_export)
+        nome_base = "eventos_IFTO_todos"
     else:
-        titulo_extra = f"{nome_puro} – {nivel_cal_visual}"
-
-    caminho = gerar_pdf(df_export, titulo_extra=titulo_extra)
-    with open(caminho, "rb") as f:
-        st.download_button(
-            label="⬇️ Baixar arquivo PDF",
-            data=f,
-            file_name=f"calendario_IFTO_{nome_puro}_{semestre_atual or 'ano'}.pdf".replace(" ", "_"),
-            mime="application/pdf"
-        )
+        gerar_pedacos = functools.partial(exportar_eventos, repo, formato_export, id_calendario, inicio, fim)
+        nome_base = f"eventos_IFTO_{nome_calendario}_{semestre or 'ano'}".replace(" ", "_").replace("/", "-")
+
+    # O arquivo só é montado quando o usuário clica em baixar
+    mime, extensao = FORMATOS_EXPORTACAO[formato_export]
+    st.download_button(
+        label="⬇️ Baixar arquivo",
+        data=functools.partial(arquivo_exportacao, gerar_pedacos),
+        file_name=nome_base + extensao,
+        mime=mime,
+        key="download_eventos"
+    )
+
+
+secao_exportacao_eventos(id_cal_visual, nome_puro, semestre_atual, inicio_sem, fim_sem)
+
+# ======================================
+# VALIDAÇÃO DE CONFLITOS (ADMIN)
+# ======================================
+etapa("validacao_conflitos")
+
+
+@fragmento("validacao_conflitos")
+def secao_validacao_conflitos():
+    with st.expander("🔎 Validar conflitos em todos os calendários"):
+        st.caption("Aula ou reunião em feriado e reuniões sobrepostas, em todos os calendários.")
+        if st.button("Validar calendários", key="btn_validar_conflitos"):
+            inicio_validacao = datetime.now()
+            df_calendarios_todos = carregar_calendarios()
+            relatorio_conflitos = validar_eventos(
+                carregar_eventos(),
+                dict(zip(df_calendarios_todos["id"], df_calendarios_todos["nome_calendario"]))
+            )
+            segundos = (datetime.now() - inicio_validacao).total_seconds()
+            if relatorio_conflitos.empty:
+                st.success(f"Nenhum conflito encontrado ({segundos:.2f}s).")
+            else:
+                st.warning(f"{len(relatorio_conflitos)} conflitos encontrados ({segundos:.2f}s).")
+                relatorio_conflitos["primeiro_dia"] = relatorio_conflitos["primeiro_dia"].dt.strftime("%d/%m/%Y")
+                st.dataframe(relatorio_conflitos, use_container_width=True)
+
+
+if st.session_state.perfil == "admin":
+    secao_validacao_conflitos()
+
+# ======================================
+# EXPORTAÇÃO EM LOTE (ADMIN)
+# ======================================
+etapa("exportacao_lote")
+
+# Limite de processos a partir da página: o servidor é compartilhado entre
+# sessões, então a exportação não deve ocupar todos os núcleos
+PROCESSOS_EXPORTACAO_LOTE = min(4, os.cpu_count() or 1)
+
+
+@fragmento("exportacao_lote")
+def secao_exportacao_lote():
+    with st.expander("📦 Exportar todos os calendários e semestres (ZIP)"):
+        st.caption("Gera um PDF por calendário/semestre em paralelo e empacota tudo em um arquivo ZIP.")
+        if st.button("Gerar ZIP com todos os PDFs", key="btn_export_lote"):
+            with st.spinner("Gerando PDFs..."):
+                zip_bytes, relatorio = exportar_todos(
+                    repositorio.url_padrao(), processos=PROCESSOS_EXPORTACAO_LOTE
+                )
+            st.dataframe(pd.DataFrame(relatorio), use_container_width=True)
+            st.download_button(
+                label="⬇️ Baixar ZIP",
+                data=zip_bytes,
+                file_name="calendarios_ifto.zip",
+                mime="application/zip"
+            )
+
+
+if st.session_state.perfil == "admin":
+    secao_exportacao_lote()
+
+# ======================================
+# INSTRUMENTAÇÃO (ADMIN)
+# ======================================
+# Só com CALENDARIO_INSTRUMENTACAO=1 (ver instrumentacao.py)
+if instrumentacao.ATIVO:
+    instrumentacao.finalizar_execucao()
+    if st.session_state.perfil == "admin":
+        with st.sidebar.expander("⏱️ Tempos desta execução"):
+            resumo = instrumentacao.resumo_execucao()
+            sql = resumo["sql"]
+            st.caption(f"Total: {resumo['total_ms']:.0f} ms")
+            st.dataframe(
+                pd.DataFrame(resumo["trechos"], columns=["trecho", "ms"]),
+                use_container_width=True,
+                hide_index=True
+            )
+            st.caption(
+                f"SQL: {sql['consultas']} consultas, {sql['ms']:.1f} ms, "
+                f"{sql['linhas']} linhas, {sql['bytes'] / 1024:.1f} KiB"
+            )
+            st.download_button(
+                label="Métricas (Prometheus)",
+                data=instrumentacao.texto_prometheus(),
+                file_name="metricas.txt",
+                mime="text/plain",
+                key="btn_metricas"
+            )
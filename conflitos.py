@@ -0,0 +1,244 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from recorrencia import expandir_recorrencias, ocorrencias
+from repositorio import criar_repositorio
+
+# ======================================
+# CONFLITOS ENTRE EVENTOS
+# ======================================
+# Dois eventos do mesmo calendário estão em conflito quando os períodos se
+# sobrepõem e os tipos formam um dos pares abaixo. Eventos recorrentes entram
+# pelas suas ocorrências.
+#
+# IndiceIntervalos guarda os eventos de um calendário ordenados pelo início:
+# os curtos (até DURACAO_CURTA dias) são buscados numa janela de busca binária
+# [a - DURACAO_CURTA, b]; os longos (poucos: semestres de aula, recessos) são
+# comparados direto. A validação em lote usa a mesma ordenação, separada por
+# tipo: cada par de TIPOS_EM_CONFLITO só varre os eventos desses dois tipos, e
+# cada evento só é comparado com os que começam antes de ele terminar (aulas
+# sobrepostas a aulas, por exemplo, nunca são enumeradas).
+#
+# Uso pela linha de comando:
+#   python conflitos.py --banco calendario.db
+
+TIPOS_EM_CONFLITO = {
+    ("aula", "feriado"),
+    ("feriado", "reunião"),
+    ("reunião", "reunião"),
+}
+DURACAO_CURTA = 31
+
+COLUNAS_RELATORIO = [
+    "calendario", "id_a", "tipo_a", "titulo_a", "id_b", "tipo_b", "titulo_b",
+    "primeiro_dia", "dias_em_conflito",
+]
+
+
+def em_conflito(tipo_a, tipo_b):
+    return tuple(sorted((str(tipo_a).strip().lower(), str(tipo_b).strip().lower()))) in TIPOS_EM_CONFLITO
+
+
+def _dias(serie):
+    return serie.to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+
+def _dia(valor):
+    return np.datetime64(pd.Timestamp(valor).date(), "D").astype(np.int64)
+
+
+class IndiceIntervalos:
+
+    def __init__(self, eventos):
+        # eventos: DataFrame com id, data, fim, tipo, titulo (recorrentes já
+        # expandidos ou não; a expansão é feita aqui)
+        eventos = expandir_recorrencias(eventos)
+        ini = _dias(eventos["data"]) if len(eventos) else np.array([], dtype=np.int64)
+        fim = _dias(eventos["fim"]) if len(eventos) else np.array([], dtype=np.int64)
+        ordem = np.argsort(ini, kind="stable")
+
+        self.ini = ini[ordem]
+        self.fim = np.maximum(fim[ordem], self.ini)
+        self.ids = eventos["id"].to_numpy()[ordem] if len(eventos) else np.array([], dtype=np.int64)
+        self.tipos = eventos["tipo"].astype(str).to_numpy()[ordem] if len(eventos) else np.array([], dtype=object)
+        self.titulos = eventos["titulo"].astype(str).to_numpy()[ordem] if len(eventos) else np.array([], dtype=object)
+
+        longo = (self.fim - self.ini) >= DURACAO_CURTA
+        self._curtos = np.flatnonzero(~longo)
+        self._ini_curtos = self.ini[self._curtos]
+        self._longos = np.flatnonzero(longo)
+
+    def __len__(self):
+        return len(self.ini)
+
+    def sobrepostos(self, inicio, fim):
+        # Posições dos eventos que cruzam [inicio, fim]
+        a, b = _dia(inicio), _dia(fim)
+        de = np.searchsorted(self._ini_curtos, a - DURACAO_CURTA, side="left")
+        ate = np.searchsorted(self._ini_curtos, b, side="right")
+        janela = self._curtos[de:ate]
+        janela = janela[self.fim[janela] >= a]
+        longos = self._longos[(self.ini[self._longos] <= b) & (self.fim[self._longos] >= a)]
+        return np.concatenate((janela, longos))
+
+    def conflitos(self, inicio, fim, tipo, ignorar_id=None):
+        # Lista de (id, tipo, titulo, primeiro dia em conflito) para um período
+        # candidato do tipo dado
+        posicoes = self.sobrepostos(inicio, fim)
+        encontrados = []
+        for p in posicoes:
+            if ignorar_id is not None and self.ids[p] == ignorar_id:
+                continue
+            if em_conflito(tipo, self.tipos[p]):
+                primeiro = max(int(self.ini[p]), int(_dia(inicio)))
+                encontrados.append((int(self.ids[p]), self.tipos[p], self.titulos[p], primeiro))
+        return encontrados
+
+
+def conflitos_evento(indice, data_inicio, data_fim, tipo, recorrencia=None, excecoes=None, ignorar_id=None):
+    # Conflitos de um evento que ainda vai ser gravado (novo ou editado). Para
+    # uma série, cada ocorrência é consultada. Devolve um DataFrame com um item
+    # por evento em conflito.
+    if recorrencia:
+        periodos = [(d, d) for d in ocorrencias(data_inicio, data_fim, recorrencia, excecoes)]
+    else:
+        periodos = [(data_inicio, data_fim or data_inicio)]
+
+    primeiro_por_id = {}
+    for ini, fim in periodos:
+        for id_evento, tipo_b, titulo_b, primeiro in indice.conflitos(ini, fim, tipo, ignorar_id):
+            if id_evento not in primeiro_por_id or primeiro < primeiro_por_id[id_evento][2]:
+                primeiro_por_id[id_evento] = (tipo_b, titulo_b, primeiro)
+
+    linhas = [
+        (id_evento, tipo_b, titulo_b, pd.Timestamp(np.datetime64(primeiro, "D")).date())
+        for id_evento, (tipo_b, titulo_b, primeiro) in sorted(primeiro_por_id.items(), key=lambda x: x[1][2])
+    ]
+    return pd.DataFrame(linhas, columns=["id", "tipo", "titulo", "primeiro_dia"])
+
+
+def _expandir_faixas(de, ate):
+    # Para cada x, as posições de[x] .. ate[x]-1: (x repetido, posição)
+    quantidade = np.maximum(ate - de, 0)
+    total = int(quantidade.sum())
+    x = np.repeat(np.arange(len(de)), quantidade)
+    deslocamento = np.arange(total) - np.repeat(np.cumsum(quantidade) - quantidade, quantidade)
+    return x, np.repeat(de, quantidade) + deslocamento
+
+
+def _pares_sobrepostos(ini, fim):
+    # Com os intervalos ordenados pelo início, j > i cruza i se e só se
+    # ini[j] <= fim[i]; os pares saem de uma busca binária por evento
+    n = len(ini)
+    if n < 2:
+        vazio = np.array([], dtype=np.int64)
+        return vazio, vazio
+    return _expandir_faixas(np.arange(1, n + 1), np.searchsorted(ini, fim, side="right"))
+
+
+def _pares_entre(ini_x, fim_x, ini_y, lado):
+    # Pares (x, y) de dois grupos em que y começa durante x: ini_y em
+    # [ini_x, fim_x] (lado="left") ou em (ini_x, fim_x] (lado="right");
+    # ini_y ordenado
+    de = np.searchsorted(ini_y, ini_x, side=lado)
+    return _expandir_faixas(de, np.searchsorted(ini_y, fim_x, side="right"))
+
+
+def _pares_em_conflito(indice):
+    # Posições (i, j) do índice com tipos em conflito e períodos sobrepostos.
+    # Num par de tipos diferentes, um dos dois começa durante o outro: b que
+    # começa no mesmo dia ou depois de a, ou a que começa depois de b
+    posicoes = {
+        tipo: np.flatnonzero(indice.tipos == tipo)
+        for tipo in {t for par in TIPOS_EM_CONFLITO for t in par}
+    }
+    partes_i, partes_j = [], []
+    for tipo_a, tipo_b in sorted(TIPOS_EM_CONFLITO):
+        pos_a, pos_b = posicoes[tipo_a], posicoes[tipo_b]
+        if tipo_a == tipo_b:
+            i, j = _pares_sobrepostos(indice.ini[pos_a], indice.fim[pos_a])
+            partes_i.append(pos_a[i])
+            partes_j.append(pos_a[j])
+            continue
+        a, b = _pares_entre(indice.ini[pos_a], indice.fim[pos_a], indice.ini[pos_b], "left")
+        partes_i.append(pos_a[a])
+        partes_j.append(pos_b[b])
+        b, a = _pares_entre(indice.ini[pos_b], indice.fim[pos_b], indice.ini[pos_a], "right")
+        partes_i.append(pos_a[a])
+        partes_j.append(pos_b[b])
+
+    i, j = np.concatenate(partes_i), np.concatenate(partes_j)
+    distintos = indice.ids[i] != indice.ids[j]
+    return i[distintos], j[distintos]
+
+
+def validar_eventos(eventos, nomes_calendarios=None):
+    # Relatório de conflitos de todos os calendários em eventos (um item por
+    # par de eventos, com o primeiro dia e o número de dias em conflito)
+    nomes_calendarios = nomes_calendarios or {}
+    partes = []
+    for id_cal, df_cal in eventos.groupby("id_calendario", sort=True):
+        indice = IndiceIntervalos(df_cal)
+        i, j = _pares_em_conflito(indice)
+        if not len(i):
+            continue
+
+        inicio = np.maximum(indice.ini[i], indice.ini[j])
+        fim = np.minimum(indice.fim[i], indice.fim[j])
+        id_a = np.minimum(indice.ids[i], indice.ids[j])
+        id_b = np.maximum(indice.ids[i], indice.ids[j])
+        a_primeiro = indice.ids[i] <= indice.ids[j]
+        df_pares = pd.DataFrame({
+            "id_a": id_a,
+            "tipo_a": np.where(a_primeiro, indice.tipos[i], indice.tipos[j]),
+            "titulo_a": np.where(a_primeiro, indice.titulos[i], indice.titulos[j]),
+            "id_b": id_b,
+            "tipo_b": np.where(a_primeiro, indice.tipos[j], indice.tipos[i]),
+            "titulo_b": np.where(a_primeiro, indice.titulos[j], indice.titulos[i]),
+            "primeiro_dia": inicio,
+            "dias_em_conflito": fim - inicio + 1,
+        })
+        agrupado = df_pares.groupby(["id_a", "id_b"], sort=False).agg(
+            tipo_a=("tipo_a", "first"),
+            titulo_a=("titulo_a", "first"),
+            tipo_b=("tipo_b", "first"),
+            titulo_b=("titulo_b", "first"),
+            primeiro_dia=("primeiro_dia", "min"),
+            dias_em_conflito=("dias_em_conflito", "sum"),
+        ).reset_index()
+        agrupado.insert(0, "calendario", nomes_calendarios.get(id_cal, str(id_cal)))
+        partes.append(agrupado)
+
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_RELATORIO)
+    relatorio = pd.concat(partes, ignore_index=True)[COLUNAS_RELATORIO]
+    relatorio["primeiro_dia"] = pd.to_datetime(relatorio["primeiro_dia"].astype("datetime64[D]"))
+    return relatorio.sort_values(["calendario", "primeiro_dia", "id_a", "id_b"], kind="stable").reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lista conflitos entre eventos de todos os calendários.")
+    parser.add_argument("--banco", default=None, help="arquivo SQLite ou URL postgresql:// (padrão: CALENDARIO_DB_URL ou calendario.db)")
+    args = parser.parse_args(argv)
+
+    repo = criar_repositorio(args.banco)
+    try:
+        repo.preparar()
+        inicio = time.perf_counter()
+        eventos = repo.carregar_eventos()
+        calendarios = repo.carregar_calendarios()
+        relatorio = validar_eventos(eventos, dict(zip(calendarios["id"], calendarios["nome_calendario"])))
+        segundos = time.perf_counter() - inicio
+    finally:
+        repo.fechar()
+
+    if not relatorio.empty:
+        print(relatorio.to_string(index=False))
+    print(f"{len(relatorio)} conflitos em {len(eventos)} eventos ({segundos:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
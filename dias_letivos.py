@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from pdf_calendario import PRIORIDADE, prioridade_por_periodo
+from recorrencia import expandir_recorrencias
+
+# ======================================
+# DIAS LETIVOS
+# ======================================
+# Calendário de dias úteis de um período (normalmente um semestre): um dia é
+# letivo se cai em um dos dias da semana do padrão e o tipo que o colore (por
+# PRIORIDADE) não é feriado. Na montagem são guardados os acumulados de dias
+# letivos e as posições de cada um, então as perguntas abaixo são uma
+# subtração ou uma busca binária, sem percorrer o período.
+
+# Segunda a sexta (índices de date.weekday())
+DIAS_SEMANA_LETIVOS = (0, 1, 2, 3, 4)
+
+
+def _dia(valor):
+    return np.datetime64(pd.Timestamp(valor).date(), "D")
+
+
+class CalendarioLetivo:
+
+    def __init__(self, inicio, fim, eventos=None, dias_semana=DIAS_SEMANA_LETIVOS):
+        self.inicio = _dia(inicio)
+        self.fim = _dia(fim)
+        n_dias = max(int((self.fim - self.inicio).astype(np.int64)) + 1, 0)
+        self.dias = self.inicio + np.arange(n_dias)
+
+        # 1970-01-01 foi uma quinta-feira (weekday 3)
+        dia_semana = (self.dias.astype(np.int64) + 3) % 7
+        letivo = np.isin(dia_semana, dias_semana)
+        if eventos is not None and not eventos.empty and n_dias:
+            prioridade = prioridade_por_periodo(eventos, self.inicio, n_dias)
+            letivo &= prioridade != PRIORIDADE.index("feriado")
+        self.letivo = letivo
+
+        # acumulado[i]: dias letivos antes do dia i do período
+        self.acumulado = np.concatenate(([0], np.cumsum(letivo, dtype=np.int64)))
+        # posicoes[k]: índice (no período) do k-ésimo dia letivo, em ordem
+        self.posicoes = np.flatnonzero(letivo)
+
+        if n_dias:
+            por_mes = pd.Series(letivo.astype(np.int64), index=pd.DatetimeIndex(self.dias).to_period("M"))
+            self._por_mes = por_mes.groupby(level=0).sum()
+            self._por_mes.index = self._por_mes.index.astype(str)
+        else:
+            self._por_mes = pd.Series(dtype=np.int64)
+
+    @property
+    def total(self):
+        return int(self.acumulado[-1])
+
+    def _indice(self, valor):
+        return int((_dia(valor) - self.inicio).astype(np.int64))
+
+    def eh_letivo(self, valor):
+        i = self._indice(valor)
+        return 0 <= i < len(self.letivo) and bool(self.letivo[i])
+
+    def dias_letivos_entre(self, a, b):
+        # Dias letivos em [a, b], contando só a parte dentro do período
+        n = len(self.letivo)
+        i = min(max(self._indice(a), 0), n)
+        j = min(max(self._indice(b) + 1, 0), n)
+        return int(self.acumulado[j] - self.acumulado[i]) if j > i else 0
+
+    def enesimo_dia_letivo(self, depois_de, n):
+        # n-ésimo dia letivo estritamente depois de depois_de (n >= 1), ou
+        # None se o período acabar antes
+        if n < 1:
+            raise ValueError("n deve ser maior ou igual a 1")
+        k = int(np.searchsorted(self.posicoes, self._indice(depois_de), side="right")) + n - 1
+        if k >= len(self.posicoes):
+            return None
+        return pd.Timestamp(self.dias[self.posicoes[k]]).date()
+
+    def por_mes(self):
+        # Série (AAAA-MM -> dias letivos), na ordem do período
+        return self._por_mes.copy()
+
+    def rotulo_mes(self, ano, mes):
+        # Texto curto para o PDF; vazio se o mês está fora do período
+        chave = f"{ano:04d}-{mes:02d}"
+        if chave not in self._por_mes.index:
+            return ""
+        return f"{int(self._por_mes[chave])} dias letivos"
+
+
+def montar_calendario_letivo(eventos, inicio, fim, dias_semana=DIAS_SEMANA_LETIVOS):
+    # Só faz sentido com início e fim definidos (semestre); senão None.
+    # Feriados recorrentes são expandidos só dentro do período.
+    if inicio is None or fim is None:
+        return None
+    if eventos is not None:
+        eventos = expandir_recorrencias(eventos, inicio, fim)
+    return CalendarioLetivo(inicio, fim, eventos, dias_semana)
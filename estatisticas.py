@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from recorrencia import expandir_recorrencias
+
+# ======================================
+# ESTATÍSTICAS PRÉ-AGREGADAS DOS EVENTOS
+# ======================================
+# Tabela estatisticas_eventos: por calendário × mês (AAAA-MM) × tipo,
+#   eventos -> eventos que começam no mês (cada ocorrência de uma série conta)
+#   dias    -> dias de evento dentro do mês (um período que atravessa meses
+#              é dividido entre eles)
+# O repositório soma a contribuição de cada evento gravado e subtrai a de cada
+# evento alterado ou excluído, na mesma transação, então o dashboard lê alguns
+# poucos registros em vez de agrupar todos os eventos.
+#
+# Para um período que corta meses (semestre), os meses inteiros vêm da tabela
+# e os dois meses das pontas são contados dos próprios eventos, só dentro do
+# período (dividir_periodo): uma ocorrência conta no mês em que começa, ou no
+# mês de inicio se começou antes do período.
+
+COLUNAS = ["id_calendario", "mes", "tipo", "eventos", "dias"]
+COLUNAS_EVENTO = ["id_calendario", "data", "fim", "tipo", "recorrencia", "excecoes"]
+COLUNAS_OCORRENCIAS = ["mes", "tipo", "eventos"]
+
+
+def agregar_estatisticas(eventos):
+    # eventos: DataFrame com COLUNAS_EVENTO (datas em texto, date ou datetime)
+    if eventos is None or eventos.empty:
+        return pd.DataFrame(columns=COLUNAS)
+    eventos = eventos.copy()
+    eventos["data"] = pd.to_datetime(eventos["data"], errors="coerce")
+    eventos["fim"] = pd.to_datetime(eventos["fim"], errors="coerce").fillna(eventos["data"])
+    eventos = expandir_recorrencias(eventos.dropna(subset=["data", "id_calendario"]))
+    if eventos.empty:
+        return pd.DataFrame(columns=COLUNAS)
+
+    ini = eventos["data"].to_numpy(dtype="datetime64[D]")
+    fim = np.maximum(eventos["fim"].to_numpy(dtype="datetime64[D]"), ini)
+
+    # Um segmento por mês coberto por cada evento
+    mes_ini = ini.astype("datetime64[M]")
+    n_meses = (fim.astype("datetime64[M]") - mes_ini).astype(np.int64) + 1
+    linha = np.repeat(np.arange(len(ini)), n_meses)
+    deslocamento = np.arange(len(linha)) - np.repeat(np.cumsum(n_meses) - n_meses, n_meses)
+    mes = mes_ini[linha] + deslocamento.astype("timedelta64[M]")
+    primeiro_dia = mes.astype("datetime64[D]")
+    ultimo_dia = (mes + np.timedelta64(1, "M")).astype("datetime64[D]") - np.timedelta64(1, "D")
+    dias = (np.minimum(fim[linha], ultimo_dia) - np.maximum(ini[linha], primeiro_dia)).astype(np.int64) + 1
+
+    segmentos = pd.DataFrame({
+        "id_calendario": eventos["id_calendario"].astype(np.int64).to_numpy()[linha],
+        "mes": mes.astype(str),
+        "tipo": eventos["tipo"].astype(str).str.strip().str.lower().to_numpy()[linha],
+        "eventos": (deslocamento == 0).astype(np.int64),
+        "dias": dias,
+    })
+    return segmentos.groupby(["id_calendario", "mes", "tipo"], as_index=False)[["eventos", "dias"]].sum()
+
+
+def linhas_estatisticas(eventos, sinal=1):
+    # Tuplas (id_calendario, mes, tipo, eventos, dias) prontas para o INSERT
+    agregado = agregar_estatisticas(eventos)
+    return [
+        (int(c), m, t, sinal * int(e), sinal * int(d))
+        for c, m, t, e, d in agregado[COLUNAS].itertuples(index=False)
+    ]
+
+
+def mes_texto(valor):
+    # AAAA-MM de uma data (limites de período nas consultas); None passa direto
+    if valor is None:
+        return None
+    return pd.Timestamp(valor).strftime("%Y-%m")
+
+
+def dividir_periodo(inicio, fim):
+    # (primeiro, último) dia dos meses inteiros lidos da tabela pré-agregada
+    # (None: sem limite; primeiro depois do último: nenhum mês) e os trechos
+    # (a, b, anteriores), cada um dentro de um mês, contados dos eventos.
+    # anteriores: ocorrências que começaram antes de a contam no mês de a
+    # (senão já estão em outro mês).
+    inicio = pd.Timestamp(inicio).normalize() if inicio is not None else None
+    fim = pd.Timestamp(fim).normalize() if fim is not None else None
+    de = ate = None
+    trechos = []
+    if inicio is not None:
+        fim_mes = inicio + pd.offsets.MonthEnd(0)
+        trechos.append((inicio.date(), min(fim_mes, fim).date() if fim is not None else fim_mes.date(), True))
+        de = (fim_mes + pd.Timedelta(days=1)).date()
+    if fim is not None:
+        inicio_mes = fim.replace(day=1)
+        if inicio is None or inicio_mes > inicio:
+            trechos.append((inicio_mes.date(), fim.date(), False))
+        ate = (inicio_mes - pd.Timedelta(days=1)).date()
+    return de, ate, trechos
+
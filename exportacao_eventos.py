@@ -0,0 +1,169 @@
+import argparse
+import csv
+import io
+from datetime import date, datetime, timedelta, timezone
+
+from recorrencia import ler_excecoes, ocorrencias
+from repositorio import criar_repositorio
+
+# ======================================
+# EXPORTAÇÃO DE EVENTOS (CSV / XLSX / iCalendar)
+# ======================================
+# Os eventos são lidos do banco em lotes (Repositorio.iterar_eventos) e cada
+# formato é um gerador de pedaços de texto/bytes, então exportar todo o
+# histórico de vários anos não monta um DataFrame completo em memória.
+#
+# Uso pela linha de comando:
+#   python exportacao_eventos.py --formato ics --calendario 2 --saida eventos.ics
+
+FORMATOS = {
+    "csv": ("text/csv", ".csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+    "ics": ("text/calendar", ".ics"),
+}
+
+# Ordem das colunas de Repositorio.iterar_eventos
+COLUNAS = [
+    "id", "data", "fim", "tipo", "titulo", "descricao", "id_calendario", "calendario", "nivel_ensino",
+    "recorrencia", "excecoes",
+]
+
+
+def gerar_csv(lotes):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUNAS)
+    for lote in lotes:
+        escritor.writerows(lote)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gerar_xlsx(lotes):
+    # Workbook em modo write_only: as linhas vão direto para o arquivo
+    # temporário do openpyxl, sem manter as células em memória
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("eventos")
+    ws.append(COLUNAS)
+    for lote in lotes:
+        for linha in lote:
+            ws.append(list(linha))
+    saida = io.BytesIO()
+    wb.save(saida)
+    yield saida.getvalue()
+
+
+def _escapar_ics(texto):
+    return (
+        str(texto).replace("\\", "\\\\").replace(";", "\\;")
+        .replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _dobrar_linha_ics(linha):
+    # RFC 5545: linhas de no máximo 75 octetos, continuação começa com espaço
+    dados = linha.encode("utf-8")
+    if len(dados) <= 75:
+        return linha + "\r\n"
+    partes = []
+    atual = ""
+    limite = 75
+    for ch in linha:
+        if len((atual + ch).encode("utf-8")) > limite:
+            partes.append(atual)
+            atual = ch
+            limite = 74
+        else:
+            atual += ch
+    partes.append(atual)
+    return "\r\n ".join(partes) + "\r\n"
+
+
+def gerar_ics(lotes):
+    carimbo = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield (
+        "BEGIN:VCALENDAR\r\n"
+        "VERSION:2.0\r\n"
+        "PRODID:-//IFTO//Calendario Academico//PT-BR\r\n"
+        "CALSCALE:GREGORIAN\r\n"
+    ).encode("utf-8")
+    for lote in lotes:
+        linhas = []
+        for id_evento, data, fim, tipo, titulo, descricao, id_cal, nome_cal, _, regra, excecoes in lote:
+            inicio_ev = date.fromisoformat(data)
+            # DTEND de eventos de dia inteiro é exclusivo
+            fim_ev = date.fromisoformat(fim or data) + timedelta(days=1)
+            if regra:
+                # Série: DTSTART precisa ser a primeira ocorrência e cada
+                # ocorrência dura um dia; o fim da série vira UNTIL
+                datas = ocorrencias(data, fim or data, regra, excecoes)
+                if not len(datas):
+                    continue
+                inicio_ev = datas[0].astype(date)
+                fim_ev = inicio_ev + timedelta(days=1)
+            linhas += [
+                "BEGIN:VEVENT",
+                f"UID:evento-{id_evento}@calendario-ifto",
+                f"DTSTAMP:{carimbo}",
+                f"DTSTART;VALUE=DATE:{inicio_ev.strftime('%Y%m%d')}",
+                f"DTEND;VALUE=DATE:{fim_ev.strftime('%Y%m%d')}",
+                f"SUMMARY:{_escapar_ics(titulo)}",
+                f"CATEGORIES:{_escapar_ics(tipo)}",
+            ]
+            if regra:
+                until = date.fromisoformat(fim or data).strftime("%Y%m%d")
+                linhas.append(f"RRULE:{regra};UNTIL={until}")
+                if excecoes:
+                    exdates = ",".join(d.replace("-", "") for d in ler_excecoes(excecoes))
+                    linhas.append(f"EXDATE;VALUE=DATE:{exdates}")
+            if descricao:
+                linhas.append(f"DESCRIPTION:{_escapar_ics(descricao)}")
+            if nome_cal:
+                linhas.append(f"X-IFTO-CALENDARIO:{_escapar_ics(nome_cal)}")
+            linhas.append("END:VEVENT")
+        yield "".join(_dobrar_linha_ics(linha) for linha in linhas).encode("utf-8")
+    yield b"END:VCALENDAR\r\n"
+
+
+GERADORES = {
+    "csv": gerar_csv,
+    "xlsx": gerar_xlsx,
+    "ics": gerar_ics,
+}
+
+
+def exportar_eventos(repo, formato, id_calendario=None, inicio=None, fim=None):
+    # Gerador de pedaços de bytes do arquivo no formato pedido
+    if formato not in GERADORES:
+        raise ValueError(f"Formato não suportado: {formato}")
+    return GERADORES[formato](repo.iterar_eventos(id_calendario, inicio, fim))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta eventos em CSV, XLSX ou iCalendar (.ics).")
+    parser.add_argument("--formato", choices=sorted(FORMATOS), default="csv")
+    parser.add_argument("--calendario", type=int, default=None, help="id do calendário (padrão: todos)")
+    parser.add_argument("--inicio", default=None, help="data inicial AAAA-MM-DD")
+    parser.add_argument("--fim", default=None, help="data final AAAA-MM-DD")
+    parser.add_argument("--saida", default=None, help="arquivo de saída (padrão: eventos.<formato>)")
+    parser.add_argument("--banco", default=None, help="arquivo SQLite ou URL postgresql:// (padrão: CALENDARIO_DB_URL ou calendario.db)")
+    args = parser.parse_args(argv)
+
+    saida = args.saida or "eventos" + FORMATOS[args.formato][1]
+    repo = criar_repositorio(args.banco)
+    try:
+        with open(saida, "wb") as f:
+            for pedaco in exportar_eventos(repo, args.formato, args.calendario, args.inicio, args.fim):
+                f.write(pedaco)
+    finally:
+        repo.fechar()
+    print(f"Eventos exportados para {saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import io
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from dias_letivos import montar_calendario_letivo
+from pdf_calendario import gerar_pdf, nome_arquivo_pdf
+from repositorio import criar_repositorio, url_padrao
+
+# ======================================
+# EXPORTAÇÃO EM LOTE (TODOS OS CALENDÁRIOS E SEMESTRES)
+# ======================================
+# Gera um PDF por par (calendário, semestre) em um pool de processos e junta
+# tudo em um ZIP, um arquivo por par com o id do calendário no nome. Cada processo abre o seu próprio repositório a partir da URL
+# do banco (SQLite ou PostgreSQL), então nada aqui depende do Streamlit nem da
+# conexão da página.
+#
+# Os processos usam "spawn": o servidor do Streamlit tem várias threads, e um
+# fork copiaria locks possivelmente travados (logging, sqlite, pools).
+#
+# Uso pela linha de comando:
+#   python exportacao_lote.py --saida calendarios.zip --processos 4
+
+_repo_processo = None
+
+
+def _arquivo_no_zip(id_calendario, nome, semestre, usados):
+    # nome_arquivo_pdf troca espaço por "_" e "/" por "-": calendários como
+    # "A B" e "A_B" dariam o mesmo nome. O id do calendário vai na frente e,
+    # se ainda repetir (semestres "1/2026" e "1-2026"), entra um sufixo.
+    base, extensao = os.path.splitext(f"{id_calendario}_{nome_arquivo_pdf(nome, semestre)}")
+    arquivo, n = base + extensao, 1
+    while arquivo in usados:
+        n += 1
+        arquivo = f"{base}_{n}{extensao}"
+    usados.add(arquivo)
+    return arquivo
+
+
+def listar_tarefas(url_banco=None):
+    # Um item por semestre; calendários sem semestre exportam todos os eventos
+    repo = criar_repositorio(url_banco)
+    try:
+        repo.preparar()
+        tarefas = []
+        usados = set()
+        df_calendarios = repo.carregar_calendarios()
+        for _, row_cal in df_calendarios.iterrows():
+            nome = row_cal["nome_calendario"]
+            nivel = row_cal["nivel_ensino"] or "Geral"
+            df_sem = repo.carregar_semestres_por_calendario(int(row_cal["id"]))
+
+            if df_sem.empty:
+                tarefas.append({
+                    "id_calendario": int(row_cal["id"]),
+                    "inicio": None,
+                    "fim": None,
+                    "titulo_extra": f"{nome} – {nivel}",
+                    "arquivo": _arquivo_no_zip(int(row_cal["id"]), nome, None, usados),
+                })
+                continue
+
+            for _, row_sem in df_sem.iterrows():
+                semestre = row_sem["nome_semestre"]
+                tarefas.append({
+                    "id_calendario": int(row_cal["id"]),
+                    "inicio": row_sem["data_inicio"],
+                    "fim": row_sem["data_fim"],
+                    "titulo_extra": f"{nome} – {nivel} – {semestre}",
+                    "arquivo": _arquivo_no_zip(int(row_cal["id"]), nome, semestre, usados),
+                })
+        return tarefas
+    finally:
+        repo.fechar()
+
+
+def _iniciar_processo(url_banco):
+    global _repo_processo
+    _repo_processo = criar_repositorio(url_banco)
+
+
+def _gerar_tarefa(tarefa):
+    inicio = time.perf_counter()
+    df = _repo_processo.carregar_eventos(
+        tarefa["id_calendario"],
+        tarefa["inicio"],
+        tarefa["fim"]
+    )
+    letivo = montar_calendario_letivo(df, tarefa["inicio"], tarefa["fim"])
+    pdf_bytes = gerar_pdf(
+        df,
+        titulo_extra=tarefa["titulo_extra"],
+        letivo=letivo,
+        inicio=tarefa["inicio"],
+        fim=tarefa["fim"]
+    )
+    return tarefa["arquivo"], pdf_bytes, len(df), time.perf_counter() - inicio
+
+
+def exportar_todos(url_banco=None, processos=None):
+    # Retorna (bytes do ZIP, relatório por arquivo)
+    url_banco = url_banco or url_padrao()
+    tarefas = listar_tarefas(url_banco)
+    buffer = io.BytesIO()
+    relatorio = []
+
+    with ProcessPoolExecutor(
+        max_workers=processos,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_iniciar_processo,
+        initargs=(url_banco,)
+    ) as executor, zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for arquivo, pdf_bytes, n_eventos, segundos in executor.map(_gerar_tarefa, tarefas):
+            zf.writestr(arquivo, pdf_bytes)
+            relatorio.append({
+                "arquivo": arquivo,
+                "eventos": n_eventos,
+                "bytes": len(pdf_bytes),
+                "segundos": round(segundos, 3),
+            })
+
+    return buffer.getvalue(), relatorio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Gera o PDF de todos os calendários/semestres e empacota em um ZIP."
+    )
+    parser.add_argument("--banco", default=None, help="arquivo SQLite ou URL postgresql:// (padrão: CALENDARIO_DB_URL ou calendario.db)")
+    parser.add_argument("--saida", default="calendarios_ifto.zip", help="arquivo ZIP de saída")
+    parser.add_argument("--processos", type=int, default=None, help="número de processos (padrão: nº de CPUs)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    zip_bytes, relatorio = exportar_todos(args.banco, args.processos)
+    with open(args.saida, "wb") as f:
+        f.write(zip_bytes)
+
+    for item in relatorio:
+        print(f"{item['segundos']:8.3f}s  {item['eventos']:6d} eventos  {item['arquivo']}")
+    print(
+        f"{len(relatorio)} PDFs em {time.perf_counter() - inicio:.2f}s "
+        f"-> {os.path.abspath(args.saida)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
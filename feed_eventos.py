@@ -0,0 +1,36 @@
+import numpy as np
+
+# ======================================
+# EVENTOS NO FORMATO DO CALENDÁRIO DA PÁGINA (FullCalendar)
+# ======================================
+# Sem dependência do Streamlit, para ser usado também pelos benchmarks.
+
+UI_CORES = {
+    "aula": "#008542",      # verde IFTO
+    "evento": "#F2AF00",    # amarelo
+    "feriado": "#D62828",   # vermelho
+    "reunião": "#006666",   # verde petróleo
+}
+
+
+def montar_feed_eventos(df):
+    # Lista de eventos no formato do FullCalendar, montada coluna a coluna
+    # ("end" é exclusivo, por isso fim + 1 dia)
+    if df.empty:
+        return []
+    inicio = np.datetime_as_string(df["data"].to_numpy(dtype="datetime64[D]"), unit="D")
+    fim_exclusivo = np.datetime_as_string(
+        df["fim"].to_numpy(dtype="datetime64[D]") + np.timedelta64(1, "D"), unit="D"
+    )
+    cores = df["tipo"].astype(str).str.strip().str.lower().map(UI_CORES).fillna("#555555")
+    descricoes = df["descricao"].fillna("")
+
+    chaves = ("title", "start", "end", "description", "color")
+    colunas = zip(
+        df["titulo"].tolist(),
+        inicio.tolist(),
+        fim_exclusivo.tolist(),
+        descricoes.tolist(),
+        cores.tolist()
+    )
+    return [dict(zip(chaves, valores)) for valores in colunas]
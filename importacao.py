@@ -0,0 +1,212 @@
+import argparse
+import csv
+import io
+import os
+import time
+from datetime import timedelta
+
+import pandas as pd
+
+from repositorio import criar_repositorio
+
+# ======================================
+# IMPORTAÇÃO EM LOTE DE EVENTOS (CSV / XLSX)
+# ======================================
+# Lê as linhas em streaming (sem montar o arquivo inteiro em memória), ignora
+# as datas em branco que as planilhas trazem como espaço reservado, junta dias
+# consecutivos com o mesmo evento em um único intervalo data/fim e grava tudo
+# com executemany em uma única transação (repositório SQLite ou PostgreSQL).
+#
+# Uso pela linha de comando:
+#   python importacao.py calendario_consolidado_2025_2027.csv --calendario "Graduação 2026" --simular
+
+COLUNAS_OBRIGATORIAS = ("data", "tipo", "titulo")
+TAMANHO_LOTE = 500
+
+
+def _normalizar_cabecalho(cabecalho):
+    return [str(c).strip().lower() if c is not None else "" for c in cabecalho]
+
+
+def _validar_cabecalho(colunas):
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in colunas]
+    if faltando:
+        raise ValueError(
+            "Arquivo sem as colunas obrigatórias: " + ", ".join(faltando)
+            + ". Esperado um cabeçalho com data, tipo, titulo (descricao e fim são opcionais)."
+        )
+
+
+def ler_linhas_csv(arquivo):
+    # arquivo: caminho ou objeto binário (ex.: upload do Streamlit)
+    if isinstance(arquivo, (str, os.PathLike)):
+        texto = open(arquivo, encoding="utf-8-sig", newline="")
+    else:
+        texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    try:
+        leitor = csv.reader(texto)
+        colunas = _normalizar_cabecalho(next(leitor, []))
+        _validar_cabecalho(colunas)
+        for valores in leitor:
+            yield dict(zip(colunas, valores))
+    finally:
+        if isinstance(arquivo, (str, os.PathLike)):
+            texto.close()
+        else:
+            texto.detach()
+
+
+def ler_linhas_xlsx(arquivo):
+    # Primeira planilha, primeira linha como cabeçalho; modo read_only do
+    # openpyxl lê as linhas sob demanda
+    from openpyxl import load_workbook
+
+    wb = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = wb.worksheets[0].iter_rows(values_only=True)
+        colunas = _normalizar_cabecalho(next(linhas, ()))
+        _validar_cabecalho(colunas)
+        for valores in linhas:
+            yield dict(zip(colunas, valores))
+    finally:
+        wb.close()
+
+
+def ler_linhas(arquivo, nome_arquivo=None):
+    nome = (nome_arquivo or str(arquivo)).lower()
+    if nome.endswith(".xlsx"):
+        return ler_linhas_xlsx(arquivo)
+    if nome.endswith(".csv"):
+        return ler_linhas_csv(arquivo)
+    raise ValueError("Formato não suportado (use .csv ou .xlsx).")
+
+
+def _texto(valor):
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+        return ""
+    return str(valor).strip()
+
+
+def agrupar_intervalos(linhas, estatisticas):
+    # Gera (data, fim, tipo, titulo, descricao). Um intervalo fica "aberto"
+    # enquanto o próximo dia do mesmo evento aparecer; os arquivos vêm
+    # ordenados por data, então intervalos que ficaram para trás são emitidos
+    # assim que a leitura passa deles.
+    abertos = {}
+    for linha in linhas:
+        estatisticas["linhas"] += 1
+        tipo = _texto(linha.get("tipo")).lower()
+        titulo = _texto(linha.get("titulo"))
+        data_txt = _texto(linha.get("data"))
+        if not tipo or not titulo or not data_txt:
+            estatisticas["ignoradas"] += 1
+            continue
+
+        data = pd.to_datetime(data_txt, errors="coerce")
+        if pd.isna(data):
+            estatisticas["invalidas"] += 1
+            continue
+        data = data.date()
+        fim = pd.to_datetime(_texto(linha.get("fim")) or None, errors="coerce")
+        fim = data if pd.isna(fim) else max(fim.date(), data)
+        descricao = _texto(linha.get("descricao"))
+
+        chave = (tipo, titulo, descricao)
+        atual = abertos.get(chave)
+        if atual is not None and atual[0] - timedelta(days=1) <= data <= atual[1] + timedelta(days=1):
+            atual[0] = min(atual[0], data)
+            atual[1] = max(atual[1], fim)
+        else:
+            if atual is not None:
+                yield (atual[0], atual[1]) + chave
+            abertos[chave] = [data, fim]
+
+        # Emite intervalos que não podem mais ser estendidos
+        for chave_ant in [c for c, (_, f) in abertos.items() if f < data - timedelta(days=1)]:
+            ini_ant, fim_ant = abertos.pop(chave_ant)
+            yield (ini_ant, fim_ant) + chave_ant
+
+    for chave, (ini, fim) in sorted(abertos.items(), key=lambda item: item[1][0]):
+        yield (ini, fim) + chave
+
+
+def importar_eventos(repo, linhas, id_calendario, simular=False):
+    # Retorna um relatório com contagens, tempo e a lista de intervalos novos.
+    # Intervalos idênticos a eventos já cadastrados no calendário são pulados,
+    # então reimportar o mesmo arquivo não duplica nada.
+    inicio = time.perf_counter()
+    estatisticas = {"linhas": 0, "ignoradas": 0, "invalidas": 0}
+
+    existentes = set()
+    if id_calendario is not None:
+        existentes = repo.chaves_eventos(id_calendario)
+
+    novos = []
+    repetidos = 0
+    for data, fim, tipo, titulo, descricao in agrupar_intervalos(linhas, estatisticas):
+        registro = (data.isoformat(), fim.isoformat(), tipo, titulo, descricao)
+        if registro in existentes:
+            repetidos += 1
+            continue
+        existentes.add(registro)
+        novos.append(registro)
+
+    if not simular and novos:
+        repo.inserir_eventos_lote(id_calendario, novos, TAMANHO_LOTE)
+
+    segundos = time.perf_counter() - inicio
+    return {
+        **estatisticas,
+        "intervalos": len(novos) + repetidos,
+        "novos": len(novos),
+        "ja_existentes": repetidos,
+        "gravados": 0 if simular else len(novos),
+        "segundos": segundos,
+        "linhas_por_segundo": estatisticas["linhas"] / segundos if segundos > 0 else 0.0,
+        "eventos": pd.DataFrame(novos, columns=["data", "fim", "tipo", "titulo", "descricao"]),
+    }
+
+
+def _id_calendario(repo, calendario, criar=False):
+    if str(calendario).isdigit():
+        return int(calendario)
+    id_cal = repo.id_calendario_por_nome(calendario)
+    if id_cal is not None or not criar:
+        return id_cal
+    return repo.inserir_calendario(calendario, "Importado", "Geral")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa eventos de um CSV/XLSX para um calendário.")
+    parser.add_argument("arquivo", help="arquivo .csv ou .xlsx com colunas data, tipo, titulo[, descricao, fim]")
+    parser.add_argument("--calendario", required=True, help="nome ou id do calendário de destino")
+    parser.add_argument("--criar", action="store_true", help="cria o calendário se ele não existir")
+    parser.add_argument("--simular", action="store_true", help="mostra o que seria importado sem gravar")
+    parser.add_argument("--banco", default=None, help="arquivo SQLite ou URL postgresql:// (padrão: CALENDARIO_DB_URL ou calendario.db)")
+    args = parser.parse_args(argv)
+
+    repo = criar_repositorio(args.banco)
+    try:
+        repo.preparar()
+        id_cal = _id_calendario(repo, args.calendario, criar=args.criar and not args.simular)
+        if id_cal is None and not args.simular:
+            raise SystemExit(f"Calendário '{args.calendario}' não encontrado (use --criar para cadastrá-lo).")
+        relatorio = importar_eventos(repo, ler_linhas(args.arquivo), id_cal, simular=args.simular)
+    except ValueError as erro:
+        raise SystemExit(str(erro))
+    finally:
+        repo.fechar()
+
+    if args.simular and not relatorio["eventos"].empty:
+        print(relatorio["eventos"].to_string(index=False))
+    print(
+        f"{relatorio['linhas']} linhas lidas ({relatorio['ignoradas']} em branco, "
+        f"{relatorio['invalidas']} com data inválida) -> {relatorio['intervalos']} intervalos: "
+        f"{relatorio['novos']} novos, {relatorio['ja_existentes']} já existentes, "
+        f"{relatorio['gravados']} gravados em {relatorio['segundos']:.3f}s "
+        f"({relatorio['linhas_por_segundo']:.0f} linhas/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
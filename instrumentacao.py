@@ -0,0 +1,221 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ======================================
+# INSTRUMENTAÇÃO (TEMPOS, SQL E MÉTRICAS)
+# ======================================
+# Ligada pela variável de ambiente CALENDARIO_INSTRUMENTACAO=1. Desligada,
+# cada ponto de medição é um "if" (etapa) ou um nullcontext (trecho).
+#
+# Cada execução da página (rerun do Streamlit, uma thread) guarda:
+#   - etapas: seções do script, marcadas em sequência com etapa("nome")
+#   - trechos: blocos internos medidos com "with trecho('nome')"
+#   - SQL: consultas, tempo, linhas e bytes (estimados) lidos do banco
+# No fim (finalizar_execucao), os números entram nos totais do processo,
+# expostos no formato texto do Prometheus (texto_prometheus, ou o servidor
+# HTTP de iniciar_servidor_metricas) e em uma linha de log JSON, no logger
+# "calendario.instrumentacao" em nível INFO. Se o processo não configurou
+# logging, essas linhas vão para o stderr; com handlers próprios (ex.:
+# logging.config), elas seguem a configuração existente.
+
+ATIVO = os.environ.get("CALENDARIO_INSTRUMENTACAO", "").strip().lower() not in ("", "0", "false", "nao", "não")
+
+log = logging.getLogger("calendario.instrumentacao")
+
+# O servidor de métricas só escuta localmente; para um Prometheus em outra
+# máquina, use CALENDARIO_METRICAS_ENDERECO (ex.: 0.0.0.0)
+ENDERECO_METRICAS = os.environ.get("CALENDARIO_METRICAS_ENDERECO", "127.0.0.1")
+
+_local = threading.local()
+_trava = threading.Lock()
+_totais = {
+    "trechos": {},   # nome -> [execuções, segundos]
+    "sql": [0, 0.0, 0, 0],  # consultas, segundos, linhas, bytes
+    "execucoes": 0,
+}
+_SEM_MEDICAO = nullcontext()
+
+
+def _configurar_log():
+    # Sem isto o logger herda o nível WARNING da raiz e as linhas INFO somem
+    if log.level == logging.NOTSET:
+        log.setLevel(logging.INFO)
+    if not log.hasHandlers():
+        saida = logging.StreamHandler()
+        saida.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(saida)
+
+
+if ATIVO:
+    _configurar_log()
+
+
+class _Execucao:
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.trechos = []  # (nome, segundos)
+        self.etapa_atual = None
+        self.inicio_etapa = self.inicio
+        self.sql = [0, 0.0, 0, 0]
+
+
+def _execucao():
+    execucao = getattr(_local, "execucao", None)
+    if execucao is None:
+        execucao = _local.execucao = _Execucao()
+    return execucao
+
+
+def iniciar_execucao():
+    if ATIVO:
+        _local.execucao = _Execucao()
+
+
+def etapa(nome):
+    # Fecha a etapa anterior (se houver) e abre a próxima
+    if not ATIVO:
+        return
+    execucao = _execucao()
+    agora = time.perf_counter()
+    if execucao.etapa_atual is not None:
+        execucao.trechos.append((execucao.etapa_atual, agora - execucao.inicio_etapa))
+    execucao.etapa_atual = nome
+    execucao.inicio_etapa = agora
+
+
+@contextmanager
+def _medir(nome):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _execucao().trechos.append((nome, time.perf_counter() - inicio))
+
+
+def trecho(nome):
+    return _medir(nome) if ATIVO else _SEM_MEDICAO
+
+
+def _tamanho(linhas):
+    # Estimativa dos bytes recebidos: texto pelo tamanho, o resto 8 bytes
+    total = 0
+    for linha in linhas:
+        for valor in linha:
+            total += len(valor) if isinstance(valor, (str, bytes)) else 8
+    return total
+
+
+def registrar_sql(segundos, linhas=()):
+    # Chamado pelo repositório depois de cada consulta (só com ATIVO)
+    sql = _execucao().sql
+    sql[0] += 1
+    sql[1] += segundos
+    sql[2] += len(linhas)
+    sql[3] += _tamanho(linhas)
+
+
+def resumo_execucao():
+    # Números da execução atual: {"trechos": [(nome, ms)], "sql": {...}, "total_ms"}
+    execucao = _execucao()
+    trechos = list(execucao.trechos)
+    if execucao.etapa_atual is not None:
+        trechos.append((execucao.etapa_atual, time.perf_counter() - execucao.inicio_etapa))
+    consultas, segundos, linhas, tamanho = execucao.sql
+    return {
+        "trechos": [(nome, round(s * 1000, 2)) for nome, s in trechos],
+        "sql": {"consultas": consultas, "ms": round(segundos * 1000, 2), "linhas": linhas, "bytes": tamanho},
+        "total_ms": round((time.perf_counter() - execucao.inicio) * 1000, 2),
+    }
+
+
+def finalizar_execucao():
+    # Fecha a última etapa, soma aos totais do processo e grava o log
+    if not ATIVO:
+        return
+    etapa(None)
+    execucao = _execucao()
+    with _trava:
+        _totais["execucoes"] += 1
+        for nome, segundos in execucao.trechos:
+            total = _totais["trechos"].setdefault(nome, [0, 0.0])
+            total[0] += 1
+            total[1] += segundos
+        for i, valor in enumerate(execucao.sql):
+            _totais["sql"][i] += valor
+    resumo = resumo_execucao()
+    log.info(json.dumps({"evento": "execucao_pagina", **resumo}, ensure_ascii=False))
+
+
+def _rotulo(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def texto_prometheus():
+    with _trava:
+        trechos = {nome: list(v) for nome, v in _totais["trechos"].items()}
+        consultas, segundos, linhas, tamanho = _totais["sql"]
+        execucoes = _totais["execucoes"]
+    saida = [
+        "# HELP calendario_execucoes_total Execuções da página medidas.",
+        "# TYPE calendario_execucoes_total counter",
+        f"calendario_execucoes_total {execucoes}",
+        "# HELP calendario_trecho_segundos_total Tempo gasto em cada trecho da página.",
+        "# TYPE calendario_trecho_segundos_total counter",
+    ]
+    saida += [
+        f'calendario_trecho_segundos_total{{trecho="{_rotulo(nome)}"}} {s:.6f}'
+        for nome, (_, s) in sorted(trechos.items())
+    ]
+    saida += [
+        "# HELP calendario_trecho_execucoes_total Vezes que cada trecho rodou.",
+        "# TYPE calendario_trecho_execucoes_total counter",
+    ]
+    saida += [
+        f'calendario_trecho_execucoes_total{{trecho="{_rotulo(nome)}"}} {n}'
+        for nome, (n, _) in sorted(trechos.items())
+    ]
+    saida += [
+        "# HELP calendario_sql_consultas_total Consultas SQL executadas.",
+        "# TYPE calendario_sql_consultas_total counter",
+        f"calendario_sql_consultas_total {consultas}",
+        "# HELP calendario_sql_segundos_total Tempo gasto em consultas SQL.",
+        "# TYPE calendario_sql_segundos_total counter",
+        f"calendario_sql_segundos_total {segundos:.6f}",
+        "# HELP calendario_sql_linhas_total Linhas lidas do banco.",
+        "# TYPE calendario_sql_linhas_total counter",
+        f"calendario_sql_linhas_total {linhas}",
+        "# HELP calendario_sql_bytes_total Bytes lidos do banco (estimativa).",
+        "# TYPE calendario_sql_bytes_total counter",
+        f"calendario_sql_bytes_total {tamanho}",
+    ]
+    return "\n".join(saida) + "\n"
+
+
+class _PaginaMetricas(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        corpo = texto_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def iniciar_servidor_metricas(porta, endereco=ENDERECO_METRICAS):
+    # Servidor HTTP em segundo plano com GET /metrics (uma vez por processo)
+    servidor = ThreadingHTTPServer((endereco, int(porta)), _PaginaMetricas)
+    threading.Thread(target=servidor.serve_forever, name="metricas", daemon=True).start()
+    return servidor
@@ -0,0 +1,409 @@
+import calendar as cal
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+
+from recorrencia import expandir_recorrencias
+
+# ======================================
+# GERAÇÃO DO PDF DO CALENDÁRIO
+# ======================================
+# Não depende do Streamlit nem de uma conexão compartilhada: recebe o
+# DataFrame de eventos e devolve os bytes do PDF, podendo rodar em outros
+# processos (exportação em lote).
+PDF_CORES = {
+    "aula": (0, 133, 66),
+    "evento": (242, 175, 0),
+    "feriado": (214, 40, 40),
+    "reunião": (0, 102, 102),
+}
+
+PRIORIDADE = ["feriado", "reunião", "evento", "aula"]
+
+NOMES_MESES = [
+    "Janeiro", "Fevereiro", "Março",
+    "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro",
+    "Outubro", "Novembro", "Dezembro"
+]
+
+# Paginação do PDF: meses por página
+MESES_POR_PAGINA = {"trimestre": 3, "mes": 1}
+
+# Semanas começando na segunda (sem mexer no estado global do módulo calendar,
+# que é compartilhado pelas threads de geração)
+SEMANA = cal.Calendar(cal.MONDAY)
+DIAS_SEMANA = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+
+FONTE_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "DejaVuSans.ttf")
+
+
+# ======================================
+# DOCUMENTO
+# ======================================
+# A fonte é registrada por add_font em cada documento: o fpdf2 recorta o
+# TTFont no output(), então nada da fonte é compartilhado entre documentos.
+def novo_documento():
+    pdf = FPDF(orientation="L", format="A4")
+    pdf.set_auto_page_break(auto=True, margin=10)
+    pdf.add_font("DejaVu", "", FONTE_PDF)
+    return pdf
+
+
+# ======================================
+# BLOCOS DOS MESES (CACHE DE DESENHO)
+# ======================================
+# A grade de um mês (nome, cabeçalho dos dias da semana, células, números e
+# cores) vira uma lista pronta de comandos de desenho, com posições relativas
+# ao canto do mês, repetida no documento pelos métodos públicos do FPDF
+# (desenhar_mes). A lista só depende de (ano, mês, tamanho, cor de cada dia),
+# então calendários com os mesmos feriados reaproveitam os mesmos blocos, na
+# mesma exportação e entre exportações do processo (cada processo da
+# exportação em lote tem o seu). Por baixo, a parte sem cores (grade_mes) é
+# comum a todos os calendários: um bloco novo só junta comandos prontos.
+#
+# Comandos (tuplas):
+#   ("fonte", tamanho)                          -> set_font
+#   ("cor_texto", r, g, b)                      -> set_text_color
+#   ("cor_fundo", r, g, b)                      -> set_fill_color
+#   ("retangulo", dx, dy, w, h, estilo)         -> rect
+#   ("texto", dx, dy, w, h, texto, borda, alinhamento) -> set_xy + cell
+BLOCOS_MAX_ENTRADAS = 1024
+PRETO = ("cor_texto", 0, 0, 0)
+BRANCO = ("cor_texto", 255, 255, 255)
+
+
+@lru_cache(maxsize=BLOCOS_MAX_ENTRADAS)
+def grade_mes(ano, mes, w, h):
+    # Parte comum a todos os calendários: (comandos do nome e do cabeçalho,
+    # células na ordem de desenho: (borda, (fundo, número) do dia ou None))
+    comandos = [("fonte", 10), PRETO, ("texto", 0, 0, w, 6, NOMES_MESES[mes - 1].upper(), 0, "C")]
+
+    header_y = 7
+    cell_w = w / 7
+    cell_h = (h - 12) / 6
+
+    comandos.append(("fonte", 7))
+    for i, ds in enumerate(DIAS_SEMANA):
+        comandos.append(("texto", i * cell_w, header_y, cell_w, 5, ds, 1, "C"))
+
+    celulas = []
+    for linha_idx, semana in enumerate(SEMANA.monthdayscalendar(ano, mes)):
+        for col_idx, dia in enumerate(semana):
+            cx = col_idx * cell_w
+            cy = header_y + 5 + linha_idx * cell_h
+            dia_cmds = None
+            if dia > 0:
+                dia_cmds = (
+                    ("retangulo", cx, cy, cell_w, cell_h, "F"),
+                    ("texto", cx + 1, cy + 1, cell_w - 2, 4, str(dia), 0, ""),
+                )
+            celulas.append((("retangulo", cx, cy, cell_w, cell_h, None), dia_cmds))
+
+    return tuple(comandos), tuple(celulas)
+
+
+@lru_cache(maxsize=BLOCOS_MAX_ENTRADAS)
+def bloco_mes(ano, mes, w, h, cores):
+    # cores: bytes (int8) com o índice em PRIORIDADE de cada dia do mês, ou -1.
+    # Um bloco novo só junta os comandos da grade com as cores dos dias.
+    cabecalho, celulas = grade_mes(ano, mes, w, h)
+    comandos = list(cabecalho)
+    tipos = iter(np.frombuffer(cores, dtype=np.int8))
+    for borda, dia_cmds in celulas:
+        comandos.append(borda)
+        if dia_cmds is None:
+            continue
+        fundo, numero = dia_cmds
+        idx_tipo = next(tipos)
+        if idx_tipo >= 0:
+            comandos += [("cor_fundo", *PDF_CORES[PRIORIDADE[idx_tipo]]), fundo, BRANCO, numero]
+        else:
+            comandos += [PRETO, numero]
+    comandos.append(PRETO)
+    return tuple(comandos)
+
+
+def desenhar_mes(pdf, ano, mes, x, y, w, h, cores):
+    for comando, *args in bloco_mes(ano, mes, round(w, 3), round(h, 3), cores):
+        if comando == "texto":
+            dx, dy, cw, ch, texto, borda, alinhamento = args
+            pdf.set_xy(x + dx, y + dy)
+            pdf.cell(cw, ch, text=texto, border=borda, align=alinhamento)
+        elif comando == "retangulo":
+            dx, dy, cw, ch, estilo = args
+            pdf.rect(x + dx, y + dy, cw, ch, style=estilo)
+        elif comando == "fonte":
+            pdf.set_font("DejaVu", size=args[0])
+        elif comando == "cor_texto":
+            pdf.set_text_color(*args)
+        else:
+            pdf.set_fill_color(*args)
+
+
+def nome_arquivo_pdf(nome_calendario, semestre=None):
+    nome = f"calendario_IFTO_{nome_calendario}_{semestre or 'ano'}.pdf"
+    return nome.replace(" ", "_").replace("/", "-")
+
+
+def prioridade_por_periodo(df, inicio, n_dias):
+    # Vetor com um item por dia a partir de inicio: índice em PRIORIDADE do
+    # tipo que colore o dia, ou -1 se não houver evento. Cada tipo é uma
+    # varredura dos intervalos (soma de +1 no início e -1 após o fim), aplicada
+    # da menor para a maior prioridade, então o custo depende do número de
+    # eventos e não do total de dias cobertos.
+    resultado = np.full(n_dias, -1, dtype=np.int8)
+    if df.empty:
+        return resultado
+
+    inicio = np.datetime64(inicio, "D")
+    ini = (df["data"].to_numpy(dtype="datetime64[D]") - inicio).astype(np.int64)
+    fim = (df["fim"].to_numpy(dtype="datetime64[D]") - inicio).astype(np.int64)
+    indice_tipo = df["tipo"].map({tp: i for i, tp in enumerate(PRIORIDADE)}).to_numpy()
+
+    no_periodo = (fim >= 0) & (ini < n_dias) & (fim >= ini)
+    ini = np.clip(ini, 0, n_dias - 1)
+    fim = np.clip(fim, 0, n_dias - 1)
+
+    for idx in reversed(range(len(PRIORIDADE))):
+        sel = no_periodo & (indice_tipo == idx)
+        if not sel.any():
+            continue
+        cobertura = np.zeros(n_dias + 1, dtype=np.int32)
+        np.add.at(cobertura, ini[sel], 1)
+        np.add.at(cobertura, fim[sel] + 1, -1)
+        resultado[np.cumsum(cobertura[:-1]) > 0] = idx
+
+    return resultado
+
+
+def prioridade_por_dia(df, ano):
+    # Um item por dia do ano (ver prioridade_por_periodo)
+    n_dias = 366 if cal.isleap(ano) else 365
+    return prioridade_por_periodo(df, date(ano, 1, 1), n_dias)
+
+
+def _dia(valor):
+    return pd.Timestamp(valor).date()
+
+
+def periodo_pdf(df, inicio=None, fim=None):
+    # Período impresso: [inicio, fim] quando informados; sem eles, os anos
+    # inteiros cobertos pelos eventos (ou o ano atual, se não houver eventos)
+    if df.empty:
+        ano_inicial = ano_final = date.today().year
+    else:
+        ano_inicial = int(df["data"].min().year)
+        ano_final = int(df["fim"].max().year)
+    inicio = _dia(inicio) if inicio is not None else date(ano_inicial, 1, 1)
+    fim = _dia(fim) if fim is not None else date(ano_final, 12, 31)
+    return inicio, max(inicio, fim)
+
+
+def paginas_pdf(inicio, fim, paginacao="trimestre"):
+    # Uma lista de (ano, mês) por página. Os grupos seguem o ano civil
+    # (trimestres jan–mar, abr–jun...), então a primeira e a última página
+    # podem mostrar meses fora do período.
+    n = MESES_POR_PAGINA[paginacao]
+    ano, mes = inicio.year, inicio.month - (inicio.month - 1) % n
+    paginas = []
+    while (ano, mes) <= (fim.year, fim.month):
+        paginas.append([(ano, mes + i) for i in range(n)])
+        mes += n
+        if mes > 12:
+            ano, mes = ano + 1, mes - 12
+    return paginas
+
+
+def gerar_pdf(df, titulo_extra=None, letivo=None, progresso=None,
+              inicio=None, fim=None, paginacao="trimestre"):
+    # letivo: CalendarioLetivo do semestre (dias_letivos.py), opcional
+    # progresso: função chamada com a fração concluída (0 a 1), opcional
+    # inicio/fim: período impresso (ver periodo_pdf); paginacao: "trimestre"
+    # (três meses por página) ou "mes" (um mês por página)
+    inicio, fim = periodo_pdf(df, inicio, fim)
+    paginas = paginas_pdf(inicio, fim, paginacao)
+
+    # Eventos recorrentes viram ocorrências só dentro do período impresso
+    if not df.empty:
+        df = expandir_recorrencias(df, inicio, fim)
+        df = df[(df["fim"] >= pd.Timestamp(inicio)) & (df["data"] <= pd.Timestamp(fim))]
+
+    pdf = novo_documento()
+
+    # Tipo de maior prioridade de cada dia (índice em PRIORIDADE), calculado
+    # uma vez para todos os meses desenhados, do primeiro ao último
+    inicio_grade = date(*paginas[0][0], 1)
+    ano_final, mes_final = paginas[-1][-1]
+    fim_grade = date(ano_final, mes_final, cal.monthrange(ano_final, mes_final)[1])
+    prioridade_dia = prioridade_por_periodo(df, inicio_grade, (fim_grade - inicio_grade).days + 1)
+
+    # Eventos ordenados pelo início (antes da grade conta como o primeiro dia
+    # dela); cada página lista uma fatia contínua, achada por busca binária
+    df = df.assign(_inicio=df["data"].clip(lower=pd.Timestamp(inicio_grade))).sort_values("_inicio", kind="stable")
+    inicios = df["_inicio"].to_numpy(dtype="datetime64[D]")
+
+    def desenhar_mes_colorido(pdf, ano, mes, x, y, w, h):
+        # Fatia do vetor de prioridades com os dias do mês
+        offset_mes = (date(ano, mes, 1) - inicio_grade).days
+        cores = prioridade_dia[offset_mes:offset_mes + cal.monthrange(ano, mes)[1]].tobytes()
+        desenhar_mes(pdf, ano, mes, x, y, w, h, cores)
+
+    por_trimestre = paginacao == "trimestre"
+    margin_x = 10
+    margin_y = 10
+    titulo_h = 10
+    gap_x = 5
+    largura_util = pdf.w - 2 * margin_x
+    if por_trimestre:
+        largura_mes = (largura_util - 2 * gap_x) / 3
+        altura_mes = 80
+    else:
+        largura_mes = 180
+        altura_mes = 120
+
+    for idx_pagina, meses in enumerate(paginas, start=1):
+        pdf.add_page()
+        ano_pagina, primeiro_mes = meses[0]
+
+        pdf.set_font("DejaVu", size=14)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_xy(margin_x, margin_y)
+
+        if por_trimestre:
+            titulo_base = f"Calendário Acadêmico – {ano_pagina} | Trimestre {(primeiro_mes - 1) // 3 + 1}"
+        else:
+            titulo_base = f"Calendário Acadêmico – {NOMES_MESES[primeiro_mes - 1]} de {ano_pagina}"
+        if titulo_extra:
+            titulo_final = f"{titulo_base} | {titulo_extra}"
+        else:
+            titulo_final = titulo_base
+
+        pdf.cell(0, 8, text=titulo_final, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align="C")
+
+        topo_cal = margin_y + titulo_h + 3
+        x_inicial = margin_x if por_trimestre else margin_x + (largura_util - largura_mes) / 2
+
+        for i, (ano, mes) in enumerate(meses):
+            x = x_inicial + i * (largura_mes + gap_x)
+            y = topo_cal
+            desenhar_mes_colorido(pdf, ano, mes, x, y, largura_mes, altura_mes)
+            if letivo is not None and letivo.rotulo_mes(ano, mes):
+                pdf.set_font("DejaVu", size=7)
+                pdf.set_text_color(0, 0, 0)
+                pdf.set_xy(x, y + altura_mes + 0.5)
+                pdf.cell(largura_mes, 4, text=letivo.rotulo_mes(ano, mes), align="R")
+
+        # Lista de eventos da página
+        primeiro_dia = date(ano_pagina, primeiro_mes, 1)
+        ano_ultimo, mes_ultimo = meses[-1]
+        ultimo_dia = date(ano_ultimo, mes_ultimo, cal.monthrange(ano_ultimo, mes_ultimo)[1])
+        nome_pagina = "trimestre" if por_trimestre else "mês"
+
+        pdf.set_font("DejaVu", size=11)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_xy(margin_x, topo_cal + altura_mes + 6)
+        cabecalho = f"Eventos do {nome_pagina} (ordenados por data):"
+        if letivo is not None:
+            no_periodo = letivo.dias_letivos_entre(primeiro_dia, ultimo_dia)
+            cabecalho = (
+                f"Dias letivos no {nome_pagina}: {no_periodo} de {letivo.total} no período. "
+                + cabecalho
+            )
+        pdf.cell(0, 6, text=cabecalho, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+        pdf.set_font("DejaVu", size=9)
+        a, b = np.searchsorted(inicios, [np.datetime64(primeiro_dia), np.datetime64(ultimo_dia) + 1])
+        df_pagina = df.iloc[a:b]
+
+        if df_pagina.empty:
+            pdf.set_x(margin_x)
+            pdf.cell(0, 5, text=f"• Não há eventos para este {nome_pagina}.", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        else:
+            for row in df_pagina.itertuples(index=False):
+                ini = row.data.strftime("%d/%m/%Y")
+                fim_evento = row.fim.strftime("%d/%m/%Y")
+                periodo = ini if ini == fim_evento else f"{ini} a {fim_evento}"
+                linha = f"• {periodo} – {row.tipo} – {row.titulo}"
+                pdf.set_x(margin_x)
+                pdf.multi_cell(pdf.w - 2 * margin_x, 5, text=linha)
+
+        if progresso is not None:
+            # O output (recorte e compressão da fonte) conta como mais uma etapa
+            progresso(idx_pagina / (len(paginas) + 1))
+
+    # Gerado direto em memória: nada é gravado em disco
+    pdf_bytes = bytes(pdf.output())
+    if progresso is not None:
+        progresso(1.0)
+    return pdf_bytes
+
+
+# ======================================
+# GERAÇÃO EM SEGUNDO PLANO
+# ======================================
+# Threads que geram PDFs fora da execução da página. Pedidos com a mesma chave
+# reaproveitam o trabalho em andamento (duas sessões pedindo o mesmo PDF geram
+# uma vez só) ou o resultado pronto; ficam guardados os max_prontos mais
+# recentes. Um trabalho que falhou sai da fila para poder ser pedido de novo
+# (sozinho, ao terminar, ou por descartar, se quem esperava viu o erro antes).
+class TrabalhoPdf:
+
+    def __init__(self, chave):
+        self.chave = chave
+        self.fracao = 0.0
+        self.futuro = None
+
+    def avancar(self, fracao):
+        self.fracao = fracao
+
+
+class FilaPdf:
+
+    def __init__(self, trabalhadores=2, max_prontos=16):
+        self._executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix="pdf")
+        # RLock: add_done_callback roda na hora se o PDF já ficou pronto
+        self._trava = threading.RLock()
+        self._trabalhos = OrderedDict()  # chave -> TrabalhoPdf
+        self.max_prontos = max_prontos
+
+    def pedir(self, chave, df, **opcoes):
+        # opcoes: argumentos nomeados de gerar_pdf (titulo_extra, letivo...)
+        with self._trava:
+            trabalho = self._trabalhos.get(chave)
+            if trabalho is not None:
+                self._trabalhos.move_to_end(chave)
+                return trabalho
+
+            trabalho = TrabalhoPdf(chave)
+            trabalho.futuro = self._executor.submit(gerar_pdf, df, progresso=trabalho.avancar, **opcoes)
+            trabalho.futuro.add_done_callback(lambda futuro: self._concluido(chave, futuro))
+            self._trabalhos[chave] = trabalho
+            self._descartar_antigos()
+            return trabalho
+
+    def _concluido(self, chave, futuro):
+        if futuro.exception() is not None:
+            with self._trava:
+                trabalho = self._trabalhos.get(chave)
+                if trabalho is not None and trabalho.futuro is futuro:
+                    del self._trabalhos[chave]
+
+    def descartar(self, trabalho):
+        with self._trava:
+            if self._trabalhos.get(trabalho.chave) is trabalho:
+                del self._trabalhos[trabalho.chave]
+
+    def _descartar_antigos(self):
+        # Só descarta trabalhos terminados; os em andamento ainda têm quem espere
+        prontos = [c for c, t in self._trabalhos.items() if t.futuro.done()]
+        for chave in prontos[:max(len(prontos) - self.max_prontos, 0)]:
+            del self._trabalhos[chave]
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+# ======================================
+# RECORRÊNCIA DE EVENTOS (regras no estilo RRULE)
+# ======================================
+# Um evento recorrente é uma única linha em eventos:
+#   data        -> início da série (DTSTART)
+#   fim         -> última data possível da série (UNTIL)
+#   recorrencia -> regra no formato do iCalendar, ex.: "FREQ=WEEKLY;BYDAY=MO,WE"
+#                  (FREQ=DAILY ou WEEKLY, BYDAY e INTERVAL opcionais)
+#   excecoes    -> datas sem ocorrência (EXDATE), ISO separadas por vírgula
+# Como data/fim cobrem a série inteira, o filtro de intervalo do banco continua
+# valendo; as ocorrências só são geradas (expandir_recorrencias) para a janela
+# que está sendo exibida.
+
+DIAS_RRULE = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+NOMES_DIAS = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+
+
+def montar_regra(dias_semana, intervalo=1):
+    # dias_semana: índices de date.weekday() (0 = segunda)
+    regra = "FREQ=WEEKLY;BYDAY=" + ",".join(DIAS_RRULE[d] for d in sorted(set(dias_semana)))
+    if intervalo and int(intervalo) > 1:
+        regra += f";INTERVAL={int(intervalo)}"
+    return regra
+
+
+def ler_regra(texto):
+    partes = dict(
+        parte.split("=", 1) for parte in str(texto).strip().upper().split(";") if "=" in parte
+    )
+    freq = partes.get("FREQ", "WEEKLY")
+    if freq not in ("DAILY", "WEEKLY"):
+        raise ValueError(f"Frequência não suportada: {freq}")
+    dias = [DIAS_RRULE.index(d) for d in partes.get("BYDAY", "").split(",") if d in DIAS_RRULE]
+    return {"freq": freq, "dias": dias, "intervalo": max(int(partes.get("INTERVAL", 1)), 1)}
+
+
+def descrever_regra(texto):
+    regra = ler_regra(texto)
+    if regra["freq"] == "DAILY":
+        base = "todo dia" if regra["intervalo"] == 1 else f"a cada {regra['intervalo']} dias"
+    else:
+        base = "toda semana" if regra["intervalo"] == 1 else f"a cada {regra['intervalo']} semanas"
+    if regra["dias"]:
+        base += ": " + ", ".join(NOMES_DIAS[d] for d in sorted(regra["dias"]))
+    return base
+
+
+def ler_excecoes(texto):
+    if texto is None or (isinstance(texto, float) and pd.isna(texto)):
+        return []
+    return [d.strip() for d in str(texto).split(",") if d.strip()]
+
+
+def ler_datas_usuario(texto):
+    # "dd/mm/aaaa, dd/mm/aaaa" digitado na tela -> lista ISO; ValueError se inválida
+    datas = []
+    for parte in str(texto or "").replace(";", ",").split(","):
+        if not parte.strip():
+            continue
+        valor = pd.to_datetime(parte.strip(), format="%d/%m/%Y", errors="coerce")
+        if pd.isna(valor):
+            valor = pd.to_datetime(parte.strip(), format="%Y-%m-%d", errors="coerce")
+        if pd.isna(valor):
+            raise ValueError(f"Data inválida: {parte.strip()}")
+        datas.append(valor.date().isoformat())
+    return sorted(set(datas))
+
+
+def formatar_datas_usuario(texto):
+    return ", ".join(pd.to_datetime(d).strftime("%d/%m/%Y") for d in ler_excecoes(texto))
+
+
+def ocorrencias(inicio, fim, recorrencia, excecoes=None, janela_inicio=None, janela_fim=None):
+    # Datas (datetime64[D]) da série dentro de [inicio, fim] ∩ janela
+    regra = ler_regra(recorrencia)
+    inicio = np.datetime64(pd.Timestamp(inicio).date(), "D")
+    fim = np.datetime64(pd.Timestamp(fim).date(), "D")
+    de = inicio if janela_inicio is None else max(inicio, np.datetime64(pd.Timestamp(janela_inicio).date(), "D"))
+    ate = fim if janela_fim is None else min(fim, np.datetime64(pd.Timestamp(janela_fim).date(), "D"))
+    if ate < de:
+        return np.array([], dtype="datetime64[D]")
+
+    dias = np.arange(de, ate + np.timedelta64(1, "D"))
+    n = dias.astype(np.int64)
+    n_inicio = inicio.astype(np.int64)
+    # 1970-01-01 foi uma quinta-feira (weekday 3)
+    dia_semana = (n + 3) % 7
+
+    if regra["freq"] == "DAILY":
+        mascara = (n - n_inicio) % regra["intervalo"] == 0
+        if regra["dias"]:
+            mascara &= np.isin(dia_semana, regra["dias"])
+    else:
+        dias_regra = regra["dias"] or [int((n_inicio + 3) % 7)]
+        mascara = np.isin(dia_semana, dias_regra)
+        if regra["intervalo"] > 1:
+            # Semanas contadas a partir da segunda-feira da semana de início
+            segunda_inicio = n_inicio - (n_inicio + 3) % 7
+            mascara &= ((n - segunda_inicio) // 7) % regra["intervalo"] == 0
+
+    resultado = dias[mascara]
+    excluidas = ler_excecoes(excecoes)
+    if excluidas:
+        resultado = resultado[~np.isin(resultado, np.array(excluidas, dtype="datetime64[D]"))]
+    return resultado
+
+
+def expandir_recorrencias(df, inicio=None, fim=None):
+    # Troca cada linha recorrente pelas suas ocorrências (um dia cada) dentro
+    # de [inicio, fim]; eventos simples passam sem alteração. O id continua
+    # sendo o da série.
+    if df.empty or "recorrencia" not in df.columns:
+        return df
+    recorrente = df["recorrencia"].fillna("").astype(str).str.strip() != ""
+    if not recorrente.any():
+        return df
+
+    series = df[recorrente]
+    datas = [
+        ocorrencias(row.data, row.fim, row.recorrencia, row.excecoes, inicio, fim)
+        for row in series[["data", "fim", "recorrencia", "excecoes"]].itertuples(index=False)
+    ]
+    contagens = np.array([len(d) for d in datas])
+    expandidas = series.loc[series.index.repeat(contagens)].copy()
+    if len(expandidas):
+        dias = pd.to_datetime(np.concatenate(datas))
+        expandidas["data"] = dias
+        expandidas["fim"] = dias
+
+    partes = [parte for parte in (df[~recorrente], expandidas) if len(parte)]
+    if not partes:
+        return df.iloc[0:0].reset_index(drop=True)
+    resultado = pd.concat(partes, ignore_index=True)
+    return resultado.sort_values("data", kind="stable").reset_index(drop=True)
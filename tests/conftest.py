@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repositorio import RepositorioSQLite, criar_repositorio  # noqa: E402
+
+# ======================================
+# REPOSITÓRIOS PARA OS TESTES
+# ======================================
+# Os testes de contrato rodam no SQLite (arquivo temporário) e, se a variável
+# CALENDARIO_TESTE_PG_URL apontar para um PostgreSQL, também nele. ATENÇÃO:
+# o esquema public desse banco é apagado a cada teste; use um banco só para
+# testes.
+#
+#   CALENDARIO_TESTE_PG_URL=postgresql://localhost/calendario_teste python -m pytest -q
+
+
+def _repositorio_postgres():
+    url = os.environ.get("CALENDARIO_TESTE_PG_URL")
+    if not url:
+        pytest.skip("CALENDARIO_TESTE_PG_URL não definida")
+    psycopg = pytest.importorskip("psycopg")
+    pytest.importorskip("psycopg_pool")
+    try:
+        with psycopg.connect(url, autocommit=True) as conn:
+            conn.execute("DROP SCHEMA public CASCADE")
+            conn.execute("CREATE SCHEMA public")
+    except psycopg.OperationalError as erro:
+        pytest.skip(f"PostgreSQL indisponível: {erro}")
+    return criar_repositorio(url)
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def repo(request, tmp_path):
+    if request.param == "sqlite":
+        repo = RepositorioSQLite(str(tmp_path / "teste.db"))
+    else:
+        repo = _repositorio_postgres()
+    repo.preparar()
+    yield repo
+    repo.fechar()
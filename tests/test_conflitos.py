@@ -0,0 +1,152 @@
+import random
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from conflitos import (COLUNAS_RELATORIO, DURACAO_CURTA, IndiceIntervalos, conflitos_evento, em_conflito,
+                       validar_eventos)
+
+# ======================================
+# CONFLITOS ENTRE EVENTOS
+# ======================================
+
+
+def _eventos(*linhas):
+    # (id, data, fim, tipo[, recorrencia, excecoes]); todos no calendário 1
+    linhas = [tuple(linha) + (None,) * (6 - len(linha)) for linha in linhas]
+    df = pd.DataFrame(linhas, columns=["id", "data", "fim", "tipo", "recorrencia", "excecoes"])
+    df["data"] = pd.to_datetime(df["data"])
+    df["fim"] = pd.to_datetime(df["fim"])
+    df["titulo"] = [f"Evento {i}" for i in df["id"]]
+    df["id_calendario"] = 1
+    return df
+
+
+def _pares(relatorio):
+    return sorted(zip(relatorio["id_a"], relatorio["id_b"]))
+
+
+@pytest.mark.parametrize("tipo_a, tipo_b, esperado", [
+    ("aula", "feriado", True),
+    ("Feriado ", "AULA", True),
+    ("reunião", "reunião", True),
+    ("feriado", "reunião", True),
+    ("aula", "aula", False),
+    ("feriado", "feriado", False),
+    ("evento", "feriado", False),
+    ("reunião", "aula", False),
+])
+def test_em_conflito(tipo_a, tipo_b, esperado):
+    assert em_conflito(tipo_a, tipo_b) is esperado
+    assert em_conflito(tipo_b, tipo_a) is esperado
+
+
+@pytest.mark.parametrize("duracao", [2, DURACAO_CURTA + 10])
+def test_sobrepostos_encostar_nao_conta(duracao):
+    # Evento curto e longo (comparado fora da janela de busca binária)
+    inicio, fim = date(2026, 8, 3), date(2026, 8, 3) + timedelta(days=duracao)
+    indice = IndiceIntervalos(_eventos((1, inicio.isoformat(), fim.isoformat(), "feriado")))
+    um_dia = timedelta(days=1)
+    # Dividir um dia (datas inclusivas) já é sobrepor
+    assert len(indice.sobrepostos(inicio - 5 * um_dia, inicio)) == 1
+    assert len(indice.sobrepostos(fim, fim + 5 * um_dia)) == 1
+    assert len(indice.sobrepostos(inicio + um_dia, fim - um_dia)) == 1
+    # Encostar (terminar na véspera ou começar no dia seguinte) não é
+    assert len(indice.sobrepostos(inicio - 5 * um_dia, inicio - um_dia)) == 0
+    assert len(indice.sobrepostos(fim + um_dia, fim + 5 * um_dia)) == 0
+
+
+def test_conflitos_de_um_periodo():
+    indice = IndiceIntervalos(_eventos(
+        (1, "2026-08-10", "2026-08-10", "feriado"),
+        (2, "2026-08-03", "2026-08-14", "aula"),
+        (3, "2026-08-11", "2026-08-11", "reunião"),
+    ))
+    # Aula com aula não conflita; aula com feriado sim
+    assert [c[0] for c in indice.conflitos(date(2026, 8, 9), date(2026, 8, 12), "aula")] == [1]
+    # Reunião nova: feriado e a outra reunião
+    assert sorted(c[0] for c in indice.conflitos(date(2026, 8, 10), date(2026, 8, 11), "reunião")) == [1, 3]
+    # Editando a própria reunião: ela mesma não conta
+    assert indice.conflitos(date(2026, 8, 11), date(2026, 8, 11), "reunião", ignorar_id=3) == []
+    # Primeiro dia em conflito é o início da sobreposição
+    primeiro = {c[0]: c[3] for c in indice.conflitos(date(2026, 8, 1), date(2026, 8, 20), "feriado")}
+    assert sorted(primeiro) == [2, 3]
+    assert primeiro[2] == (pd.Timestamp(2026, 8, 3) - pd.Timestamp(1970, 1, 1)).days
+
+
+def test_conflitos_evento_recorrente():
+    indice = IndiceIntervalos(_eventos(
+        (1, "2026-08-11", "2026-08-11", "feriado"),
+        (2, "2026-08-17", "2026-08-17", "feriado"),
+        (3, "2026-08-24", "2026-08-28", "feriado"),
+    ))
+    # Aula às segundas: só as ocorrências contam (terça 11/08 fica de fora)
+    df = conflitos_evento(indice, date(2026, 8, 3), date(2026, 8, 31), "aula", "FREQ=WEEKLY;BYDAY=MO")
+    assert list(df["id"]) == [2, 3]
+    assert list(df["primeiro_dia"]) == [date(2026, 8, 17), date(2026, 8, 24)]
+
+    df = conflitos_evento(indice, date(2026, 8, 3), date(2026, 8, 31), "aula", "FREQ=WEEKLY;BYDAY=MO",
+                          excecoes="2026-08-17")
+    assert list(df["id"]) == [3]
+    assert list(df.columns) == ["id", "tipo", "titulo", "primeiro_dia"]
+
+
+def test_validar_eventos():
+    eventos = _eventos(
+        (1, "2026-08-03", "2026-08-31", "aula", "FREQ=WEEKLY;BYDAY=MO"),
+        # Feriado de duas semanas: pega duas segundas da série
+        (2, "2026-08-10", "2026-08-21", "feriado"),
+        (3, "2026-08-04", "2026-08-04", "aula"),
+        # Encosta no feriado sem sobrepor
+        (4, "2026-08-22", "2026-08-22", "reunião"),
+        (5, "2026-08-21", "2026-08-21", "evento"),
+        (6, "2026-08-22", "2026-08-22", "reunião"),
+    )
+    relatorio = validar_eventos(eventos, {1: "Graduação"})
+    assert list(relatorio.columns) == COLUNAS_RELATORIO
+    assert _pares(relatorio) == [(1, 2), (4, 6)]
+
+    serie = relatorio.iloc[0]
+    assert serie["calendario"] == "Graduação"
+    assert (serie["tipo_a"], serie["tipo_b"]) == ("aula", "feriado")
+    assert serie["primeiro_dia"] == pd.Timestamp(2026, 8, 10)
+    assert serie["dias_em_conflito"] == 2
+
+
+def test_validar_eventos_separa_calendarios():
+    eventos = _eventos((1, "2026-08-10", "2026-08-10", "feriado"), (2, "2026-08-10", "2026-08-10", "aula"))
+    eventos.loc[1, "id_calendario"] = 2
+    relatorio = validar_eventos(eventos)
+    assert relatorio.empty
+    assert list(relatorio.columns) == COLUNAS_RELATORIO
+
+
+def test_validar_eventos_igual_a_comparar_todos_os_pares():
+    # Eventos aleatórios, curtos e longos, alguns recorrentes, contra a
+    # comparação direta de todas as ocorrências
+    rnd = random.Random(3)
+    tipos = ["aula", "feriado", "reunião", "evento"]
+    linhas = []
+    for id_evento in range(1, 121):
+        inicio = date(2026, 1, 1) + timedelta(days=rnd.randrange(120))
+        duracao = rnd.choice([0, 0, 1, 3, 10, 45])
+        regra = "FREQ=WEEKLY;BYDAY=MO,TH" if duracao == 45 and rnd.random() < 0.5 else None
+        fim = inicio + timedelta(days=duracao)
+        linhas.append((id_evento, inicio.isoformat(), fim.isoformat(), rnd.choice(tipos), regra))
+    eventos = _eventos(*linhas)
+
+    indice = IndiceIntervalos(eventos)
+    esperado = {}
+    for p in range(len(indice)):
+        for q in range(len(indice)):
+            a, b = indice.ids[p], indice.ids[q]
+            if a < b and em_conflito(indice.tipos[p], indice.tipos[q]):
+                dias = min(indice.fim[p], indice.fim[q]) - max(indice.ini[p], indice.ini[q]) + 1
+                if dias > 0:
+                    esperado[(a, b)] = esperado.get((a, b), 0) + int(dias)
+
+    relatorio = validar_eventos(eventos)
+    obtido = dict(zip(zip(relatorio["id_a"], relatorio["id_b"]), relatorio["dias_em_conflito"]))
+    assert esperado
+    assert obtido == esperado
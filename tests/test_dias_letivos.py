@@ -0,0 +1,103 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from dias_letivos import CalendarioLetivo, montar_calendario_letivo
+
+# ======================================
+# DIAS LETIVOS
+# ======================================
+# Período de 03/08/2026 (segunda) a 21/08/2026 (sexta), feriado na segunda
+# 10/08: 5 + 4 + 5 = 14 dias letivos.
+
+
+def _eventos(*linhas):
+    df = pd.DataFrame(linhas, columns=["data", "fim", "tipo", "recorrencia", "excecoes"])
+    df["data"] = pd.to_datetime(df["data"])
+    df["fim"] = pd.to_datetime(df["fim"])
+    return df
+
+
+@pytest.fixture
+def letivo():
+    eventos = _eventos(
+        ("2026-08-10", "2026-08-10", "feriado", None, None),
+        # Outros tipos não tiram o dia letivo
+        ("2026-08-12", "2026-08-13", "evento", None, None),
+    )
+    return CalendarioLetivo(date(2026, 8, 3), date(2026, 8, 21), eventos)
+
+
+def test_total_e_dias(letivo):
+    assert letivo.total == 14
+    assert letivo.eh_letivo(date(2026, 8, 12))
+    assert not letivo.eh_letivo(date(2026, 8, 10))
+    assert not letivo.eh_letivo(date(2026, 8, 8))
+    assert not letivo.eh_letivo(date(2026, 8, 24))
+    assert letivo.por_mes().to_dict() == {"2026-08": 14}
+
+
+@pytest.mark.parametrize("a, b, esperado", [
+    (date(2026, 8, 3), date(2026, 8, 21), 14),
+    # Mesmo dia: 1 se letivo, 0 se não
+    (date(2026, 8, 4), date(2026, 8, 4), 1),
+    (date(2026, 8, 10), date(2026, 8, 10), 0),
+    # Extremos em fim de semana e no feriado
+    (date(2026, 8, 8), date(2026, 8, 10), 0),
+    (date(2026, 8, 9), date(2026, 8, 11), 1),
+    (date(2026, 8, 7), date(2026, 8, 11), 2),
+    (date(2026, 8, 10), date(2026, 8, 16), 4),
+    # Intervalo vazio (b antes de a)
+    (date(2026, 8, 14), date(2026, 8, 11), 0),
+    # Só a parte dentro do período conta
+    (date(2026, 7, 1), date(2026, 8, 4), 2),
+    (date(2026, 8, 20), date(2026, 9, 30), 2),
+    (date(2026, 7, 1), date(2026, 12, 31), 14),
+    (date(2026, 7, 1), date(2026, 7, 31), 0),
+    (date(2026, 9, 1), date(2026, 9, 30), 0),
+])
+def test_dias_letivos_entre(letivo, a, b, esperado):
+    assert letivo.dias_letivos_entre(a, b) == esperado
+
+
+@pytest.mark.parametrize("depois_de, n, esperado", [
+    # Estritamente depois: sexta -> pula o fim de semana e o feriado
+    (date(2026, 8, 7), 1, date(2026, 8, 11)),
+    (date(2026, 8, 10), 1, date(2026, 8, 11)),
+    (date(2026, 8, 8), 2, date(2026, 8, 12)),
+    (date(2026, 8, 3), 1, date(2026, 8, 4)),
+    # Antes do período: conta desde o primeiro dia
+    (date(2026, 7, 1), 1, date(2026, 8, 3)),
+    (date(2026, 7, 1), 14, date(2026, 8, 21)),
+    # Além do fim do semestre
+    (date(2026, 7, 1), 15, None),
+    (date(2026, 8, 20), 2, None),
+    (date(2026, 8, 21), 1, None),
+    (date(2026, 9, 1), 1, None),
+])
+def test_enesimo_dia_letivo(letivo, depois_de, n, esperado):
+    assert letivo.enesimo_dia_letivo(depois_de, n) == esperado
+
+
+def test_enesimo_dia_letivo_exige_n_positivo(letivo):
+    with pytest.raises(ValueError):
+        letivo.enesimo_dia_letivo(date(2026, 8, 3), 0)
+
+
+def test_periodo_vazio():
+    letivo = CalendarioLetivo(date(2026, 8, 21), date(2026, 8, 3))
+    assert letivo.total == 0
+    assert letivo.dias_letivos_entre(date(2026, 8, 1), date(2026, 8, 31)) == 0
+    assert letivo.enesimo_dia_letivo(date(2026, 8, 1), 1) is None
+    assert letivo.rotulo_mes(2026, 8) == ""
+
+
+def test_feriado_recorrente_e_rotulo():
+    # Feriado semanal só nas quartas de agosto: 3 quartas no período
+    eventos = _eventos(("2026-08-01", "2026-08-31", "feriado", "FREQ=WEEKLY;BYDAY=WE", None))
+    letivo = montar_calendario_letivo(eventos, date(2026, 8, 3), date(2026, 8, 21))
+    assert letivo.total == 15 - 3
+    assert letivo.rotulo_mes(2026, 8) == "12 dias letivos"
+    assert letivo.rotulo_mes(2026, 9) == ""
+    assert montar_calendario_letivo(eventos, None, date(2026, 8, 21)) is None
@@ -0,0 +1,107 @@
+import pytest
+
+from exportacao_eventos import _dobrar_linha_ics, gerar_ics
+
+# ======================================
+# ICALENDAR (.ics)
+# ======================================
+
+
+def _evento(id_evento, data, fim, titulo="Evento", tipo="evento", descricao="", regra="", excecoes=""):
+    # Mesma ordem de colunas de Repositorio.iterar_eventos
+    return (id_evento, data, fim, tipo, titulo, descricao, 1, "Graduação", "Superior", regra, excecoes)
+
+
+def _vevents(lotes):
+    # Propriedades de cada VEVENT, com as linhas dobradas já desfeitas
+    texto = b"".join(gerar_ics(lotes)).decode("utf-8")
+    assert texto.startswith("BEGIN:VCALENDAR\r\n") and texto.endswith("END:VCALENDAR\r\n")
+    eventos = []
+    for linha in texto.replace("\r\n ", "").split("\r\n"):
+        if linha == "BEGIN:VEVENT":
+            eventos.append({})
+        elif eventos and linha != "END:VEVENT" and ":" in linha:
+            nome, valor = linha.split(":", 1)
+            eventos[-1][nome] = valor
+    return eventos
+
+
+@pytest.mark.parametrize("evento, esperado", [
+    # Dia inteiro: DTEND é o dia seguinte (exclusivo)
+    (
+        _evento(1, "2026-04-21", "2026-04-21"),
+        {"DTSTART;VALUE=DATE": "20260421", "DTEND;VALUE=DATE": "20260422"},
+    ),
+    # Sem fim, termina no mesmo dia
+    (
+        _evento(2, "2026-04-21", None),
+        {"DTSTART;VALUE=DATE": "20260421", "DTEND;VALUE=DATE": "20260422"},
+    ),
+    # Vários dias, atravessando o mês
+    (
+        _evento(3, "2026-07-27", "2026-08-02"),
+        {"DTSTART;VALUE=DATE": "20260727", "DTEND;VALUE=DATE": "20260803"},
+    ),
+    # Série: começa na primeira ocorrência (a série começa num domingo),
+    # cada ocorrência dura um dia e o fim da série vira UNTIL
+    (
+        _evento(4, "2026-08-02", "2026-12-14", regra="FREQ=WEEKLY;BYDAY=MO"),
+        {
+            "DTSTART;VALUE=DATE": "20260803",
+            "DTEND;VALUE=DATE": "20260804",
+            "RRULE": "FREQ=WEEKLY;BYDAY=MO;UNTIL=20261214",
+        },
+    ),
+    # Exceções viram EXDATE
+    (
+        _evento(5, "2026-08-03", "2026-08-31", regra="FREQ=WEEKLY;BYDAY=MO,WE;INTERVAL=2",
+                excecoes="2026-08-05, 2026-08-17"),
+        {
+            "DTSTART;VALUE=DATE": "20260803",
+            "RRULE": "FREQ=WEEKLY;BYDAY=MO,WE;INTERVAL=2;UNTIL=20260831",
+            "EXDATE;VALUE=DATE": "20260805,20260817",
+        },
+    ),
+])
+def test_datas_e_regras(evento, esperado):
+    [propriedades] = _vevents([[evento]])
+    assert propriedades["UID"] == f"evento-{evento[0]}@calendario-ifto"
+    for nome, valor in esperado.items():
+        assert propriedades[nome] == valor
+    if not evento[9]:
+        assert "RRULE" not in propriedades and "EXDATE;VALUE=DATE" not in propriedades
+
+
+def test_serie_sem_ocorrencias_fica_de_fora():
+    # Todas as segundas da série estão nas exceções
+    eventos = _vevents([[
+        _evento(1, "2026-08-03", "2026-08-10", regra="FREQ=WEEKLY;BYDAY=MO", excecoes="2026-08-03,2026-08-10"),
+        _evento(2, "2026-08-04", None),
+    ]])
+    assert [e["UID"] for e in eventos] == ["evento-2@calendario-ifto"]
+
+
+def test_textos_escapados():
+    [propriedades] = _vevents([[
+        _evento(1, "2026-03-02", None, titulo="Aula; turma A, B", descricao="Sala 2\\3\nBloco C")
+    ]])
+    assert propriedades["SUMMARY"] == r"Aula\; turma A\, B"
+    assert propriedades["DESCRIPTION"] == r"Sala 2\\3\nBloco C"
+    assert propriedades["X-IFTO-CALENDARIO"] == "Graduação"
+
+
+@pytest.mark.parametrize("linha", [
+    "SUMMARY:curta",
+    "SUMMARY:" + "x" * 67,
+    "SUMMARY:" + "x" * 68,
+    "DESCRIPTION:" + "Reunião pedagógica com coordenação – " * 6,
+    "DESCRIPTION:" + "ç" * 100,
+])
+def test_linhas_dobradas_em_75_octetos(linha):
+    dobrada = _dobrar_linha_ics(linha)
+    fisicas = dobrada[:-2].split("\r\n")
+    assert dobrada.endswith("\r\n")
+    assert all(len(f.encode("utf-8")) <= 75 for f in fisicas)
+    assert all(f.startswith(" ") for f in fisicas[1:])
+    assert dobrada[:-2].replace("\r\n ", "") == linha
+    assert (len(fisicas) == 1) == (len(linha.encode("utf-8")) <= 75)
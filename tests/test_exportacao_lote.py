@@ -0,0 +1,50 @@
+import io
+import zipfile
+from datetime import date
+
+from exportacao_lote import exportar_todos, listar_tarefas
+from repositorio import RepositorioSQLite
+
+# ======================================
+# EXPORTAÇÃO EM LOTE
+# ======================================
+
+
+def _banco(tmp_path):
+    caminho = str(tmp_path / "lote.db")
+    repo = RepositorioSQLite(caminho)
+    repo.preparar()
+    return repo, caminho
+
+
+def test_nomes_no_zip_nao_repetem(tmp_path):
+    repo, caminho = _banco(tmp_path)
+    try:
+        # Todos viram "A_B" / "A-B" em nome_arquivo_pdf
+        id_espaco = repo.inserir_calendario("A B", "", "Geral")
+        repo.inserir_calendario("A_B", "", "Geral")
+        repo.inserir_calendario("A/B", "", "Geral")
+        repo.inserir_calendario("A-B", "", "Geral")
+        repo.inserir_semestre(id_espaco, "1/2026", date(2026, 2, 2), date(2026, 7, 10))
+        repo.inserir_semestre(id_espaco, "1-2026", date(2026, 8, 3), date(2026, 12, 18))
+    finally:
+        repo.fechar()
+
+    arquivos = [t["arquivo"] for t in listar_tarefas(caminho)]
+    assert len(arquivos) == len(set(arquivos)) == 6
+    assert f"{id_espaco}_calendario_IFTO_A_B_1-2026.pdf" in arquivos
+    assert f"{id_espaco}_calendario_IFTO_A_B_1-2026_2.pdf" in arquivos
+
+
+def test_zip_tem_um_pdf_por_tarefa(tmp_path):
+    repo, caminho = _banco(tmp_path)
+    try:
+        repo.inserir_calendario("A B", "", "Geral")
+        repo.inserir_calendario("A_B", "", "Geral")
+    finally:
+        repo.fechar()
+
+    zip_bytes, relatorio = exportar_todos(caminho, processos=1)
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
+        nomes = zf.namelist()
+    assert len(nomes) == len(set(nomes)) == len(relatorio) == 3
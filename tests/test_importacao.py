@@ -0,0 +1,87 @@
+from datetime import date
+
+import pytest
+
+from importacao import agrupar_intervalos
+
+# ======================================
+# AGRUPAMENTO DE DIAS EM INTERVALOS
+# ======================================
+
+
+def _linha(data, titulo="Recesso", tipo="recesso", descricao="", fim=""):
+    return {"data": data, "fim": fim, "tipo": tipo, "titulo": titulo, "descricao": descricao}
+
+
+def _agrupar(linhas):
+    estatisticas = {"linhas": 0, "ignoradas": 0, "invalidas": 0}
+    return sorted(agrupar_intervalos(linhas, estatisticas)), estatisticas
+
+
+D = date
+
+
+@pytest.mark.parametrize("linhas, esperado", [
+    # Dias seguidos do mesmo evento viram um intervalo
+    (
+        [_linha("2026-07-13"), _linha("2026-07-14"), _linha("2026-07-15")],
+        [(D(2026, 7, 13), D(2026, 7, 15), "recesso", "Recesso", "")],
+    ),
+    # Um dia de folga separa os intervalos
+    (
+        [_linha("2026-07-13"), _linha("2026-07-15")],
+        [
+            (D(2026, 7, 13), D(2026, 7, 13), "recesso", "Recesso", ""),
+            (D(2026, 7, 15), D(2026, 7, 15), "recesso", "Recesso", ""),
+        ],
+    ),
+    # Coluna fim estende o intervalo; fim antes da data vale a própria data
+    (
+        [_linha("2026-07-13", fim="2026-07-17"), _linha("2026-07-18"), _linha("2026-08-03", fim="2026-08-01")],
+        [
+            (D(2026, 7, 13), D(2026, 7, 18), "recesso", "Recesso", ""),
+            (D(2026, 8, 3), D(2026, 8, 3), "recesso", "Recesso", ""),
+        ],
+    ),
+    # Eventos intercalados no mesmo dia são agrupados cada um com o seu
+    (
+        [
+            _linha("2026-04-20", "Semana acadêmica", "evento"),
+            _linha("2026-04-21", "Tiradentes", "feriado"),
+            _linha("2026-04-21", "Semana acadêmica", "evento"),
+            _linha("2026-04-22", "Semana acadêmica", "evento"),
+        ],
+        [
+            (D(2026, 4, 20), D(2026, 4, 22), "evento", "Semana acadêmica", ""),
+            (D(2026, 4, 21), D(2026, 4, 21), "feriado", "Tiradentes", ""),
+        ],
+    ),
+    # Descrição diferente é outro evento; tipo é normalizado
+    (
+        [_linha("2026-09-07", tipo=" Feriado ", descricao="Nacional"), _linha("2026-09-08", tipo="feriado")],
+        [
+            (D(2026, 9, 7), D(2026, 9, 7), "feriado", "Recesso", "Nacional"),
+            (D(2026, 9, 8), D(2026, 9, 8), "feriado", "Recesso", ""),
+        ],
+    ),
+])
+def test_agrupar_intervalos(linhas, esperado):
+    intervalos, estatisticas = _agrupar(linhas)
+    assert intervalos == esperado
+    assert estatisticas == {"linhas": len(linhas), "ignoradas": 0, "invalidas": 0}
+
+
+def test_linhas_em_branco_e_datas_invalidas():
+    # Datas reservadas sem evento (como nos CSVs do repositório) são puladas
+    intervalos, estatisticas = _agrupar([
+        _linha("2026-01-01", "Confraternização", "feriado"),
+        _linha("2026-01-02", "", ""),
+        {"data": "", "tipo": "aula", "titulo": "Sem data"},
+        _linha("32/13/2026"),
+        {"data": "2026-01-05", "tipo": "aula", "titulo": "Sem descrição nem fim", "descricao": None},
+    ])
+    assert intervalos == [
+        (D(2026, 1, 1), D(2026, 1, 1), "feriado", "Confraternização", ""),
+        (D(2026, 1, 5), D(2026, 1, 5), "aula", "Sem descrição nem fim", ""),
+    ]
+    assert estatisticas == {"linhas": 5, "ignoradas": 2, "invalidas": 1}
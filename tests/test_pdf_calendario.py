@@ -0,0 +1,52 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pdf_calendario import DIAS_SEMANA, PDF_CORES, PRIORIDADE, SEMANA, FilaPdf, bloco_mes, gerar_pdf
+
+# ======================================
+# BLOCOS DOS MESES E FILA DE PDFS
+# ======================================
+
+
+def test_bloco_do_mes():
+    # Janeiro de 2026 começa numa quinta: 3 células vazias antes do dia 1
+    cores = np.full(31, -1, dtype=np.int8)
+    cores[0] = PRIORIDADE.index("feriado")
+    comandos = bloco_mes(2026, 1, 90.0, 80.0, cores.tobytes())
+
+    textos = [c[5] for c in comandos if c[0] == "texto"]
+    assert textos == ["JANEIRO", *DIAS_SEMANA, *(str(d) for d in range(1, 32))]
+    bordas = [c for c in comandos if c[0] == "retangulo" and c[5] is None]
+    assert len(bordas) == 7 * len(SEMANA.monthdayscalendar(2026, 1))
+    # Só o dia 1 tem fundo, na cor do feriado
+    assert [c for c in comandos if c[0] == "cor_fundo"] == [("cor_fundo", *PDF_CORES["feriado"])]
+    assert comandos[-1] == ("cor_texto", 0, 0, 0)
+
+
+def test_blocos_reaproveitados_entre_documentos():
+    df = pd.DataFrame({
+        "data": pd.to_datetime(["2026-04-21"]), "fim": pd.to_datetime(["2026-04-21"]),
+        "tipo": ["feriado"], "titulo": ["Tiradentes"], "descricao": [""], "recorrencia": [None],
+    })
+    bloco_mes.cache_clear()
+    primeiro = gerar_pdf(df, inicio=date(2026, 1, 1), fim=date(2026, 12, 31))
+    depois_do_primeiro = bloco_mes.cache_info()
+    gerar_pdf(df, titulo_extra="Outro calendário", inicio=date(2026, 1, 1), fim=date(2026, 12, 31))
+    info = bloco_mes.cache_info()
+    assert primeiro.startswith(b"%PDF")
+    assert depois_do_primeiro.misses == 12
+    assert info.misses == 12 and info.hits == 12
+
+
+def test_trabalho_com_erro_sai_da_fila():
+    fila = FilaPdf(trabalhadores=1)
+    trabalho = fila.pedir("quebrado", None)
+    with pytest.raises(Exception):
+        trabalho.futuro.result(timeout=30)
+
+    fila.descartar(trabalho)
+    # Novo pedido com a mesma chave gera de novo, em vez de repetir o erro
+    assert fila.pedir("quebrado", None) is not trabalho
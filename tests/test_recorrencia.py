@@ -0,0 +1,124 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from recorrencia import expandir_recorrencias, ler_regra, montar_regra, ocorrencias
+
+# ======================================
+# RECORRÊNCIA (ocorrencias / expandir_recorrencias)
+# ======================================
+
+
+def _datas(*isos):
+    return [date.fromisoformat(d) for d in isos]
+
+
+def _lista(resultado):
+    return [d.astype(date) for d in resultado]
+
+
+@pytest.mark.parametrize("inicio, fim, regra, excecoes, esperado", [
+    # Semanal num dia: UNTIL (fim) entra quando cai numa ocorrência
+    ("2026-08-03", "2026-08-31", "FREQ=WEEKLY;BYDAY=MO", None,
+     _datas("2026-08-03", "2026-08-10", "2026-08-17", "2026-08-24", "2026-08-31")),
+    # Fim um dia antes da última segunda: ela fica de fora
+    ("2026-08-03", "2026-08-30", "FREQ=WEEKLY;BYDAY=MO", None,
+     _datas("2026-08-03", "2026-08-10", "2026-08-17", "2026-08-24")),
+    # Início no meio da semana: só os dias da regra a partir dele
+    ("2026-08-05", "2026-08-17", "FREQ=WEEKLY;BYDAY=MO,WE", None,
+     _datas("2026-08-05", "2026-08-10", "2026-08-12", "2026-08-17")),
+    # Sem BYDAY: o dia da semana do início
+    ("2026-08-06", "2026-08-20", "FREQ=WEEKLY", None,
+     _datas("2026-08-06", "2026-08-13", "2026-08-20")),
+    # INTERVAL semanal conta semanas a partir da segunda da semana do início
+    ("2026-08-05", "2026-09-02", "FREQ=WEEKLY;BYDAY=MO,WE;INTERVAL=2", None,
+     _datas("2026-08-05", "2026-08-17", "2026-08-19", "2026-08-31", "2026-09-02")),
+    # INTERVAL diário conta dias a partir do início
+    ("2026-08-01", "2026-08-10", "FREQ=DAILY;INTERVAL=3", None,
+     _datas("2026-08-01", "2026-08-04", "2026-08-07", "2026-08-10")),
+    # Diário restrito a dias da semana
+    ("2026-08-06", "2026-08-11", "FREQ=DAILY;BYDAY=MO,TU,WE,TH,FR", None,
+     _datas("2026-08-06", "2026-08-07", "2026-08-10", "2026-08-11")),
+    # EXDATE remove só as datas da série (a de 2026-08-11 não é ocorrência)
+    ("2026-08-03", "2026-08-24", "FREQ=WEEKLY;BYDAY=MO", "2026-08-10, 2026-08-11,2026-08-24",
+     _datas("2026-08-03", "2026-08-17")),
+    # Regra em minúsculas
+    ("2026-08-03", "2026-08-10", "freq=weekly;byday=mo", "",
+     _datas("2026-08-03", "2026-08-10")),
+    # Fim antes do início: nenhuma ocorrência
+    ("2026-08-10", "2026-08-03", "FREQ=WEEKLY;BYDAY=MO", None, []),
+])
+def test_ocorrencias(inicio, fim, regra, excecoes, esperado):
+    resultado = ocorrencias(inicio, fim, regra, excecoes)
+    assert resultado.dtype == np.dtype("datetime64[D]")
+    assert _lista(resultado) == esperado
+
+
+@pytest.mark.parametrize("regra, janela, esperado", [
+    ("FREQ=WEEKLY;BYDAY=MO", ("2026-08-11", "2026-08-24"), _datas("2026-08-17", "2026-08-24")),
+    # A janela não muda a contagem do INTERVAL, que segue o início da série
+    ("FREQ=WEEKLY;BYDAY=MO;INTERVAL=2", ("2026-08-12", None), _datas("2026-08-17", "2026-08-31")),
+    ("FREQ=WEEKLY;BYDAY=MO", ("2026-07-01", "2026-08-03"), _datas("2026-08-03")),
+    ("FREQ=WEEKLY;BYDAY=MO", ("2026-09-01", "2026-09-30"), []),
+])
+def test_ocorrencias_na_janela(regra, janela, esperado):
+    resultado = ocorrencias("2026-08-03", "2026-08-31", regra, None, *janela)
+    assert _lista(resultado) == esperado
+
+
+def test_frequencia_nao_suportada():
+    with pytest.raises(ValueError):
+        ler_regra("FREQ=MONTHLY")
+
+
+def test_montar_regra():
+    assert montar_regra([2, 0, 2]) == "FREQ=WEEKLY;BYDAY=MO,WE"
+    assert ler_regra(montar_regra([4], 3)) == {"freq": "WEEKLY", "dias": [4], "intervalo": 3}
+
+
+def _eventos(*linhas):
+    df = pd.DataFrame(linhas, columns=["id", "data", "fim", "tipo", "titulo", "recorrencia", "excecoes"])
+    df["data"] = pd.to_datetime(df["data"])
+    df["fim"] = pd.to_datetime(df["fim"])
+    return df
+
+
+def test_expandir_recorrencias():
+    df = _eventos(
+        (1, "2026-08-03", "2026-08-24", "aula", "Semanal", "FREQ=WEEKLY;BYDAY=MO", "2026-08-10"),
+        # Evento simples de vários dias passa sem alteração
+        (2, "2026-08-05", "2026-08-07", "evento", "Semana acadêmica", None, None),
+        (3, "2026-08-11", "2026-08-11", "feriado", "Feriado", "", None),
+    )
+    resultado = expandir_recorrencias(df)
+
+    assert list(resultado["id"]) == [1, 2, 3, 1, 1]
+    assert list(resultado["data"].dt.date) == _datas(
+        "2026-08-03", "2026-08-05", "2026-08-11", "2026-08-17", "2026-08-24"
+    )
+    # Cada ocorrência da série dura um dia, mesmo com a série cobrindo semanas
+    serie = resultado[resultado["id"] == 1]
+    assert (serie["fim"] == serie["data"]).all()
+    simples = resultado[resultado["id"] == 2].iloc[0]
+    assert simples["fim"] == pd.Timestamp(2026, 8, 7)
+
+
+def test_expandir_recorrencias_na_janela():
+    df = _eventos(
+        (1, "2026-08-03", "2026-12-14", "aula", "Semanal", "FREQ=WEEKLY;BYDAY=MO", None),
+        (2, "2026-01-05", "2026-01-05", "evento", "Fora da janela", None, None),
+    )
+    resultado = expandir_recorrencias(df, date(2026, 9, 1), date(2026, 9, 14))
+    # Eventos simples não são filtrados pela janela; as séries sim
+    assert list(resultado["id"]) == [2, 1, 1]
+    assert list(resultado["data"].dt.date[1:]) == _datas("2026-09-07", "2026-09-14")
+
+
+def test_expandir_serie_sem_ocorrencias():
+    df = _eventos((1, "2026-08-03", "2026-08-10", "aula", "Semanal", "FREQ=WEEKLY;BYDAY=MO",
+                   "2026-08-03,2026-08-10"))
+    resultado = expandir_recorrencias(df)
+    assert resultado.empty
+    assert list(resultado.columns) == list(df.columns)
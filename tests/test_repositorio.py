@@ -0,0 +1,270 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from estatisticas import agregar_estatisticas
+from recorrencia import expandir_recorrencias
+from repositorio import ErroIntegridade, Repositorio
+
+# ======================================
+# CONTRATO DO REPOSITÓRIO (SQLITE E POSTGRESQL)
+# ======================================
+# Os mesmos testes valem para toda implementação de Repositorio (ver a
+# fixture repo em conftest.py).
+
+
+def _calendario(repo, nome="Calendário Teste"):
+    return repo.inserir_calendario(nome, "", "Graduação")
+
+
+def _eventos(repo, id_cal):
+    df = repo.carregar_eventos(id_cal)
+    return {row["titulo"]: row for _, row in df.iterrows()}
+
+
+def _estatisticas_esperadas(repo, id_cal):
+    # O que a tabela pré-agregada deveria conter, recalculado dos eventos
+    df = repo.carregar_eventos(id_cal)
+    eventos = df[["id_calendario", "data", "fim", "tipo", "recorrencia", "excecoes"]]
+    return agregar_estatisticas(eventos).astype({"eventos": int, "dias": int})
+
+
+def _estatisticas_gravadas(repo, id_cal):
+    df = repo.estatisticas(id_cal)
+    return df.astype({"id_calendario": int, "eventos": int, "dias": int})
+
+
+def test_repositorio_base_e_abstrato():
+    with pytest.raises(TypeError):
+        Repositorio()
+
+
+def test_preparar_pode_repetir(repo):
+    # O esquema novo já traz o calendário padrão, criado uma única vez
+    repo.preparar()
+    assert list(repo.carregar_calendarios()["nome_calendario"]) == ["Calendário Geral"]
+
+
+def test_calendarios(repo):
+    id_cal = _calendario(repo)
+    assert repo.id_calendario_por_nome("Calendário Teste") == id_cal
+    assert repo.id_calendario_por_nome("Outro") is None
+
+    with pytest.raises(ErroIntegridade):
+        _calendario(repo)
+
+    repo.atualizar_calendario(id_cal, "Renomeado", "desc", "Técnico")
+    df = repo.carregar_calendarios().set_index("id")
+    assert df.loc[id_cal, "nome_calendario"] == "Renomeado"
+    assert df.loc[id_cal, "nivel_ensino"] == "Técnico"
+
+
+def test_inserir_e_carregar_eventos(repo):
+    id_cal = _calendario(repo)
+    repo.inserir_evento(date(2026, 3, 2), "aula", "Início das aulas", "", None, id_cal)
+    repo.inserir_evento(date(2026, 4, 3), "feriado", "Sexta-feira Santa", "Nacional", date(2026, 4, 3), id_cal)
+
+    df = repo.carregar_eventos(id_cal)
+    assert list(df["titulo"]) == ["Início das aulas", "Sexta-feira Santa"]
+    assert pd.api.types.is_datetime64_any_dtype(df["data"])
+    assert pd.api.types.is_datetime64_any_dtype(df["fim"])
+    # Sem data de fim, o evento termina no mesmo dia
+    assert df["fim"].iloc[0] == pd.Timestamp(2026, 3, 2)
+
+
+def test_carregar_eventos_vazio_tem_datas(repo):
+    df = repo.carregar_eventos(_calendario(repo))
+    assert df.empty
+    assert pd.api.types.is_datetime64_any_dtype(df["data"])
+    assert pd.api.types.is_datetime64_any_dtype(df["fim"])
+
+
+def test_filtro_por_calendario_e_periodo(repo):
+    id_a = _calendario(repo, "A")
+    id_b = _calendario(repo, "B")
+    repo.inserir_evento(date(2026, 1, 10), "aula", "Janeiro", "", None, id_a)
+    repo.inserir_evento(date(2026, 2, 25), "recesso", "Atravessa março", "", date(2026, 3, 5), id_a)
+    repo.inserir_evento(date(2026, 6, 1), "aula", "Junho", "", None, id_a)
+    repo.inserir_evento(date(2026, 3, 10), "aula", "Outro calendário", "", None, id_b)
+
+    df = repo.carregar_eventos(id_a, date(2026, 3, 1), date(2026, 3, 31))
+    # Sobreposição com o período: o evento que começa em fevereiro entra
+    assert list(df["titulo"]) == ["Atravessa março"]
+
+    assert len(repo.carregar_eventos(id_a)) == 3
+    assert len(repo.carregar_eventos()) == 4
+
+
+def test_pagina_eventos(repo):
+    id_cal = _calendario(repo)
+    for dia in range(1, 8):
+        repo.inserir_evento(date(2026, 5, dia), "aula", f"Aula {dia}", "", None, id_cal)
+    repo.inserir_evento(date(2026, 5, 20), "reuniao", "Conselho de classe", "", None, id_cal)
+
+    pagina, total = repo.pagina_eventos(id_cal, limite=3, deslocamento=3)
+    assert total == 8
+    assert list(pagina["titulo"]) == ["Aula 4", "Aula 5", "Aula 6"]
+
+    pagina, total = repo.pagina_eventos(id_cal, busca="conselho")
+    assert total == 1
+    assert list(pagina["titulo"]) == ["Conselho de classe"]
+
+    # % digitado na busca vale literalmente
+    _, total = repo.pagina_eventos(id_cal, busca="%")
+    assert total == 0
+
+    _, total = repo.pagina_eventos(id_cal, inicio=date(2026, 5, 6), fim=date(2026, 5, 31))
+    assert total == 3
+
+
+def test_buscar_eventos(repo):
+    id_grad = _calendario(repo, "Graduação 2026")
+    id_tec = repo.inserir_calendario("Técnico 2026", "", "Técnico")
+    repo.inserir_evento(date(2026, 3, 9), "reuniao", "Conselho de classe", "", None, id_grad)
+    repo.inserir_evento(date(2026, 3, 9), "reuniao", "Reunião pedagógica", "pauta do conselho", None, id_tec)
+    repo.inserir_evento(date(2026, 3, 10), "aula", "Aula inaugural", "", None, id_tec)
+
+    df, total = repo.buscar_eventos("conse")
+    assert total == 2
+    assert set(df["nome_calendario"]) == {"Graduação 2026", "Técnico 2026"}
+
+    _, total = repo.buscar_eventos("conselho", nivel_ensino="Técnico")
+    assert total == 1
+    _, total = repo.buscar_eventos("aula inaugural", tipo="Aula")
+    assert total == 1
+    _, total = repo.buscar_eventos("   ")
+    assert total == 0
+
+
+def test_atualizar_e_excluir_evento(repo):
+    id_cal = _calendario(repo)
+    repo.inserir_evento(date(2026, 8, 3), "aula", "Início", "", None, id_cal)
+    repo.inserir_evento(date(2026, 8, 10), "aula", "Removido", "", None, id_cal)
+    versao = repo.versao_dados(id_cal)
+
+    id_evento = int(_eventos(repo, id_cal)["Início"]["id"])
+    repo.atualizar_evento(id_evento, date(2026, 8, 4), " Reuniao ", "Início adiado", "", date(2026, 8, 5))
+    evento = repo.carregar_evento(id_evento)
+    assert evento["titulo"] == "Início adiado"
+    assert evento["tipo"] == "reuniao"
+    assert pd.Timestamp(evento["fim"]) == pd.Timestamp(2026, 8, 5)
+
+    repo.excluir_evento(int(_eventos(repo, id_cal)["Removido"]["id"]))
+    assert list(repo.carregar_eventos(id_cal)["titulo"]) == ["Início adiado"]
+    assert repo.versao_dados(id_cal) == versao + 2
+
+
+def test_estatisticas_acompanham_alteracoes(repo):
+    id_cal = _calendario(repo)
+    repo.inserir_evento(date(2026, 1, 30), "recesso", "Recesso", "", date(2026, 2, 2), id_cal)
+    repo.inserir_evento(
+        date(2026, 3, 2), "aula", "Aula semanal", "", date(2026, 3, 30), id_cal,
+        recorrencia="FREQ=WEEKLY;BYDAY=MO"
+    )
+    repo.inserir_eventos_lote(id_cal, [
+        ("2026-03-05", "2026-03-05", "feriado", "Feriado local", ""),
+        ("2026-04-21", "2026-04-21", "feriado", "Tiradentes", ""),
+    ])
+
+    gravadas = _estatisticas_gravadas(repo, id_cal)
+    pd.testing.assert_frame_equal(
+        gravadas.reset_index(drop=True),
+        _estatisticas_esperadas(repo, id_cal)[gravadas.columns].reset_index(drop=True),
+        check_dtype=False
+    )
+    recesso = gravadas[gravadas["tipo"] == "recesso"].set_index("mes")
+    assert recesso.loc["2026-01", "eventos"] == 1 and recesso.loc["2026-01", "dias"] == 2
+    assert recesso.loc["2026-02", "eventos"] == 0 and recesso.loc["2026-02", "dias"] == 2
+
+    eventos = _eventos(repo, id_cal)
+    repo.atualizar_evento(int(eventos["Tiradentes"]["id"]), date(2026, 5, 1), "feriado", "Trabalho", "", None)
+    repo.excluir_evento(int(eventos["Recesso"]["id"]))
+
+    gravadas = _estatisticas_gravadas(repo, id_cal)
+    pd.testing.assert_frame_equal(
+        gravadas.reset_index(drop=True),
+        _estatisticas_esperadas(repo, id_cal)[gravadas.columns].reset_index(drop=True),
+        check_dtype=False
+    )
+    assert "recesso" not in set(gravadas["tipo"])
+    assert list(repo.estatisticas(id_cal, date(2026, 5, 1), date(2026, 5, 31))["tipo"]) == ["feriado"]
+
+
+def test_excluir_calendario_remove_dependentes(repo):
+    id_cal = _calendario(repo)
+    repo.inserir_semestre(id_cal, "1º Semestre 2026", date(2026, 2, 2), date(2026, 7, 10))
+    repo.inserir_evento(date(2026, 3, 2), "aula", "Aula", "", None, id_cal)
+
+    repo.excluir_calendario(id_cal)
+    assert id_cal not in set(repo.carregar_calendarios()["id"])
+    assert repo.carregar_eventos(id_cal).empty
+    assert repo.carregar_semestres_por_calendario(id_cal).empty
+    assert repo.estatisticas(id_cal).empty
+
+
+def test_iterar_eventos_em_lotes(repo):
+    id_cal = _calendario(repo)
+    repo.inserir_eventos_lote(id_cal, [
+        (f"2026-09-{dia:02d}", f"2026-09-{dia:02d}", "aula", f"Aula {dia}", "") for dia in range(1, 11)
+    ])
+    lotes = list(repo.iterar_eventos(id_cal, tamanho_lote=4))
+    assert [len(lote) for lote in lotes] == [4, 4, 2]
+
+
+def _ocorrencias_esperadas(repo, id_cal, inicio, fim):
+    # Todas as ocorrências que cruzam o período, no mês em que começam (ou no
+    # de inicio, se começaram antes), recalculadas dos eventos
+    df = expandir_recorrencias(repo.carregar_eventos(id_cal), inicio, fim)
+    if inicio is not None:
+        df = df[df["fim"] >= pd.Timestamp(inicio)]
+        df = df.assign(data=df["data"].clip(lower=pd.Timestamp(inicio)))
+    if fim is not None:
+        df = df[df["data"] <= pd.Timestamp(fim)]
+    return df.groupby([df["data"].dt.strftime("%Y-%m"), "tipo"]).size().to_dict()
+
+
+def _semestre_com_series(repo):
+    id_cal = _calendario(repo)
+    repo.inserir_evento(date(2026, 7, 28), "recesso", "Começa antes", "", date(2026, 8, 5), id_cal)
+    repo.inserir_evento(date(2026, 8, 3), "aula", "Semanal", "", date(2026, 12, 14), id_cal,
+                        recorrencia="FREQ=WEEKLY;BYDAY=MO", excecoes="2026-10-12")
+    repo.inserir_evento(date(2026, 7, 1), "reunião", "Colegiado", "", date(2026, 12, 31), id_cal,
+                        recorrencia="FREQ=WEEKLY;BYDAY=FR")
+    repo.inserir_evento(date(2026, 9, 15), "reunião", "Conselho", "", None, id_cal)
+    repo.inserir_evento(date(2026, 10, 12), "feriado", "Nossa Senhora Aparecida", "", None, id_cal)
+    repo.inserir_evento(date(2026, 12, 10), "evento", "Termina depois", "", date(2026, 12, 25), id_cal)
+    repo.inserir_evento(date(2026, 12, 20), "recesso", "Depois do semestre", "", None, id_cal)
+    return id_cal
+
+
+def test_ocorrencias_do_semestre_iguais_a_tabela(repo):
+    # Totais, gráfico por mês e tabela contam as mesmas ocorrências
+    id_cal = _semestre_com_series(repo)
+    inicio, fim = date(2026, 8, 3), date(2026, 12, 18)
+
+    df = repo.ocorrencias_por_mes(id_cal, inicio, fim)
+    por_tipo = df.groupby("tipo")["eventos"].sum().to_dict()
+    # 20 segundas menos a exceção; 20 sextas no semestre + o conselho
+    assert por_tipo == {"aula": 19, "evento": 1, "feriado": 1, "recesso": 1, "reunião": 21}
+    assert df.groupby("mes")["eventos"].sum().to_dict() == {
+        "2026-08": 10, "2026-09": 9, "2026-10": 9, "2026-11": 9, "2026-12": 6
+    }
+    assert repo.contar_ocorrencias(id_cal, inicio=inicio, fim=fim) == int(df["eventos"].sum()) == 43
+    assert repo.contar_ocorrencias(id_cal, busca="semanal", inicio=inicio, fim=fim) == 19
+
+
+@pytest.mark.parametrize("inicio, fim", [
+    (date(2026, 8, 3), date(2026, 12, 18)),
+    (date(2026, 8, 1), date(2026, 11, 30)),
+    (date(2026, 8, 10), date(2026, 8, 20)),
+    (date(2026, 9, 30), date(2026, 10, 1)),
+    (None, date(2026, 10, 20)),
+    (date(2026, 10, 20), None),
+    (None, None),
+])
+def test_ocorrencias_por_mes_igual_ao_recalculo(repo, inicio, fim):
+    id_cal = _semestre_com_series(repo)
+    df = repo.ocorrencias_por_mes(id_cal, inicio, fim)
+    assert {(m, t): e for m, t, e in df.itertuples(index=False)} == _ocorrencias_esperadas(repo, id_cal, inicio, fim)
+    assert repo.contar_ocorrencias(id_cal, inicio=inicio, fim=fim) == int(df["eventos"].sum())